@@ -0,0 +1,109 @@
+# agent_connection.py
+#
+# The GUI end of the link to a helper process (kernel.py, debug_agent.py).
+# listen() opens a local listener guarded by a random authkey and returns
+# the port and key to pass on the helper's command line; the helper
+# connects back, and messages sent before that are queued until it does.
+# Messages are small dicts; send() numbers them with an 'id' that replies
+# carry back.
+
+import itertools
+import os
+import socket
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class AgentConnection(QObject):
+    connected = pyqtSignal()
+    message_received = pyqtSignal(object)
+
+    # Cross-thread hand-offs from the connection reader; the listener says
+    # which listen() they belong to
+    _accepted = pyqtSignal(object, object)
+    _received = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = None
+        self._listener = None  # Until the helper connects
+        self._current = None  # Listener of the latest listen()
+        self._pending = []  # Messages sent before the helper connected
+        self._ids = itertools.count(1)
+
+        self._accepted.connect(self._handle_accepted)
+        self._received.connect(self._handle_received)
+
+    def is_connected(self):
+        return self.connection is not None
+
+    def listen(self):
+        # Returns the [port, authkey-hex] arguments for the helper
+        self.close()
+        authkey = os.urandom(16)
+        self._listener = self._current = Listener(('127.0.0.1', 0), authkey=authkey)
+        threading.Thread(target=self._serve, args=(self._listener,), daemon=True).start()
+        return [str(self._listener.address[1]), authkey.hex()]
+
+    def close(self):
+        # Called once the helper has exited, or failed to start
+        if self._listener is not None:
+            # It never connected; wake the blocked accept()
+            try:
+                socket.create_connection(self._listener.address, timeout=1).close()
+            except OSError:
+                pass
+            self._listener = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self._current = None
+        self._pending.clear()
+
+    def send(self, message):
+        message['id'] = next(self._ids)
+        if self.connection is None:
+            self._pending.append(message)
+        else:
+            self._send_now(message)
+        return message['id']
+
+    def _send_now(self, message):
+        try:
+            self.connection.send(message)
+        except OSError:
+            pass  # The helper died; its manager hears so from the process
+
+    def _serve(self, listener):
+        # Runs on a background thread: accept the helper, then read its messages
+        try:
+            connection = listener.accept()
+        except (OSError, EOFError, AuthenticationError):
+            return
+        finally:
+            listener.close()
+        self._accepted.emit(listener, connection)
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            self._received.emit(listener, message)
+
+    def _handle_accepted(self, listener, connection):
+        if listener is not self._current:
+            connection.close()  # From a helper that has since been closed
+            return
+        self._listener = None
+        self.connection = connection
+        pending, self._pending = self._pending, []
+        for message in pending:
+            self._send_now(message)
+        self.connected.emit()
+
+    def _handle_received(self, listener, message):
+        if listener is self._current:
+            self.message_received.emit(message)
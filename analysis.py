@@ -0,0 +1,260 @@
+# analysis.py
+#
+# Background code analysis. Every CodeEditor owns an AnalysisService that
+# numbers document revisions, debounces edits and forwards requests to a single
+# worker thread shared by all editors. Results come back through signals, are
+# routed by document id to the service that asked, and are dropped when a newer
+# revision has been requested in the meantime.
+
+import ast
+import itertools
+import re
+
+from PyQt6.QtCore import QObject, QThread, QTimer, QCoreApplication, pyqtSignal, pyqtSlot
+
+from folding import ast_regions
+from symbol_index import module_symbols
+
+DEBOUNCE_INTERVAL = 300  # Milliseconds of typing silence before re-analysis
+
+_document_ids = itertools.count(1)
+_worker = None
+_worker_thread = None
+_router = None
+
+
+class AnalysisWorker(QObject):
+    analysis_finished = pyqtSignal(int, int, object)  # document id, revision, result
+    completions_finished = pyqtSignal(int, int, object)  # document id, request, names
+
+    def __init__(self):
+        super().__init__()
+        # Latest revision per document, written from the GUI thread when a
+        # request is queued so the worker can skip requests that went stale
+        # while they waited in the queue.
+        self.latest_revisions = {}
+        # Completion requests are numbered apart from revisions: a request made
+        # at the start of a word stays wanted while the word is being typed
+        self.latest_completions = {}
+        self._scripts = {}  # document id -> (revision, jedi.Script)
+
+    def is_stale(self, document_id, revision):
+        return self.latest_revisions.get(document_id, revision) > revision
+
+    @pyqtSlot(int, int, str)
+    def analyze(self, document_id, revision, code):
+        if self.is_stale(document_id, revision):
+            return
+        # folds and symbols stay None when the code does not parse, so the
+        # editor keeps the ones from the last version that did
+        result = {'variables': set(), 'functions': set(), 'diagnostics': {}, 'folds': None, 'symbols': None}
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            add_syntax_error(result['diagnostics'], code, e)
+            tree = None
+        except ValueError:
+            tree = None  # e.g. null bytes in the source
+        if tree is not None:
+            result['diagnostics'] = collect_diagnostics(code, tree)
+            result['folds'] = ast_regions(tree)
+            result['symbols'] = module_symbols(tree)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.FunctionDef):
+                    result['functions'].add(node.name)
+                elif isinstance(node, ast.Assign):
+                    for target in node.targets:
+                        if isinstance(target, ast.Name):
+                            result['variables'].add(target.id)
+        self.analysis_finished.emit(document_id, revision, result)
+
+    @pyqtSlot(int, int, int, str, int, int)
+    def complete(self, document_id, request, revision, code, line, column):
+        if self.latest_completions.get(document_id, request) > request:
+            return
+        try:
+            completions = [c.name for c in self._script(document_id, revision, code).complete(line, column)]
+        except Exception:
+            completions = []  # The editor falls back to keywords
+        self.completions_finished.emit(document_id, request, completions)
+
+    @pyqtSlot(int)
+    def forget(self, document_id):
+        self._scripts.pop(document_id, None)
+        self.latest_revisions.pop(document_id, None)
+        self.latest_completions.pop(document_id, None)
+
+    def _script(self, document_id, revision, code):
+        # Reuse the document's Script while its text is unchanged, so repeated
+        # completions at one revision share jedi's inference caches
+        cached = self._scripts.get(document_id)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        import jedi  # Deferred: importing jedi is slow and only needed here
+        script = jedi.Script(code, path=None)
+        self._scripts[document_id] = (revision, script)
+        return script
+
+
+# --- Diagnostics ---
+# Diagnostics map 0-based line numbers to tuples of
+# (start column, end column or None for end of line, message, severity).
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+_WORD_RE = re.compile(r'\w+|\S')
+
+
+def add_syntax_error(diagnostics, code, error):
+    line_count = code.count('\n') + 1
+    line = min(max((error.lineno or 1) - 1, 0), line_count - 1)
+    start = max((error.offset or 1) - 1, 0)
+    end = None
+    if getattr(error, 'end_offset', None) and getattr(error, 'end_lineno', None) == error.lineno:
+        end = max(error.end_offset - 1, start + 1)
+    diagnostics.setdefault(line, []).append((start, end, error.msg, SEVERITY_ERROR))
+
+
+def collect_diagnostics(code, tree):
+    # One parse serves every check: the compiler catches errors ast.parse
+    # accepts ('return' outside a function, ...), pyflakes adds lint warnings.
+    diagnostics = {}
+    try:
+        compile(tree, '<editor>', 'exec')
+    except SyntaxError as e:
+        add_syntax_error(diagnostics, code, e)
+
+    try:
+        from pyflakes.checker import Checker
+    except ImportError:
+        return diagnostics  # pyflakes is optional
+
+    lines = code.split('\n')
+    for message in Checker(tree, filename='<editor>').messages:
+        line = message.lineno - 1
+        if not 0 <= line < len(lines):
+            continue
+        start = getattr(message, 'col', 0) or 0
+        match = _WORD_RE.match(lines[line], start)
+        end = match.end() if match else start + 1
+        text = message.message % message.message_args
+        if any(existing[2] == text for existing in diagnostics.get(line, ())):
+            continue  # Already reported by the compiler
+        diagnostics.setdefault(line, []).append((start, end, text, SEVERITY_WARNING))
+    return diagnostics
+
+
+class ResultRouter(QObject):
+    # Lives in the GUI thread and is the worker's only listener, so each
+    # result reaches just the one service it belongs to however many
+    # editors are open.
+    def __init__(self, worker):
+        super().__init__()
+        self.services = {}  # document id -> AnalysisService
+        worker.analysis_finished.connect(self._on_analysis_finished)
+        worker.completions_finished.connect(self._on_completions_finished)
+
+    def add(self, service):
+        document_id = service.document_id
+        self.services[document_id] = service
+        service.destroyed.connect(lambda: self.services.pop(document_id, None))
+
+    def remove(self, service):
+        self.services.pop(service.document_id, None)
+
+    def _on_analysis_finished(self, document_id, revision, result):
+        service = self.services.get(document_id)
+        if service is not None:
+            service._on_analysis_finished(revision, result)
+
+    def _on_completions_finished(self, document_id, request, completions):
+        service = self.services.get(document_id)
+        if service is not None:
+            service._on_completions_finished(request, completions)
+
+
+def shared_router():
+    global _router
+    if _router is None:
+        _router = ResultRouter(shared_worker())
+    return _router
+
+
+def shared_worker():
+    global _worker, _worker_thread
+    if _worker is None:
+        _worker_thread = QThread()
+        _worker_thread.setObjectName("LAEFEX analysis")
+        _worker = AnalysisWorker()
+        _worker.moveToThread(_worker_thread)
+        _worker_thread.start(QThread.Priority.LowPriority)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_stop_worker)
+    return _worker
+
+
+def _stop_worker():
+    if _worker_thread is not None:
+        _worker_thread.quit()
+        _worker_thread.wait()
+
+
+class AnalysisService(QObject):
+    analysis_ready = pyqtSignal(object)
+    completions_ready = pyqtSignal(object)
+
+    # Requests are delivered to the worker thread through queued signals
+    _analyze_requested = pyqtSignal(int, int, str)
+    _complete_requested = pyqtSignal(int, int, int, str, int, int)
+    _forget_requested = pyqtSignal(int)
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.document_id = next(_document_ids)
+        self.revision = 0
+        self.completion_request = 0
+
+        self.worker = shared_worker()
+        self._analyze_requested.connect(self.worker.analyze)
+        self._complete_requested.connect(self.worker.complete)
+        self._forget_requested.connect(self.worker.forget)
+        self.router = shared_router()
+        self.router.add(self)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_INTERVAL)
+        self.debounce_timer.timeout.connect(self._request_analysis)
+
+    def document_changed(self):
+        # Called for real text edits only (QTextDocument.contentsChange), so
+        # re-highlighting never invalidates a revision. Coalesce a burst of
+        # edits into one analysis after the debounce window.
+        self.revision += 1
+        self.worker.latest_revisions[self.document_id] = self.revision
+        self.debounce_timer.start()
+
+    def request_completions(self, line, column):
+        # Only the newest request is answered
+        self.completion_request += 1
+        self.worker.latest_completions[self.document_id] = self.completion_request
+        self._complete_requested.emit(self.document_id, self.completion_request, self.revision,
+                                      self.editor.toPlainText(), line, column)
+
+    def shutdown(self):
+        self.debounce_timer.stop()
+        self.router.remove(self)
+        self._forget_requested.emit(self.document_id)
+
+    def _request_analysis(self):
+        self._analyze_requested.emit(self.document_id, self.revision, self.editor.toPlainText())
+
+    def _on_analysis_finished(self, revision, result):
+        if revision == self.revision:
+            self.analysis_ready.emit(result)
+
+    def _on_completions_finished(self, request, completions):
+        if request == self.completion_request:
+            self.completions_ready.emit(completions)
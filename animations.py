@@ -0,0 +1,49 @@
+# animations.py
+#
+# Fade-ins that leave nothing behind. A QGraphicsOpacityEffect makes Qt draw
+# the widget and all its children offscreen and composite the result on
+# every paint, even at full opacity, so the effect is removed as soon as the
+# fade ends. Top-level windows fade through windowOpacity instead, which
+# the window system composites at no cost to Qt's painting. With
+# ui/reduced_motion set nothing is animated at all.
+
+from PyQt6.QtWidgets import QGraphicsOpacityEffect, QApplication
+from PyQt6.QtCore import QPropertyAnimation, QEasingCurve, QAbstractAnimation
+
+import settings
+
+# Platforms that warn on every windowOpacity change instead of applying it
+NO_WINDOW_OPACITY = ('offscreen', 'minimal')
+
+
+def animations_enabled():
+    return not settings.value('ui/reduced_motion')
+
+
+def fade_in(widget, duration=1000):
+    # Returns the running animation, or None when animations are off. The
+    # animation is a child of the widget, so it goes away with it. Call it
+    # once the widget has its parent: it decides how to fade from that.
+    if not animations_enabled():
+        return None
+    if widget.isWindow():
+        if QApplication.platformName() in NO_WINDOW_OPACITY:
+            return None
+        animation = QPropertyAnimation(widget, b"windowOpacity", widget)
+    else:
+        effect = QGraphicsOpacityEffect(widget)
+        widget.setGraphicsEffect(effect)
+        animation = QPropertyAnimation(effect, b"opacity", widget)
+
+        def remove_effect():
+            # Deletes the effect, and with it the offscreen rendering
+            if widget.graphicsEffect() is effect:
+                widget.setGraphicsEffect(None)
+
+        animation.finished.connect(remove_effect)
+    animation.setDuration(duration)
+    animation.setStartValue(0.0)
+    animation.setEndValue(1.0)
+    animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+    animation.start(QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
+    return animation
@@ -0,0 +1,224 @@
+# batch.py
+#
+# Qt-free batch runner. Runs many scripts through the execution engine with at
+# most `workers` children alive at once (one per core by default), each with
+# an optional timeout and memory limit, and keeps their exit codes, durations
+# and output. Callbacks come from background threads, as with ScriptProcess.
+#
+#     python main.py batch tests/ extra_check.py --timeout 60 --memory-limit 512
+
+import argparse
+import os
+import sys
+import threading
+
+from execution import ScriptProcess
+
+MAX_CAPTURED_OUTPUT = 1000000  # Characters kept per stream; older output is dropped
+
+# Job states
+STATE_PENDING = 'pending'
+STATE_RUNNING = 'running'
+STATE_PASSED = 'passed'
+STATE_FAILED = 'failed'
+STATE_TIMED_OUT = 'timed out'
+STATE_CANCELLED = 'cancelled'
+
+
+class BatchJob:
+    def __init__(self, path, name=None, cwd=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.cwd = cwd if cwd is not None else os.path.dirname(os.path.abspath(path))
+        self.state = STATE_PENDING
+        self.result = None  # ExecutionResult once finished
+        self.timed_out = False
+        self._output = {'stdout': [], 'stderr': []}
+        self._sizes = {'stdout': 0, 'stderr': 0}
+
+    def add_output(self, stream, text):
+        chunks = self._output[stream]
+        chunks.append(text)
+        self._sizes[stream] += len(text)
+        if self._sizes[stream] > 2 * MAX_CAPTURED_OUTPUT:
+            kept = ''.join(chunks)[-MAX_CAPTURED_OUTPUT:]
+            chunks[:] = [kept]
+            self._sizes[stream] = len(kept)
+
+    def output(self, stream):
+        return ''.join(self._output[stream])[-MAX_CAPTURED_OUTPUT:]
+
+    def __repr__(self):
+        return f"BatchJob(name={self.name!r}, state={self.state!r}, result={self.result!r})"
+
+
+def collect_scripts(paths):
+    # Files as given; folders contribute their own .py files, sorted
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            scripts += sorted(os.path.join(path, name) for name in os.listdir(path)
+                              if name.endswith('.py') and os.path.isfile(os.path.join(path, name)))
+        else:
+            scripts.append(path)
+    return scripts
+
+
+class BatchRunner:
+    def __init__(self, jobs, workers=None, timeout=None, memory_limit=None,
+                 on_started=None, on_finished=None, on_done=None):
+        # on_started(job) and on_finished(job) are called per job, on_done()
+        # once every job has finished or been cancelled
+        self.jobs = list(jobs)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout or None  # Seconds
+        self.memory_limit = memory_limit or None  # Bytes
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self.on_done = on_done
+        self._pending = list(reversed(self.jobs))
+        self._running = {}  # job -> (ScriptProcess, timeout timer)
+        self._stopped = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            launched = self._launch_available()
+            done = not self._running and not self._pending
+        self._report_started(launched)
+        if done:
+            self._finish()
+
+    def is_running(self):
+        return not self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def stop(self):
+        # Pending jobs are cancelled, running ones stopped
+        with self._lock:
+            self._stopped = True
+            cancelled, self._pending = self._pending, []
+            running = [process for process, _ in self._running.values()]
+        for job in cancelled:
+            job.state = STATE_CANCELLED
+            if self.on_finished:
+                self.on_finished(job)
+        for process in running:
+            process.stop()
+        if cancelled and not running:
+            self._finish()
+
+    def _launch_available(self):
+        # Called with the lock held
+        launched = []
+        while self._pending and len(self._running) < self.workers and not self._stopped:
+            job = self._pending.pop()
+            process = ScriptProcess(on_output=job.add_output,
+                                    on_finished=lambda result, job=job: self._job_finished(job, result))
+            timer = None
+            if self.timeout:
+                timer = threading.Timer(self.timeout, self._job_timed_out, args=(job, process))
+                timer.daemon = True
+            job.state = STATE_RUNNING
+            try:
+                process.start(job.path, cwd=job.cwd, memory_limit=self.memory_limit)
+            except OSError as e:
+                job.add_output('stderr', f"{e}\n")
+                job.state = STATE_FAILED
+                launched.append(job)
+                continue
+            self._running[job] = (process, timer)
+            if timer is not None:
+                timer.start()
+            launched.append(job)
+        return launched
+
+    def _report_started(self, jobs):
+        for job in jobs:
+            if job.state == STATE_RUNNING:
+                if self.on_started:
+                    self.on_started(job)
+            elif self.on_finished:
+                self.on_finished(job)  # Could not be started
+
+    def _job_timed_out(self, job, process):
+        job.timed_out = True
+        process.stop()
+
+    def _job_finished(self, job, result):
+        with self._lock:
+            _, timer = self._running.pop(job)
+            if timer is not None:
+                timer.cancel()
+            job.result = result
+            if job.timed_out:
+                job.state = STATE_TIMED_OUT
+            elif result.cancelled:
+                job.state = STATE_CANCELLED
+            else:
+                job.state = STATE_PASSED if result.exit_code == 0 else STATE_FAILED
+            launched = self._launch_available()
+            done = not self._running and not self._pending
+        if self.on_finished:
+            self.on_finished(job)
+        self._report_started(launched)
+        if done:
+            self._finish()
+
+    def _finish(self):
+        if self._done.is_set():
+            return
+        self._done.set()
+        if self.on_done:
+            self.on_done()
+
+
+# --- Command line ---
+def print_job(job, stream):
+    duration = f"{job.result.wall_time:.2f}s" if job.result else '-'
+    exit_code = job.result.exit_code if job.result else '-'
+    print(f"{job.state:<10} {exit_code!s:>5} {duration:>9}  {job.path}", file=stream, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='laefex batch', description="Run scripts concurrently")
+    parser.add_argument('paths', nargs='+', help="scripts, or folders whose .py files are run")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="scripts run at once (default: one per core)")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds before a script is stopped")
+    parser.add_argument('--memory-limit', type=int, default=None, help="address space limit per script, in MB")
+    parser.add_argument('--output', action='store_true', help="print the output of scripts that did not pass")
+    args = parser.parse_args(argv)
+
+    jobs = [BatchJob(path) for path in collect_scripts(args.paths)]
+    lock = threading.Lock()
+
+    def finished(job):
+        with lock:
+            print_job(job, sys.stdout)
+
+    runner = BatchRunner(jobs, args.jobs, args.timeout,
+                         args.memory_limit * 1024 * 1024 if args.memory_limit else None,
+                         on_finished=finished)
+    runner.start()
+    try:
+        runner.wait()
+    except KeyboardInterrupt:
+        runner.stop()
+        runner.wait()
+
+    failed = [job for job in jobs if job.state != STATE_PASSED]
+    if args.output:
+        for job in failed:
+            print(f"\n--- {job.path} ({job.state}) ---")
+            sys.stdout.write(job.output('stdout'))
+            sys.stdout.write(job.output('stderr'))
+    print(f"{len(jobs) - len(failed)} of {len(jobs)} scripts passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
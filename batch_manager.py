@@ -0,0 +1,34 @@
+# batch_manager.py
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from batch import BatchRunner
+
+
+class BatchManager(QObject):
+    # Signals are emitted from the runner's threads; Qt queues them onto the
+    # GUI thread because this object lives there.
+    job_started = pyqtSignal(object)  # BatchJob
+    job_finished = pyqtSignal(object)  # BatchJob
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.runner = None
+
+    def is_running(self):
+        return self.runner is not None and self.runner.is_running()
+
+    def run(self, jobs, workers=None, timeout=None, memory_limit=None):
+        if self.is_running():
+            return False
+        self.runner = BatchRunner(jobs, workers, timeout, memory_limit,
+                                  on_started=self.job_started.emit,
+                                  on_finished=self.job_finished.emit,
+                                  on_done=self.finished.emit)
+        self.runner.start()
+        return True
+
+    def stop(self):
+        if self.runner is not None:
+            self.runner.stop()
@@ -0,0 +1,110 @@
+# batch_results.py
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QSplitter, QTableWidget, QTableWidgetItem, QPlainTextEdit, QLabel,
+    QAbstractItemView, QHeaderView
+)
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt
+
+from batch import STATE_PASSED, STATE_FAILED, STATE_TIMED_OUT, STATE_CANCELLED, STATE_RUNNING
+
+JOB_ROLE = Qt.ItemDataRole.UserRole
+STATE_COLORS = {
+    STATE_PASSED: '#4ec9b0',
+    STATE_FAILED: '#f48771',
+    STATE_TIMED_OUT: '#dcdcaa',
+    STATE_CANCELLED: '#808080',
+}
+COLUMNS = ['Script', 'Status', 'Exit Code', 'Duration (s)']
+
+
+class BatchResultsPanel(QWidget):
+    # One sortable row per job of the current batch; the output of the
+    # selected job is shown below the table
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        # Rows stay in run order until a header is clicked
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.itemSelectionChanged.connect(self.show_selected_output)
+        splitter.addWidget(self.table)
+        self.output_view = QPlainTextEdit()
+        self.output_view.setReadOnly(True)
+        splitter.addWidget(self.output_view)
+        layout.addWidget(splitter)
+
+        self.jobs = []
+        self._items = {}  # job -> its Script item, which stays with the row when sorting
+
+    def set_jobs(self, jobs):
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        self.output_view.clear()
+        self.jobs = list(jobs)
+        self._items.clear()
+        self.table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            item = QTableWidgetItem(job.name)
+            item.setData(JOB_ROLE, job)
+            item.setToolTip(job.path)
+            self._items[job] = item
+            self.table.setItem(row, 0, item)
+            for column in range(1, len(COLUMNS)):
+                self.table.setItem(row, column, QTableWidgetItem())
+            self.fill_row(row, job)
+        self.table.setSortingEnabled(True)
+        self.update_summary()
+
+    def update_job(self, job):
+        item = self._items.get(job)
+        if item is None:
+            return
+        # Rows move while sorting is on, so it is paused for the update
+        self.table.setSortingEnabled(False)
+        self.fill_row(self.table.row(item), job)
+        self.table.setSortingEnabled(True)
+        self.update_summary()
+        if self.table.currentRow() == self.table.row(item):
+            self.show_selected_output()
+
+    def fill_row(self, row, job):
+        status = self.table.item(row, 1)
+        status.setText(job.state)
+        if job.state in STATE_COLORS:
+            status.setForeground(QColor(STATE_COLORS[job.state]))
+        if job.result is not None:
+            # Numbers rather than text, so the columns sort numerically
+            self.table.item(row, 2).setData(Qt.ItemDataRole.DisplayRole, job.result.exit_code)
+            self.table.item(row, 3).setData(Qt.ItemDataRole.DisplayRole, round(job.result.wall_time, 2))
+
+    def update_summary(self):
+        counts = {}
+        for job in self.jobs:
+            counts[job.state] = counts.get(job.state, 0) + 1
+        text = f"{counts.get(STATE_PASSED, 0)} of {len(self.jobs)} passed"
+        for state in (STATE_FAILED, STATE_TIMED_OUT, STATE_CANCELLED, STATE_RUNNING):
+            if counts.get(state):
+                text += f", {counts[state]} {state}"
+        self.summary_label.setText(text)
+
+    def show_selected_output(self):
+        row = self.table.currentRow()
+        if row < 0:
+            self.output_view.clear()
+            return
+        job = self.table.item(row, 0).data(JOB_ROLE)
+        self.output_view.setPlainText(job.output('stdout') + job.output('stderr'))
@@ -0,0 +1,757 @@
+# benchmarks.py
+#
+# Micro-benchmarks for editor hot paths. Run one with e.g.
+#
+#     python benchmarks.py highlighter --lines 20000
+#
+# Qt is started with the offscreen platform unless QT_QPA_PLATFORM is set.
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+SAMPLE_CHUNK = '''\
+import os
+from collections import defaultdict
+
+
+@decorator(option=True)
+class Sample(object):
+    """Docstring spanning
+    more than one line."""
+
+    def method(self, value=0x1F, *args, **kwargs):
+        # A comment with 'quotes' inside
+        result = [len(x) ** 2 for x in range(value) if x % 3 != 0]
+        mapping = {'key': "value", 'other': 3.14e-2}
+        return sorted(result) + list(mapping) if result else None
+'''
+
+
+def sample_source(lines):
+    chunk = SAMPLE_CHUNK.splitlines()
+    return '\n'.join(chunk[i % len(chunk)] for i in range(lines))
+
+
+_app = None
+
+
+def _gui_application():
+    global _app
+    if _app is None:
+        from PyQt6.QtWidgets import QApplication
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _app
+
+
+# --- Highlighter ---
+def _legacy_highlighter_class():
+    # The per-rule implementation the tokenizer replaced: one globalMatch pass
+    # per keyword, builtin and operator. Kept here as the "before" baseline.
+    import builtins
+    import keyword
+    from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat
+    from PyQt6.QtCore import QRegularExpression
+
+    class LegacyRegexHighlighter(QSyntaxHighlighter):
+        def __init__(self, document):
+            super().__init__(document)
+            fmt = QTextCharFormat()
+            patterns = [r'\b' + kw + r'\b' for kw in keyword.kwlist]
+            patterns += [r'\b' + fn + r'\b' for fn in dir(builtins)]
+            patterns += [
+                r'\+', r'-', r'\*', r'/', r'//', r'%', r'\*\*',
+                r'==', r'!=', r'<', r'<=', r'>', r'>=', r'=', r'\+=', r'-=',
+                r'\*=', r'/=', r'%=', r'\^', r'\|', r'&', r'~', r'>>', r'<<',
+                r'\{', r'\}', r'\(', r'\)', r'\[', r'\]',
+                r'".*?"', r"'.*?'", r'#.*', r'\b[0-9]+(\.[0-9]+)?\b', r'@\w+',
+                r'\bdef\b\s+(\w+)', r'\bclass\b\s+(\w+)',
+            ]
+            self.rules = [(QRegularExpression(p), fmt) for p in patterns]
+
+        def highlightBlock(self, text):
+            for pattern, fmt in self.rules:
+                it = pattern.globalMatch(text)
+                while it.hasNext():
+                    match = it.next()
+                    self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+            self.setCurrentBlockState(0)
+
+    return LegacyRegexHighlighter
+
+
+def _load_time(document, text):
+    start = time.perf_counter()
+    document.setPlainText(text)
+    return time.perf_counter() - start
+
+
+def _plain_text_document():
+    # Same layout as QPlainTextEdit; without a layout Qt emits no change signals
+    from PyQt6.QtGui import QTextDocument
+    from PyQt6.QtWidgets import QPlainTextDocumentLayout
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    return document
+
+
+def _time_highlighter(highlighter_class, text, edits):
+    from PyQt6.QtGui import QTextCursor
+
+    # Cost of building the document alone, subtracted from the highlighted load
+    baseline = _load_time(_plain_text_document(), text)
+
+    document = _plain_text_document()
+    highlighter = highlighter_class(document)
+    # Let the highlighter's deferred initial pass run on the empty document,
+    # after which Qt highlights synchronously on every content change
+    _gui_application().processEvents()
+
+    full = max(_load_time(document, text) - baseline, 0.0)
+
+    # Typing in the middle of the file
+    cursor = QTextCursor(document.findBlockByNumber(document.blockCount() // 2))
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    start = time.perf_counter()
+    for _ in range(edits):
+        cursor.insertText('x')
+    edit = (time.perf_counter() - start) / edits
+
+    del highlighter
+    return full, full / document.blockCount(), edit
+
+
+def bench_highlighter(args):
+    _gui_application()
+    from syntax_highlighter import SyntaxHighlighter
+
+    text = sample_source(args.lines)
+    print(f"Highlighting {args.lines} lines")
+    print(f"{'implementation':<16}{'full pass':>12}{'per block':>14}{'per keystroke':>16}")
+    for name, highlighter_class in (('per-rule regex', _legacy_highlighter_class()),
+                                    ('tokenizer', SyntaxHighlighter)):
+        full, per_block, edit = _time_highlighter(highlighter_class, text, args.edits)
+        print(f"{name:<16}{full * 1e3:>10.1f}ms{per_block * 1e6:>12.1f}us{edit * 1e6:>14.1f}us")
+
+
+# --- Minimap ---
+def bench_minimap(args):
+    _gui_application()
+    from PyQt6.QtGui import QTextCursor
+    from code_editor import CodeEditor
+
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.show()
+    editor.setPlainText(sample_source(args.lines))
+    _gui_application().processEvents()
+    editor.verticalScrollBar().setValue(editor.verticalScrollBar().maximum() // 2)
+    _gui_application().processEvents()
+    minimap = editor.minimap
+
+    def frame_time(action):
+        times = []
+        for _ in range(args.edits):
+            action()
+            _gui_application().processEvents()
+            start = time.perf_counter()
+            minimap.repaint()
+            times.append(time.perf_counter() - start)
+        times.sort()
+        return times[len(times) // 2], times[-1]
+
+    start = time.perf_counter()
+    minimap.repaint()
+    first = time.perf_counter() - start
+    cursor = QTextCursor(editor.firstVisibleBlock().next().next())
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    print(f"Minimap of {args.lines} lines, {args.edits} frames each")
+    print(f"{'frame':<20}{'median':>12}{'max':>12}")
+    print(f"{'first paint':<20}{first * 1e3:>10.2f}ms{'':>12}")
+    for name, action in (('idle', lambda: None),
+                         ('typing', lambda: cursor.insertText('x')),
+                         ('new line', lambda: cursor.insertText('\n'))):
+        median, worst = frame_time(action)
+        print(f"{name:<20}{median * 1e3:>10.2f}ms{worst * 1e3:>10.2f}ms")
+
+
+def bench_gutter(args):
+    _gui_application()
+    from code_editor import CodeEditor
+
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.show()
+    editor.setPlainText(sample_source(args.lines))
+    _gui_application().processEvents()
+    bar = editor.verticalScrollBar()
+
+    # Times the gutter's own paints, including the partial ones Qt issues
+    # for the rows a scroll exposes
+    paint = editor.line_number_area_paint_event
+    spent = []
+
+    def timed_paint(event):
+        start = time.perf_counter()
+        paint(event)
+        spent[-1] += time.perf_counter() - start
+
+    editor.line_number_area_paint_event = timed_paint
+
+    def frame_time(step):
+        times = []
+        bar.setValue(0)
+        _gui_application().processEvents()
+        for _ in range(args.frames):
+            spent.append(0.0)
+            bar.setValue(bar.value() + step)
+            _gui_application().processEvents()
+            times.append(spent[-1])
+        times.sort()
+        return times[len(times) // 2], times[-1]
+
+    print(f"Gutter of {args.lines} lines, {args.frames} frames each")
+    print(f"{'scroll':<20}{'median':>12}{'max':>12}")
+    for name, step in (('line', 1), ('page', bar.pageStep())):
+        median, worst = frame_time(step)
+        print(f"{name:<20}{median * 1e3:>10.2f}ms{worst * 1e3:>10.2f}ms")
+
+
+def bench_index(args):
+    import tempfile
+    from symbol_index import SymbolIndex
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        index = SymbolIndex(os.path.join(cache_dir, 'index.sqlite3'))
+        full = index.update(args.root, args.processes)
+        refresh = index.update(args.root, args.processes)
+        count = index.connection.execute('SELECT count(*) FROM symbols').fetchone()[0]
+        print(f"Index of {args.root}: {full.files} files, {count} symbols")
+        print(f"{'update':<20}{'time':>12}")
+        print(f"{'full build':<20}{full.elapsed * 1e3:>10.1f}ms")
+        print(f"{'unchanged':<20}{refresh.elapsed * 1e3:>10.1f}ms")
+        start = time.perf_counter()
+        index.name_text()  # Built by the update thread in the editor
+        print(f"{'name list':<20}{(time.perf_counter() - start) * 1e3:>10.1f}ms")
+
+        queries = ['get', 'Thread', 'parse', 'open', 'run', 'x', 'Path', 'read_', 'json', 'zzz']
+        print(f"{'lookup':<20}{'median':>12}{'max':>12}")
+        for name, lookup in (('complete', index.complete),
+                             ('definitions', index.definitions),
+                             ('search', index.search)):
+            times = []
+            for query in queries * 10:
+                start = time.perf_counter()
+                lookup(query)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            print(f"{name:<20}{times[len(times) // 2] * 1e3:>10.2f}ms{times[-1] * 1e3:>10.2f}ms")
+        index.close()
+
+
+def bench_completion(args):
+    app = _gui_application()
+    from PyQt6.QtTest import QTest
+    from code_editor import CodeEditor
+
+    editor = CodeEditor()
+    editor.show()
+    editor.setPlainText(sample_source(args.lines) + '\n')
+    editor.moveCursor(editor.textCursor().MoveOperation.End)
+    requests = []
+    editor.analysis._complete_requested.connect(lambda *_: requests.append(None))
+
+    # Times the editor's side of each keystroke once jedi has answered
+    complete = editor.complete_at_cursor
+    spent = []
+
+    def timed_complete():
+        start = time.perf_counter()
+        complete()
+        spent.append(time.perf_counter() - start)
+
+    editor.complete_at_cursor = timed_complete
+
+    words = ['sorted', 'isinstance', 'defaultdict', 'Sample', 'os.path.join', 'mapping.items']
+    keystrokes = 0
+    for word in words * args.rounds:
+        for i, char in enumerate(word):
+            QTest.keyClicks(editor, char)
+            keystrokes += 1
+            if i == 0 or word[i - 1] == '.':
+                del spent[-1]  # Only asks jedi
+                deadline = time.perf_counter() + 30
+                while editor.completion_cache.names is None and time.perf_counter() < deadline:
+                    app.processEvents()
+                    time.sleep(0.001)
+        editor.completer.popup().hide()
+        editor.textCursor().insertText('\n')
+
+    spent.sort()
+    print(f"Completion while typing {keystrokes} characters of {len(words) * args.rounds} words")
+    print(f"{'jedi requests':<20}{len(requests):>12}")
+    print(f"{'keystroke':<20}{'median':>12}{'max':>12}")
+    print(f"{'cached':<20}{spent[len(spent) // 2] * 1e3:>10.2f}ms{spent[-1] * 1e3:>10.2f}ms")
+
+
+def bench_cli(args):
+    import subprocess
+    import tempfile
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    main_py = os.path.join(here, 'main.py')
+    with tempfile.TemporaryDirectory() as folder:
+        script = os.path.join(folder, 'hello.py')
+        with open(script, 'w') as file:
+            file.write("print('hello')\n")
+
+        def cold_start(command):
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run(command, stdout=subprocess.DEVNULL, check=False)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            return times[len(times) // 2], times[-1]
+
+        # Modules the headless path must never load
+        imports = subprocess.run([sys.executable, '-X', 'importtime', main_py, 'run', script, '--json'],
+                                 capture_output=True, text=True).stderr
+        heavy = sorted({name for name in ('PyQt6', 'qtawesome', 'jedi')
+                        if f' {name}' in imports or f' {name}.' in imports})
+
+        print(f"Headless start, {args.runs} runs each (heavy imports: {', '.join(heavy) or 'none'})")
+        print(f"{'command':<20}{'median':>12}{'max':>12}")
+        for name, command in (('python script', [sys.executable, script]),
+                              ('main.py run', [sys.executable, main_py, 'run', script]),
+                              # Skips compiling main.py, which as a script is never cached
+                              ('cli.py run', [sys.executable, os.path.join(here, 'cli.py'), 'run', script]),
+                              ('main.py run --json', [sys.executable, main_py, 'run', script, '--json'])):
+            median, worst = cold_start(command)
+            print(f"{name:<20}{median * 1e3:>10.1f}ms{worst * 1e3:>10.1f}ms")
+
+
+def _rss():
+    # Resident set size in bytes (Linux), None elsewhere
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _release_memory(app):
+    # Runs the deleteLater() calls still queued and hands freed heap back to
+    # the OS (glibc only), so RSS shows what is actually still held
+    import ctypes
+    import gc
+    from PyQt6.QtCore import QEvent
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    gc.collect()
+    try:
+        ctypes.CDLL(None).malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def bench_tabs(args):
+    if args.mode == 'both':
+        # Each mode in its own process, so memory freed by one cannot be
+        # reused by the other
+        import subprocess
+        print(f"{args.tabs} tabs of {args.lines} lines")
+        print(f"{'editors':<20}{'RSS growth':>14}{'per tab':>12}")
+        for mode in ('live', 'suspended'):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), 'tabs', '--mode', mode,
+                                     '--tabs', str(args.tabs), '--lines', str(args.lines)],
+                                    capture_output=True, text=True, check=True).stdout
+            print(output, end='')
+        return
+
+    app = _gui_application()
+    from PyQt6.QtWidgets import QTabWidget
+    from code_editor import CodeEditor
+    from tab_manager import TabManager
+
+    tabs = QTabWidget()
+    tabs.resize(1000, 800)
+    tabs.show()
+    manager = TabManager(tabs, CodeEditor)
+    manager.suspend_timer.timeout.disconnect()  # Suspended by hand below
+    text = sample_source(args.lines)
+    app.processEvents()
+    _release_memory(app)
+    start_rss = _rss()
+    suspend_times = []
+    for _ in range(args.tabs):
+        editor = CodeEditor()
+        editor.setPlainText(text)
+        previous = tabs.currentWidget()
+        tabs.setCurrentIndex(tabs.addTab(editor, "sample.py"))
+        app.processEvents()
+        if args.mode == 'suspended' and isinstance(previous, CodeEditor):
+            start = time.perf_counter()
+            manager.suspend(previous)
+            suspend_times.append(time.perf_counter() - start)
+            app.processEvents()
+            _release_memory(app)
+    app.processEvents()
+    _release_memory(app)
+    growth = _rss() - start_rss if start_rss is not None else None
+    size = f"{growth / 2 ** 20:>12.1f}MB{growth / 2 ** 20 / args.tabs:>10.2f}MB" if growth is not None else ''
+    print(f"{args.mode:<20}{size}")
+    if suspend_times:
+        resume_times = []
+        for index in range(tabs.count() - 1):
+            start = time.perf_counter()
+            tabs.setCurrentIndex(index)
+            resume_times.append(time.perf_counter() - start)
+            app.processEvents()
+        for name, times in (('suspend', suspend_times), ('resume', resume_times)):
+            times.sort()
+            print(f"{name + ' (median)':<20}{times[len(times) // 2] * 1e3:>12.1f}ms")
+
+
+def bench_theme(args):
+    import tempfile
+    app = _gui_application()
+    from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTabWidget
+    from code_editor import CodeEditor
+    from custom_title_bar import TitleBar
+    from theme import BUILTIN_THEMES, builtin_theme
+    from theme_manager import ThemeManager
+
+    # The old look: every toolbar button and the tab widget carried their
+    # own stylesheet on top of the window's
+    legacy_button = ("QPushButton { background-color: #2d2d2d; color: #ffffff; border: none; }"
+                     "QPushButton:hover { background-color: #3d3d3d; }")
+
+    def window(legacy):
+        root = QWidget()
+        root.resize(1200, 800)
+        layout = QVBoxLayout(root)
+        layout.addWidget(TitleBar(root))
+        tool_bar = QWidget()
+        tool_bar.setObjectName("ToolBar")
+        buttons = QHBoxLayout(tool_bar)
+        for _ in range(11):
+            button = QPushButton()
+            if legacy:
+                button.setStyleSheet(legacy_button)
+            buttons.addWidget(button)
+        layout.addWidget(tool_bar)
+        tabs = QTabWidget()
+        tabs.setObjectName("EditorTabs")
+        if legacy:
+            tabs.setStyleSheet("QTabBar::tab { background: #2d2d2d; color: #ffffff; padding: 10px; }")
+        editors = []
+        for _ in range(args.tabs):
+            editor = CodeEditor()
+            editor.setPlainText(sample_source(args.lines))
+            tabs.addTab(editor, "sample.py")
+            editors.append(editor)
+        layout.addWidget(tabs)
+        root.show()
+        app.processEvents()
+        return root, editors
+
+    def switch_time(switch):
+        times = []
+        for round_number in range(args.rounds * 2):
+            start = time.perf_counter()
+            switch(('light', 'dark')[round_number % 2])
+            app.processEvents()
+            times.append(time.perf_counter() - start)
+        times.sort()
+        return times[len(times) // 2], times[-1]
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Compiled stylesheets for the old path; the engine uses its built-in themes
+        legacy_dir = os.path.join(folder, 'legacy')
+        os.makedirs(legacy_dir)
+        for name in BUILTIN_THEMES:
+            with open(os.path.join(legacy_dir, name + '.qss'), 'w', encoding='utf-8') as stylesheet:
+                stylesheet.write(builtin_theme(name).stylesheet)
+
+        # Before: read and set the file on every switch, and re-run the lexer
+        # over every open document to pick up new colors
+        legacy_root, legacy_editors = window(legacy=True)
+
+        def legacy_switch(name):
+            with open(os.path.join(legacy_dir, name + '.qss'), 'r') as stylesheet:
+                legacy_root.setStyleSheet(stylesheet.read())
+            for editor in legacy_editors:
+                editor.highlighter.rehighlight()
+
+        legacy = switch_time(legacy_switch)
+        legacy_root.close()
+
+        root, editors = window(legacy=False)
+        manager = ThemeManager(folder)
+        manager.theme_changed.connect(
+            lambda theme, changed: [editor.apply_theme(changed) for editor in editors])
+        manager.apply_theme('dark', root)
+        engine = switch_time(lambda name: manager.apply_theme(name, root))
+
+        # Only editor colors differ: the stylesheet is left alone
+        with open(os.path.join(manager.themes_dir, 'keywords.qss'), 'w', encoding='utf-8') as stylesheet:
+            stylesheet.write('@syntax-keyword: #ff8800;\n')
+        colors_only = switch_time(lambda name: manager.apply_theme('keywords' if name == 'light' else 'dark', root))
+
+        tabs = root.findChild(QTabWidget)
+        catch_up = []
+        for index in range(1, tabs.count()):
+            start = time.perf_counter()
+            tabs.setCurrentIndex(index)
+            app.processEvents()
+            catch_up.append(time.perf_counter() - start)
+        catch_up.sort()
+        root.close()
+
+    print(f"Theme switches with {args.tabs} tabs of {args.lines} lines, {args.rounds * 2} switches each")
+    print(f"{'switch':<24}{'median':>12}{'max':>12}")
+    for name, (median, worst) in (('reload and rehighlight', legacy), ('theme engine', engine),
+                                  ('editor colors only', colors_only)):
+        print(f"{name:<24}{median * 1e3:>10.1f}ms{worst * 1e3:>10.1f}ms")
+    print(f"{'first show of a tab':<24}{catch_up[len(catch_up) // 2] * 1e3:>10.1f}ms{catch_up[-1] * 1e3:>10.1f}ms")
+
+
+def bench_paint(args):
+    app = _gui_application()
+    from PyQt6.QtWidgets import QGraphicsOpacityEffect
+    from code_editor import CodeEditor
+
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.show()
+    editor.setPlainText(sample_source(args.lines))
+    cursor = editor.textCursor()
+    cursor.setPosition(editor.document().findBlockByNumber(20).position())
+    editor.setTextCursor(cursor)
+    app.processEvents()
+    bar = editor.verticalScrollBar()
+
+    def frame_time(action):
+        # From the change to the end of the paint it causes
+        times = []
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            action()
+            app.processEvents()
+            times.append(time.perf_counter() - start)
+        times.sort()
+        return times[len(times) // 2], times[-1]
+
+    def scroll():
+        bar.setValue(bar.value() + 1 if bar.value() < 40 else 0)
+
+    print(f"Editor frames with {args.lines} lines, {args.frames} frames each")
+    print(f"{'frame':<28}{'median':>12}{'max':>12}")
+    # An opacity effect left at 1.0 is what every faded-in widget used to keep
+    for label in ('no effect', 'opacity effect'):
+        if label == 'opacity effect':
+            editor.setGraphicsEffect(QGraphicsOpacityEffect(editor))
+            app.processEvents()
+        for name, action in (('typing', lambda: editor.textCursor().insertText('x')), ('scroll', scroll)):
+            median, worst = frame_time(action)
+            print(f"{name + ', ' + label:<28}{median * 1e3:>10.2f}ms{worst * 1e3:>10.2f}ms")
+
+
+def bench_output(args):
+    import tempfile
+    app = _gui_application()
+    from PyQt6.QtCore import QObject, pyqtSignal
+    from execution import ScriptProcess
+    from execution_manager import ExecutionManager
+    from terminal import TerminalWidget
+
+    class Unbuffered(QObject):
+        # How output reached the GUI before: one queued signal per chunk read
+        output_received = pyqtSignal(str, str)
+        finished = pyqtSignal(object)
+
+        def __init__(self):
+            super().__init__()
+            self.process = ScriptProcess(on_output=self.output_received.emit, on_finished=self.finished.emit)
+
+        def run_file(self, path, interactive=False):
+            self.process.start(path, interactive=interactive)
+
+    terminal = TerminalWidget()
+    terminal.resize(800, 300)
+    terminal.show()
+    with tempfile.TemporaryDirectory() as folder:
+        script = os.path.join(folder, 'flood.py')
+        with open(script, 'w') as file:
+            file.write(f"for i in range({args.lines}):\n    print(i, 'x' * 40)\n")
+
+        def run(manager, interactive):
+            deliveries = []
+            results = []
+            manager.output_received.connect(lambda stream, text: (deliveries.append(1),
+                                                                  terminal.append_output(stream, text)))
+            manager.finished.connect(results.append)
+            terminal.start_session()
+            stalls = []
+            start = time.perf_counter()
+            manager.run_file(script, interactive=interactive)
+            while not results:
+                before = time.perf_counter()
+                app.processEvents()
+                stalls.append(time.perf_counter() - before)
+            terminal.flush()
+            return len(deliveries), time.perf_counter() - start, max(stalls)
+
+        print(f"{args.lines} lines of output into the terminal")
+        print(f"{'reader':<24}{'deliveries':>12}{'total':>12}{'worst stall':>14}")
+        for name, manager, interactive in (('signal per chunk', Unbuffered(), False),
+                                           ('buffered, pipes', ExecutionManager(), False),
+                                           ('buffered, terminal', ExecutionManager(), True)):
+            deliveries, total, stall = run(manager, interactive)
+            print(f"{name:<24}{deliveries:>12}{total * 1e3:>10.0f}ms{stall * 1e3:>12.1f}ms")
+
+
+DEBUG_WORKLOAD = '''\
+import time
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i % 7
+    return total
+
+
+def never_called():
+    return 0  # The never-hit breakpoint
+
+
+start = time.perf_counter()
+for _ in range({calls}):
+    work(1000)
+print(time.perf_counter() - start)
+'''
+
+
+def bench_debug(args):
+    import subprocess
+    import tempfile
+    import threading
+    from multiprocessing.connection import Listener
+    from debug_manager import AGENT_SCRIPT
+
+    def timed(command, breakpoints=None):
+        # The script's own timing of its loop, so start-up is left out
+        if breakpoints is None:
+            return float(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        authkey = os.urandom(16)
+        with Listener(('127.0.0.1', 0), authkey=authkey) as listener:
+            def serve():
+                connection = listener.accept()
+                connection.send({'op': 'start', 'breakpoints': breakpoints})
+                connections.append(connection)  # Held open until the run ends
+
+            connections = []
+            server = threading.Thread(target=serve, daemon=True)
+            server.start()
+            output = subprocess.run([command[0], '-u', AGENT_SCRIPT, str(listener.address[1]), authkey.hex(),
+                                     *command[1:]], capture_output=True, text=True, check=True).stdout
+            server.join()
+            for connection in connections:
+                connection.close()
+        return float(output)
+
+    with tempfile.TemporaryDirectory() as folder:
+        script = os.path.join(folder, 'workload.py')
+        with open(script, 'w') as file:
+            file.write(DEBUG_WORKLOAD.format(calls=args.calls))
+        never_hit = DEBUG_WORKLOAD.splitlines().index('    return 0  # The never-hit breakpoint') + 1
+        version = subprocess.run([args.python, '-c', "import sys; print(*sys.version_info[:3], sep='.', end=' ');"
+                                  "print('sys.monitoring' if hasattr(sys, 'monitoring') else 'bdb')"],
+                                 capture_output=True, text=True, check=True).stdout.strip()
+
+        print(f"{args.calls} calls of a 1000-step loop, best of {args.runs} (Python {version})")
+        print(f"{'run':<36}{'time':>12}{'slowdown':>12}")
+        plain = None
+        for name, breakpoints in (('plain', None),
+                                  ('debugger, no breakpoints', {}),
+                                  ('debugger, breakpoint never hit', {script: [never_hit]})):
+            best = min(timed([args.python, script], breakpoints) for _ in range(args.runs))
+            plain = plain or best
+            print(f"{name:<36}{best * 1e3:>10.0f}ms{best / plain:>11.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LAEFEX micro-benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    highlighter = subparsers.add_parser('highlighter', help="Syntax highlighting cost per block")
+    highlighter.add_argument('--lines', type=int, default=20000)
+    highlighter.add_argument('--edits', type=int, default=200)
+    highlighter.set_defaults(func=bench_highlighter)
+
+    minimap = subparsers.add_parser('minimap', help="Minimap paint cost per frame while typing")
+    minimap.add_argument('--lines', type=int, default=100000)
+    minimap.add_argument('--edits', type=int, default=100)
+    minimap.set_defaults(func=bench_minimap)
+
+    gutter = subparsers.add_parser('gutter', help="Line number gutter paint cost per frame while scrolling")
+    gutter.add_argument('--lines', type=int, default=100000)
+    gutter.add_argument('--frames', type=int, default=200)
+    gutter.set_defaults(func=bench_gutter)
+
+    index = subparsers.add_parser('index', help="Symbol index build time and lookup latency")
+    index.add_argument('--root', default=os.path.dirname(os.__file__),
+                       help="project folder to index (default: the standard library)")
+    index.add_argument('--processes', type=int, default=min(4, os.cpu_count() or 1))
+    index.set_defaults(func=bench_index)
+
+    completion = subparsers.add_parser('completion', help="jedi requests and popup cost per keystroke")
+    completion.add_argument('--lines', type=int, default=2000)
+    completion.add_argument('--rounds', type=int, default=5)
+    completion.set_defaults(func=bench_completion)
+
+    cli = subparsers.add_parser('cli', help="Cold start of the headless run command")
+    cli.add_argument('--runs', type=int, default=20)
+    cli.set_defaults(func=bench_cli)
+
+    theme = subparsers.add_parser('theme', help="Theme switch cost with many open tabs")
+    theme.add_argument('--tabs', type=int, default=30)
+    theme.add_argument('--lines', type=int, default=2000)
+    theme.add_argument('--rounds', type=int, default=3)
+    theme.set_defaults(func=bench_theme)
+
+    tabs = subparsers.add_parser('tabs', help="Memory per open tab, live and suspended")
+    tabs.add_argument('--tabs', type=int, default=50)
+    tabs.add_argument('--lines', type=int, default=2000)
+    tabs.add_argument('--mode', choices=('both', 'live', 'suspended'), default='both')
+    tabs.set_defaults(func=bench_tabs)
+
+    paint = subparsers.add_parser('paint', help="Editor paint cost with and without an opacity effect")
+    paint.add_argument('--lines', type=int, default=2000)
+    paint.add_argument('--frames', type=int, default=200)
+    paint.set_defaults(func=bench_paint)
+
+    output = subparsers.add_parser('output', help="Delivery of a burst of script output to the terminal")
+    output.add_argument('--lines', type=int, default=200000)
+    output.set_defaults(func=bench_output)
+
+    debug = subparsers.add_parser('debug', help="Slowdown of a script run under the debugger")
+    debug.add_argument('--calls', type=int, default=2000)
+    debug.add_argument('--runs', type=int, default=3)
+    debug.add_argument('--python', default=sys.executable,
+                       help="Interpreter to run the script with; 3.12+ uses sys.monitoring")
+    debug.set_defaults(func=bench_debug)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
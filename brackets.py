@@ -0,0 +1,97 @@
+# brackets.py
+#
+# Bracket index. The highlighters store a BlockBrackets summary on every
+# block they tokenize: where its brackets are (code only, never inside strings
+# or comments), its net depth change and the lowest depth reached scanning it
+# either way. Matching then walks whole blocks, only looking inside a block
+# when the match can actually be in it.
+
+OPENING = {'(': ')', '[': ']', '{': '}'}
+CLOSING = {')': '(', ']': '[', '}': '{'}
+
+
+class BlockBrackets:
+    __slots__ = ('positions', 'chars', 'net', 'min_forward', 'min_backward')
+
+    def __init__(self, positions, chars):
+        self.positions = positions  # In-block positions, in UTF-16 units
+        self.chars = chars
+        # Forward, an opening bracket counts +1 and a closing one -1;
+        # backward the other way round
+        depth = lowest = 0
+        for char in chars:
+            depth += 1 if char in OPENING else -1
+            lowest = min(lowest, depth)
+        self.net = depth
+        self.min_forward = lowest
+        depth = lowest = 0
+        for char in reversed(chars):
+            depth += 1 if char in CLOSING else -1
+            lowest = min(lowest, depth)
+        self.min_backward = lowest
+
+    def index_at(self, position):
+        try:
+            return self.positions.index(position)
+        except ValueError:
+            return -1
+
+
+NO_BRACKETS = BlockBrackets((), '')
+UNINDEXED = object()  # find_match() reached a block that has no summary yet
+
+
+def summarize(text, tokens):
+    # BlockBrackets for one block from its lexer tokens ('brace' kind)
+    positions = []
+    chars = []
+    for start, length, kind in tokens:
+        if kind == 'brace':
+            for index in range(start, start + length):
+                if text[index] in OPENING or text[index] in CLOSING:
+                    positions.append(index)
+                    chars.append(text[index])
+    if not positions:
+        return NO_BRACKETS
+    if not text.isascii():
+        # Qt positions count characters outside the BMP twice
+        positions = [p + sum(1 for c in text[:p] if ord(c) > 0xFFFF) for p in positions]
+    return BlockBrackets(tuple(positions), ''.join(chars))
+
+
+def find_match(block, index, summary_for):
+    # Matches bracket number index of block. summary_for(block) returns the
+    # block's BlockBrackets, or None if it has not been tokenized yet. Returns
+    # (document position, matching char), None when the bracket is unmatched,
+    # or UNINDEXED.
+    summary = summary_for(block)
+    char = summary.chars[index]
+    forward = char in OPENING
+    step = 1 if forward else -1
+    depth = 1
+    i = index + step
+    while True:
+        while 0 <= i < len(summary.chars):
+            current = summary.chars[i]
+            depth += 1 if (current in OPENING) == forward else -1
+            if depth == 0:
+                return block.position() + summary.positions[i], current
+            i += step
+        # Skip every following block whose brackets cannot bring the depth to zero
+        while True:
+            block = block.next() if forward else block.previous()
+            if not block.isValid():
+                return None
+            summary = summary_for(block)
+            if summary is None:
+                return UNINDEXED
+            lowest = summary.min_forward if forward else summary.min_backward
+            if depth + lowest > 0:
+                depth += summary.net if forward else -summary.net
+            else:
+                break
+        i = 0 if forward else len(summary.chars) - 1
+
+
+def is_pair(char, match):
+    return OPENING.get(char) == match or CLOSING.get(char) == match
@@ -0,0 +1,115 @@
+# cli.py
+#
+# Headless front end. Nothing here imports Qt, qtawesome or jedi, so a
+# headless run starts in the time it takes to start Python:
+#
+#     python main.py run script.py [ARGS...] [--json] [-- SCRIPT OPTIONS...]
+#     python main.py batch PATHS... [--timeout S]
+#
+# run streams the script's output through, or with --json prints one JSON
+# object with its output, exit code, wall and CPU time and peak RSS.
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+from execution import ScriptProcess
+
+COMMANDS = ('run', 'batch')
+
+
+def run_script(path, args=(), cwd=None, timeout=None, memory_limit=None, on_output=None):
+    # Runs path to completion and returns a dict describing the run. Output
+    # is collected unless on_output(stream, text) takes it instead.
+    output = {'stdout': [], 'stderr': []}
+    finished = threading.Event()
+    results = []
+
+    def collect(stream, text):
+        output[stream].append(text)
+
+    def done(result):
+        results.append(result)
+        finished.set()
+
+    process = ScriptProcess(on_output=on_output or collect, on_finished=done)
+    process.start(path, args=args, cwd=cwd, memory_limit=memory_limit)
+    timed_out = False
+    try:
+        if not finished.wait(timeout):
+            timed_out = True
+            process.stop()
+            finished.wait()
+    except KeyboardInterrupt:
+        process.stop()
+        finished.wait()
+    result = results[0]
+    return {
+        'script': path,
+        'args': list(args),
+        'exit_code': result.exit_code,
+        'timed_out': timed_out,
+        'cancelled': result.cancelled,
+        'wall_time': result.wall_time,
+        'cpu_time': result.cpu_time,
+        'peak_rss': result.peak_rss,
+        'stdout': ''.join(output['stdout']),
+        'stderr': ''.join(output['stderr']),
+    }
+
+
+def run_main(argv):
+    # Everything after "--" goes to the script untouched
+    script_options = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_options = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(prog='laefex run', description="Run a script without the editor")
+    parser.add_argument('script')
+    parser.add_argument('args', nargs='*', help="arguments for the script (after -- if they start with -)")
+    parser.add_argument('--json', action='store_true', help="print the result as JSON instead of streaming output")
+    parser.add_argument('--cwd', default=None, help="working directory (default: the current one)")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds before the script is stopped")
+    parser.add_argument('--memory-limit', type=int, default=None, help="address space limit, in MB")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.script):
+        parser.error(f"no such file: {args.script}")
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None
+    lock = threading.Lock()
+
+    def write_output(stream, text):
+        # The two reader threads write in turn
+        with lock:
+            target = sys.stdout if stream == 'stdout' else sys.stderr
+            target.write(text)
+            target.flush()
+
+    # With --json the output is collected into the result instead
+    on_output = None if args.json else write_output
+    result = run_script(args.script, args.args + script_options, args.cwd, args.timeout, memory_limit, on_output)
+    if args.json:
+        json.dump(result, sys.stdout)
+        sys.stdout.write('\n')
+    elif result['timed_out']:
+        print(f"Stopped after {result['wall_time']:.2f}s (timeout)", file=sys.stderr)
+    # Like a shell: a child ended by signal N exits with 128 + N
+    exit_code = result['exit_code']
+    return 128 - exit_code if exit_code < 0 else exit_code
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: laefex {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        return 2
+    if argv[0] == 'batch':
+        import batch
+        return batch.main(argv[1:])
+    return run_main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,129 +1,31 @@
 # code_editor.py
 
 from PyQt6.QtWidgets import (
-    QPlainTextEdit, QWidget, QTextEdit, QMenu, QInputDialog, QMessageBox, QVBoxLayout, QCompleter
+    QPlainTextEdit, QWidget, QTextEdit, QMenu, QVBoxLayout, QCompleter,
+    QToolTip
 )
 from PyQt6.QtGui import (
-    QTextCursor, QColor, QPainter, QFont, QTextFormat,
-    QTextCharFormat, QAction, QSyntaxHighlighter
+    QTextCursor, QPainter, QFont, QTextFormat,
+    QTextCharFormat, QAction, QKeySequence, QShortcut, QPolygonF, QPixmap, QFontMetrics
 )
-from PyQt6.QtCore import Qt, QRect, QSize, pyqtSignal, QRegularExpression, QStringListModel
+from PyQt6.QtCore import Qt, QRect, QRectF, QSize, QEvent, QPoint, QPointF, pyqtSignal, QStringListModel
 
 import keyword
+import os
 import re
-import ast
-import jedi  # Import jedi for advanced autocompletion
-
-# --- Syntax Highlighter ---
-class PythonHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
-        super().__init__(document)
-
-        # Define color scheme similar to VSCode's Python syntax highlighting
-        self.keyword_format = QTextCharFormat()
-        self.keyword_format.setForeground(QColor(86, 156, 214))  # Blue
-
-        self.operator_format = QTextCharFormat()
-        self.operator_format.setForeground(QColor(212, 212, 212))  # Light gray
-
-        self.brace_format = QTextCharFormat()
-        self.brace_format.setForeground(QColor(212, 212, 212))  # Light gray
-
-        self.def_class_format = QTextCharFormat()
-        self.def_class_format.setForeground(QColor(78, 201, 176))  # Teal
-
-        self.string_format = QTextCharFormat()
-        self.string_format.setForeground(QColor(214, 157, 133))  # Orange
-
-        self.comment_format = QTextCharFormat()
-        self.comment_format.setForeground(QColor(87, 166, 74))  # Green
-        self.comment_format.setFontItalic(True)
-
-        self.number_format = QTextCharFormat()
-        self.number_format.setForeground(QColor(181, 206, 168))  # Light green
-
-        self.builtin_format = QTextCharFormat()
-        self.builtin_format.setForeground(QColor(220, 220, 170))  # Light yellow
-
-        self.decorator_format = QTextCharFormat()
-        self.decorator_format.setForeground(QColor(155, 155, 255))  # Purple
-
-        # Regular expressions for syntax highlighting
-        self.rules = []
-
-        # Keywords
-        keywords = keyword.kwlist
-        keyword_patterns = [r'\b' + kw + r'\b' for kw in keywords]
-        self.rules += [(QRegularExpression(pattern), self.keyword_format) for pattern in keyword_patterns]
-
-        # Built-in functions
-        builtins = dir(__builtins__)
-        builtin_patterns = [r'\b' + fn + r'\b' for fn in builtins]
-        self.rules += [(QRegularExpression(pattern), self.builtin_format) for pattern in builtin_patterns]
-
-        # Operators
-        operator_patterns = [
-            r'\+', r'-', r'\*', r'/', r'//', r'%', r'\*\*',
-            r'==', r'!=', r'<', r'<=', r'>', r'>=', r'=', r'\+=', r'-=',
-            r'\*=', r'/=', r'%=', r'\^', r'\|', r'&', r'~', r'>>', r'<<'
-        ]
-        self.rules += [(QRegularExpression(pattern), self.operator_format) for pattern in operator_patterns]
-
-        # Braces
-        brace_patterns = [r'\{', r'\}', r'\(', r'\)', r'\[', r'\]']
-        self.rules += [(QRegularExpression(pattern), self.brace_format) for pattern in brace_patterns]
-
-        # Strings
-        string_patterns = [
-            QRegularExpression(r'".*?"'),  # Double quotes
-            QRegularExpression(r"'.*?'"),  # Single quotes
-            QRegularExpression(r'""".*?"""', QRegularExpression.PatternOption.DotMatchesEverythingOption),
-            QRegularExpression(r"'''.*?'''", QRegularExpression.PatternOption.DotMatchesEverythingOption)
-        ]
-        self.rules += [(pattern, self.string_format) for pattern in string_patterns]
-
-        # Comments
-        self.rules.append((QRegularExpression(r'#.*'), self.comment_format))
-
-        # Numbers
-        self.rules.append((QRegularExpression(r'\b[0-9]+(\.[0-9]+)?\b'), self.number_format))
-
-        # Decorators
-        self.rules.append((QRegularExpression(r'@\w+'), self.decorator_format))
-
-        # Function and class definitions
-        def_class_patterns = [
-            (QRegularExpression(r'\bdef\b\s+(\w+)'), self.def_class_format),
-            (QRegularExpression(r'\bclass\b\s+(\w+)'), self.def_class_format)
-        ]
-        self.rules += def_class_patterns
-
-    def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                start = match.capturedStart()
-                length = match.capturedLength()
-                self.setFormat(start, length, fmt)
-        self.setCurrentBlockState(0)
-
-# --- Error Highlighter ---
-class ErrorHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
-        super().__init__(document)
-        self.error_format = QTextCharFormat()
-        self.error_format.setUnderlineColor(QColor('red'))
-        self.error_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.SpellCheckUnderline)
-
-    def highlightBlock(self, text):
-        try:
-            ast.parse(text)
-        except SyntaxError as e:
-            if e.lineno == self.currentBlock().blockNumber() + 1:
-                col_offset = e.offset - 1 if e.offset else 0
-                length = len(text) - col_offset
-                self.setFormat(col_offset, length, self.error_format)
+
+import settings
+from analysis import AnalysisService
+from completion import CompletionCache, word_before
+from lexers import get_lexer
+from syntax_highlighter import SyntaxHighlighter, LazyHighlighter, BlockData, shared_colors
+from brackets import find_match, is_pair, UNINDEXED
+from folding import FoldTree
+from minimap import Minimap
+from find_bar import FindBar
+from search import replace_all
+
+FOLD_MARKER_COLORS = {True: 'gutter-fold-folded', False: 'gutter-fold-open'}  # By folded state
 
 # --- Line Number Area ---
 class LineNumberArea(QWidget):
@@ -131,6 +33,9 @@ class LineNumberArea(QWidget):
         super().__init__(code_editor)
         self.code_editor = code_editor
         self.setObjectName("LineNumberArea")
+        # Every paint fills its rect, which lets scroll() blit the rows
+        # already drawn and only repaint the exposed ones
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
 
     def sizeHint(self):
         return QSize(self.code_editor.line_number_area_width(), 0)
@@ -138,19 +43,118 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.code_editor.line_number_area_paint_event(event)
 
+    def mousePressEvent(self, event):
+        self.code_editor.line_number_area_mouse_press(event)
+
+class GutterGlyphs:
+    # The digits 0-9, both fold markers and the breakpoint dot, rendered
+    # once. Line numbers are copied out of the digit strip instead of being
+    # laid out as text on every paint.
+    BREAKPOINT_SIZE = 9
+
+    def __init__(self, line_height, pixel_ratio, marker_width):
+        font = QFont()
+        font.setBold(True)
+        metrics = QFontMetrics(font)
+        colors = shared_colors()
+        self.pixel_ratio = pixel_ratio
+        self.line_height = line_height  # Of the editor font, rows are this tall
+        self.digit_width = max(metrics.horizontalAdvance(digit) for digit in '0123456789')
+        self.digit_height = metrics.height()
+
+        self.digits = self.new_pixmap(self.digit_width * 10, self.digit_height)
+        painter = QPainter(self.digits)
+        painter.setFont(font)
+        painter.setPen(colors['gutter-line-number'])
+        for digit in range(10):
+            painter.drawText(QRect(digit * self.digit_width, 0, self.digit_width, self.digit_height),
+                             Qt.AlignmentFlag.AlignRight, str(digit))
+        painter.end()
+        # Source rectangles in device pixels, indexed by digit
+        self.sources = [QRectF(digit * self.digit_width * pixel_ratio, 0,
+                               self.digit_width * pixel_ratio, self.digit_height * pixel_ratio)
+                        for digit in range(10)]
+
+        self.markers = {}
+        size = 8
+        x = (marker_width - size) / 2
+        y = (line_height - size) / 2
+        for folded in (True, False):
+            if folded:
+                points = [QPointF(x + 1, y), QPointF(x + size - 1, y + size / 2), QPointF(x + 1, y + size)]
+            else:
+                points = [QPointF(x, y + 1), QPointF(x + size, y + 1), QPointF(x + size / 2, y + size - 1)]
+            pixmap = self.new_pixmap(marker_width, line_height)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(colors[FOLD_MARKER_COLORS[folded]])
+            painter.drawPolygon(QPolygonF(points))
+            painter.end()
+            self.markers[folded] = pixmap
+
+        # In the padding left of the numbers
+        size = min(self.BREAKPOINT_SIZE, line_height - 2)
+        self.breakpoint = self.new_pixmap(size, line_height)
+        painter = QPainter(self.breakpoint)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(colors['gutter-breakpoint'])
+        painter.drawEllipse(QRectF(0, (line_height - size) / 2, size, size))
+        painter.end()
+
+    def new_pixmap(self, width, height):
+        pixmap = QPixmap(max(1, round(width * self.pixel_ratio)), max(1, round(height * self.pixel_ratio)))
+        pixmap.setDevicePixelRatio(self.pixel_ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap
+
+    def draw_number(self, painter, right, top, number):
+        # Right-aligned at right, like the text it replaces
+        text = str(number)
+        width = self.digit_width
+        x = right - len(text) * width
+        for char in text:
+            painter.drawPixmap(QRectF(x, top, width, self.digit_height),
+                               self.digits, self.sources[ord(char) - 48])
+            x += width
+
+    def draw_marker(self, painter, left, top, folded):
+        painter.drawPixmap(left, top, self.markers[folded])
+
+    def draw_breakpoint(self, painter, top):
+        painter.drawPixmap(2, top, self.breakpoint)
+
 # --- Code Editor ---
 class CodeEditor(QPlainTextEdit):
+    # 1-based line whose breakpoint was toggled, or the first line of an edit
+    # that moved or dropped breakpoints
     breakpoint_signal = pyqtSignal(int)
+    open_location_requested = pyqtSignal(str, int, int)  # path, line (1-based), column
+
+    # Extra selections are kept per layer and drawn in this order
+    EXTRA_SELECTION_LAYERS = ('current_line', 'debug', 'search', 'brackets')
+    FOLD_MARKER_WIDTH = 14  # Gutter column for fold markers, right of the numbers
 
     def __init__(self):
         super().__init__()
 
         self.setPlaceholderText("# Write your Python code here")
-        self.highlighter = PythonHighlighter(self.document())
-        self.error_highlighter = ErrorHighlighter(self.document())
+        self.large_file_lines = settings.value('editor/large_file_lines')
+        self.lexer = get_lexer('python')
+        self.highlighter = SyntaxHighlighter(self.document(), self.lexer)
 
         # Line Number Area
         self.line_number_area = LineNumberArea(self)
+        self._gutter_glyphs = None
+        self._gutter_width = None
+        self._gutter_digits = None  # Digits the margins were last set for
+
+        # Minimap
+        self.minimap = Minimap(self) if settings.value('editor/minimap') else None
+
+        # Theme groups changed while the editor was hidden (see apply_theme)
+        self._theme_changes = set()
 
         # Set tab width
         self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
@@ -158,20 +162,63 @@ class CodeEditor(QPlainTextEdit):
         # Variables for code analysis
         self.variables = set()
         self.functions = set()
+        self.symbols = []  # symbol_index.Symbols of the last version that parsed
+        self.workspace = None  # Workspace whose symbol index backs completion and navigation
 
         # Autocomplete
         self.keywords = sorted(keyword.kwlist + [
             'print', 'len', 'range', 'int', 'float', 'str', 'list', 'dict',
             'set', 'tuple', 'input', 'open', 'close', 'exit', 'help', 'type'
         ])
-        self.completer = QCompleter()
+        # jedi is asked once per word; the names are then filtered here and
+        # shown unfiltered by the completer, through one model
+        self.completion_cache = CompletionCache()
+        self.completion_model = QStringListModel(self)
+        self.completer = QCompleter(self.completion_model, self)
         self.completer.setWidget(self)
-        self.completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
         self.completer.activated.connect(self.insert_completion)
 
-        # Bracket Matching
-        self.bracket_positions = []
+        # Background analysis and jedi completions
+        self.analysis = AnalysisService(self)
+        self.analysis.analysis_ready.connect(self.apply_analysis)
+        self.analysis.completions_ready.connect(self.update_completions)
+
+        # Find and Replace
+        self.extra_selection_layers = {}
+        self.find_bar = None
+        find_shortcut = QShortcut(QKeySequence.StandardKey.Find, self)
+        find_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        find_shortcut.activated.connect(self.show_find_bar)
+        replace_shortcut = QShortcut(QKeySequence("Ctrl+H"), self)
+        replace_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        replace_shortcut.activated.connect(lambda: self.show_find_bar(replace=True))
+
+        # Code Folding
+        self.folds = FoldTree()
+        self.folds.replace_lines(0, 0, [''])  # An empty document has one block
+        self._cursor_block = 0
+        self._appending = False
+
+        # Debugging: block numbers with a breakpoint, and the line the
+        # debugger stopped at (1-based), if it stopped in this editor
+        self.breakpoints = set()
+        self.debug_line = None
+
+        # File shown in this editor (a file_io.FileInfo), None for new buffers
+        self.file_info = None
+        self.loader = None  # DocumentLoader while the file is streamed in
+        fold_shortcut = QShortcut(QKeySequence("Ctrl+Shift+["), self)
+        fold_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        fold_shortcut.activated.connect(self.fold_at_cursor)
+        unfold_shortcut = QShortcut(QKeySequence("Ctrl+Shift+]"), self)
+        unfold_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        unfold_shortcut.activated.connect(self.unfold_at_cursor)
+
+        # Go to Definition
+        definition_shortcut = QShortcut(QKeySequence("F12"), self)
+        definition_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        definition_shortcut.activated.connect(self.go_to_definition)
 
         # Update line number area width
         self.update_line_number_area_width(0)
@@ -179,23 +226,104 @@ class CodeEditor(QPlainTextEdit):
         # Connect signals after initializing line_number_area
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
+        self.cursorPositionChanged.connect(self.reveal_cursor)
         self.cursorPositionChanged.connect(self.highlight_current_line)
-        self.textChanged.connect(self.parse_code)
+        self.cursorPositionChanged.connect(self.highlight_matching_brackets)
+        # contentsChange only fires for real edits, not for highlighting
+        self.document().contentsChange.connect(self.update_folds)
+        self.document().contentsChange.connect(self.parse_code)
+        self.document().contentsChange.connect(self.completion_cache.note_edit)
+
+    # --- Large Files ---
+    def setPlainText(self, text):
+        # Pick the highlighter before Qt sees the text, so a large file is
+        # never highlighted in one go
+        self.update_highlighting_mode(text.count('\n') + 1)
+        super().setPlainText(text)
+
+    def insertFromMimeData(self, source):
+        if source.hasText():
+            self.update_highlighting_mode(self.blockCount() + source.text().count('\n'))
+        super().insertFromMimeData(source)
+
+    def update_highlighting_mode(self, line_count):
+        large = line_count > self.large_file_lines
+        if large == isinstance(self.highlighter, LazyHighlighter):
+            return
+        diagnostics = self.highlighter.diagnostics
+        self.highlighter.detach()
+        if large:
+            self.highlighter = LazyHighlighter(self, self.lexer)
+        else:
+            self.highlighter = SyntaxHighlighter(self.document(), self.lexer)
+        self.highlighter.diagnostics = diagnostics
+
+    def set_lexer(self, lexer):
+        self.lexer = lexer
+        self.highlighter.set_lexer(lexer)
+
+    # --- Files ---
+    def begin_loading(self, line_count):
+        # The document is then filled by append_text() over several event
+        # loop turns. It stays read-only and out of the undo history meanwhile.
+        self.update_highlighting_mode(line_count)
+        self.setReadOnly(True)
+        self.document().setUndoRedoEnabled(False)
+        self.clear()
+
+    def append_text(self, text):
+        # Qt's contentsChange range also spans the blocks the highlighter
+        # re-formatted since the last edit, so the fold tree is handed the
+        # appended lines directly instead
+        document = self.document()
+        block = document.lastBlock()
+        first = block.blockNumber()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self._appending = True
+        try:
+            cursor.insertText(text)
+        finally:
+            self._appending = False
+        lines = []
+        while block.isValid():
+            lines.append(block.text())
+            block = block.next()
+        sync = self.folds.replace_lines(first, 1, lines)
+        if sync is not None:
+            self.apply_fold_visibility(*sync)
 
-    # --- Event Filter ---
-    def eventFilter(self, source, event):
-        if event.type() == event.Type.Paint and source is self.viewport():
-            self.line_number_area.update()
-        return super().eventFilter(source, event)
+    def end_loading(self):
+        self.loader = None
+        document = self.document()
+        document.setUndoRedoEnabled(True)
+        document.setModified(False)
+        self.setReadOnly(False)
 
     # --- Line Numbers ---
+    def gutter_glyphs(self):
+        # Rebuilt after a font change or when the window moves to a screen
+        # with another pixel ratio
+        ratio = self.line_number_area.devicePixelRatioF()
+        if self._gutter_glyphs is None or self._gutter_glyphs.pixel_ratio != ratio:
+            self._gutter_glyphs = GutterGlyphs(self.fontMetrics().height(), ratio, self.FOLD_MARKER_WIDTH)
+        return self._gutter_glyphs
+
     def line_number_area_width(self):
-        digits = len(str(max(1, self.blockCount())))
-        space = 12 + 3 + self.fontMetrics().horizontalAdvance('9') * digits
-        return space
+        if self._gutter_width is None:
+            digits = len(str(max(1, self.blockCount())))
+            self._gutter_width = 12 + 3 + self.gutter_glyphs().digit_width * digits + self.FOLD_MARKER_WIDTH
+        return self._gutter_width
 
     def update_line_number_area_width(self, _):
-        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+        # Margins only change when the line count gains or loses a digit
+        digits = len(str(max(1, self.blockCount())))
+        if digits == self._gutter_digits:
+            return
+        self._gutter_digits = digits
+        self._gutter_width = None
+        minimap_width = self.minimap.WIDTH if self.minimap is not None else 0
+        self.setViewportMargins(self.line_number_area_width(), 0, minimap_width, 0)
 
     def update_line_number_area(self, rect, dy):
         if dy:
@@ -203,50 +331,130 @@ class CodeEditor(QPlainTextEdit):
         else:
             self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
 
-        if rect.contains(self.viewport().rect()):
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange:
+            self._gutter_glyphs = None
+            self._gutter_digits = None
             self.update_line_number_area_width(0)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._theme_changes:
+            self.flush_theme()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         cr = self.contentsRect()
         self.line_number_area.setGeometry(
             QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
+        if self.minimap is not None:
+            viewport = self.viewport().geometry()
+            self.minimap.setGeometry(
+                QRect(viewport.right() + 1, viewport.top(), self.minimap.WIDTH, viewport.height()))
+        if self.find_bar is not None and self.find_bar.isVisible():
+            self.find_bar.reposition()
 
     def line_number_area_paint_event(self, event):
+        rect = event.rect()
         painter = QPainter(self.line_number_area)
-        painter.fillRect(event.rect(), QColor('#1e1e1e'))
+        painter.fillRect(rect, shared_colors()['gutter-background'])
+        glyphs = self.gutter_glyphs()
+        marker_left = self.line_number_area.width() - self.FOLD_MARKER_WIDTH
+        offset = self.contentOffset()
 
+        # Start at the first dirty row rather than the top of the viewport
         block = self.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + int(self.blockBoundingRect(block).height())
-
-        font = QFont()
-        font.setBold(True)
-        painter.setFont(font)
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                # Draw line number
-                painter.setPen(QColor('#757575'))
-                painter.drawText(0, top, self.line_number_area.width() - 5,
-                                 self.fontMetrics().height(),
-                                 Qt.AlignmentFlag.AlignRight, number)
-
-            block = block.next()
+        top = self.blockBoundingGeometry(block).translated(offset).top()
+        if rect.top() > top + glyphs.line_height:
+            dirty = self.cursorForPosition(QPoint(0, rect.top())).block()
+            if dirty.blockNumber() > block.blockNumber():
+                block = dirty
+                top = self.blockBoundingGeometry(block).translated(offset).top()
+
+        while block.isValid() and top <= rect.bottom():
+            bottom = top + self.blockBoundingRect(block).height()
+            if block.isVisible() and bottom >= rect.top():
+                block_number = block.blockNumber()
+                y = int(top)
+                glyphs.draw_number(painter, marker_left - 3, y, block_number + 1)
+                if block_number in self.breakpoints:
+                    glyphs.draw_breakpoint(painter, y)
+                if self.folds.region_end(block_number) is not None:
+                    glyphs.draw_marker(painter, marker_left, y, self.folds.is_folded(block_number))
+            # Collapsed regions are skipped in one step, not block by block
+            block = self.next_visible_block(block)
             top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
-            block_number += 1
 
         painter.end()  # Explicitly end the painter
 
+    def line_number_area_mouse_press(self, event):
+        # Clicking a fold marker toggles its region, clicking a line number
+        # its breakpoint
+        position = event.position()
+        block = self.cursorForPosition(QPoint(0, int(position.y()))).block()
+        geometry = self.blockBoundingGeometry(block).translated(self.contentOffset())
+        if not geometry.top() <= position.y() < geometry.bottom():
+            return
+        if position.x() < self.line_number_area.width() - self.FOLD_MARKER_WIDTH:
+            self.toggle_breakpoint(block.blockNumber())
+        else:
+            self.toggle_fold(block.blockNumber())
+
+    # --- Breakpoints ---
+    def toggle_breakpoint(self, block_number):
+        if block_number in self.breakpoints:
+            self.breakpoints.discard(block_number)
+        else:
+            self.breakpoints.add(block_number)
+        self.line_number_area.update()
+        self.breakpoint_signal.emit(block_number + 1)
+
+    def set_breakpoints(self, block_numbers):
+        self.breakpoints = set(block_numbers)
+        self.line_number_area.update()
+
+    def shift_breakpoints(self, first, removed, added):
+        # Lines first .. first + removed - 1 were replaced by added lines:
+        # breakpoints below move with their lines, those on lines that are
+        # gone are dropped
+        if not self.breakpoints:
+            return
+        shifted = set()
+        for line in self.breakpoints:
+            if line < first or line - first < min(removed, added):
+                shifted.add(line)
+            elif line >= first + removed:
+                shifted.add(line + added - removed)
+        if shifted != self.breakpoints:
+            self.breakpoints = shifted
+            self.line_number_area.update()
+            self.breakpoint_signal.emit(first + 1)
+
+    def set_debug_line(self, line):
+        # Marks the line (1-based) the debugger stopped at; None clears it
+        self.debug_line = line
+        selections = []
+        block = self.document().findBlockByNumber(line - 1) if line is not None else None
+        if block is not None and block.isValid():
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(shared_colors()['debug-line'])
+            selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+            selection.cursor = QTextCursor(block)
+            selections.append(selection)
+        self.set_extra_selections('debug', selections)
+
     # --- Key Press Event ---
     def keyPressEvent(self, event):
         key = event.key()
         modifiers = event.modifiers()
 
-        if key == Qt.Key.Key_Return or key == Qt.Key.Key_Enter:
+        if key == Qt.Key.Key_Space and modifiers & Qt.KeyboardModifier.ControlModifier:
+            # Explicitly trigger completion
+            self.complete_at_cursor()
+            event.accept()
+            return
+        elif key == Qt.Key.Key_Return or key == Qt.Key.Key_Enter:
             cursor = self.textCursor()
             cursor.insertText('\n')
             self.auto_indent(cursor)
@@ -275,32 +483,23 @@ class CodeEditor(QPlainTextEdit):
         super().keyPressEvent(event)
 
         # Start autocompletion after certain keys
-        completion_prefix = self.text_under_cursor()
-        if completion_prefix != self.completer.completionPrefix():
-            self.completer.setCompletionPrefix(completion_prefix)
-            self.completer.popup().setCurrentIndex(
-                self.completer.completionModel().index(0, 0))
-
-        if len(event.text()) > 0 and completion_prefix:
-            cr = self.cursorRect()
-            cr.setWidth(self.completer.popup().sizeHintForColumn(0)
-                        + self.completer.popup().verticalScrollBar().sizeHint().width())
-            self.completer.complete(cr)
+        if len(event.text()) > 0 and self.completion_prefix()[0]:
+            self.complete_at_cursor()
         else:
             self.completer.popup().hide()
 
-        self.error_highlighter.rehighlight()
-        self.highlight_matching_brackets()
-
     def text_under_cursor(self):
         cursor = self.textCursor()
         cursor.select(QTextCursor.SelectionType.WordUnderCursor)
         return cursor.selectedText()
 
     def insert_completion(self, completion):
+        # Fuzzy matches need not start with what was typed, so the typed
+        # prefix is replaced
         tc = self.textCursor()
-        extra = completion[len(self.completer.completionPrefix()):]
-        tc.insertText(extra)
+        prefix, _ = self.completion_prefix()
+        tc.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, len(prefix))
+        tc.insertText(completion)
         self.setTextCursor(tc)
 
     # --- Auto Indentation ---
@@ -348,136 +547,404 @@ class CodeEditor(QPlainTextEdit):
         if cursor.selectedText() == ' ' * 4:
             cursor.removeSelectedText()
 
+    # --- Kernel Code ---
+    def selected_or_cell_code(self):
+        # The selected lines, or the "# %%" cell around the cursor (the whole
+        # file if there are no cell markers). Leading newlines keep line
+        # numbers in tracebacks matching the editor.
+        document = self.document()
+        cursor = self.textCursor()
+        if cursor.hasSelection():
+            first = document.findBlock(cursor.selectionStart()).blockNumber()
+            last = document.findBlock(cursor.selectionEnd()).blockNumber()
+        else:
+            first = last = cursor.blockNumber()
+            while first > 0 and not self.is_cell_marker(document.findBlockByNumber(first)):
+                first -= 1
+            while (last + 1 < document.blockCount()
+                   and not self.is_cell_marker(document.findBlockByNumber(last + 1))):
+                last += 1
+        lines = []
+        block = document.findBlockByNumber(first)
+        while block.isValid() and block.blockNumber() <= last:
+            lines.append(block.text())
+            block = block.next()
+        return '\n' * first + '\n'.join(lines) + '\n'
+
+    def is_cell_marker(self, block):
+        return block.text().lstrip().startswith('# %%')
+
+    # --- Theme ---
+    def apply_theme(self, changed):
+        # The shared formats and colors already hold the new theme; what was
+        # drawn from the old one is redone here. Hidden editors wait until
+        # they are shown, so a switch only costs the visible tab.
+        self._theme_changes |= changed
+        if self.isVisible():
+            self.flush_theme()
+
+    def flush_theme(self):
+        changed, self._theme_changes = self._theme_changes, set()
+        if 'syntax' in changed:
+            self.highlighter.recolor()
+        if 'gutter' in changed:
+            self._gutter_glyphs = None
+            self.line_number_area.update()
+        if 'editor' in changed:
+            self.highlight_current_line()
+            self.highlight_matching_brackets()
+            self.set_debug_line(self.debug_line)
+        if self.minimap is not None and changed & {'syntax', 'minimap'}:
+            self.minimap.apply_theme()
+
     # --- Highlight Current Line ---
     def highlight_current_line(self):
         extra_selections = []
         if not self.isReadOnly():
             selection = QTextEdit.ExtraSelection()
-            line_color = QColor('#292929')
-            selection.format.setBackground(line_color)
+            selection.format.setBackground(shared_colors()['current-line'])
             selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
             selection.cursor = self.textCursor()
             selection.cursor.clearSelection()
             extra_selections.append(selection)
-        self.setExtraSelections(extra_selections)
+        self.set_extra_selections('current_line', extra_selections)
+
+    def set_extra_selections(self, layer, selections):
+        # Current line, search matches and brackets each own a layer, so
+        # updating one does not wipe out the others
+        self.extra_selection_layers[layer] = selections
+        combined = []
+        for name in self.EXTRA_SELECTION_LAYERS:
+            combined.extend(self.extra_selection_layers.get(name, ()))
+        self.setExtraSelections(combined)
 
     # --- Parse Code ---
-    def parse_code(self):
-        code = self.toPlainText()
-        try:
-            tree = ast.parse(code)
-            self.variables = set()
-            self.functions = set()
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    self.functions.add(node.name)
-                elif isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            self.variables.add(target.id)
-        except:
-            pass  # Ignore parsing errors
-
-        # Update the completer model using jedi
-        self.update_completions()
-
-    def update_completions(self):
-        code = self.toPlainText()
-        cursor = self.textCursor()
-        line = cursor.blockNumber() + 1
-        column = cursor.columnNumber()
-        try:
-            script = jedi.Script(code, path='')
-            completions = script.complete(line, column)
-            completion_list = [c.name for c in completions]
-            if completion_list:
-                self.completer.setModel(QStringListModel(completion_list))
+    def parse_code(self, position=0, chars_removed=0, chars_added=0):
+        # ast.parse, compile and lint checks run on the analysis thread once typing pauses
+        self.analysis.document_changed()
+
+    def apply_analysis(self, result):
+        self.variables = result['variables']
+        self.functions = result['functions']
+        self.highlighter.set_diagnostics(result['diagnostics'])
+        if result['symbols'] is not None:
+            self.symbols = result['symbols']
+        if result['folds'] is not None:
+            sync = self.folds.set_ast_regions(result['folds'])
+            if sync is not None:
+                self.apply_fold_visibility(*sync)
+
+    def viewportEvent(self, event):
+        # Show diagnostic messages when hovering over underlined code
+        if event.type() == QEvent.Type.ToolTip:
+            cursor = self.cursorForPosition(event.pos())
+            messages = self.highlighter.diagnostics_at(cursor.blockNumber(), cursor.positionInBlock())
+            if messages:
+                QToolTip.showText(event.globalPos(), '\n'.join(messages), self.viewport())
             else:
-                # Fallback to keywords
-                self.completer.setModel(QStringListModel(self.keywords))
-        except Exception as e:
-            # Fallback to keywords if jedi fails
-            self.completer.setModel(QStringListModel(self.keywords))
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
+
+    # --- Completions ---
+    def completion_prefix(self):
+        # (word before the cursor, context it is typed in)
+        cursor = self.textCursor()
+        line = cursor.block().text()
+        prefix, start = word_before(line, cursor.positionInBlock())
+        return prefix, (cursor.block().position() + start, line[:start])
+
+    def complete_at_cursor(self):
+        prefix, context = self.completion_prefix()
+        if not self.completion_cache.matches(context):
+            # A new word: jedi is asked at its start, so the answer covers
+            # every prefix typed there. The popup is shown once it arrives.
+            cursor = self.textCursor()
+            self.completion_cache.begin(context, cursor.position())
+            self.analysis.request_completions(cursor.blockNumber() + 1, len(context[1]))
+        elif self.completion_cache.names is not None:
+            self.show_completions(prefix)
+
+    def update_completions(self, completion_list):
+        # Fallback to keywords if jedi has nothing or fails
+        if not self.completion_cache.store(completion_list or self.keywords):
+            return
+        prefix, context = self.completion_prefix()
+        if self.completion_cache.matches(context):
+            self.show_completions(prefix)
+
+    def show_completions(self, completion_prefix):
+        names = self.completion_cache.filter(completion_prefix)
+        if self.workspace is not None and completion_prefix and not self.is_attribute_access():
+            # Names defined anywhere in the project, after jedi's
+            known = set(names)
+            names += [name for name in self.workspace.complete(completion_prefix) if name not in known]
+        if not completion_prefix or not names:
+            self.completer.popup().hide()
+            return
+        self.completion_model.setStringList(names)
+        self.completer.popup().setCurrentIndex(
+            self.completer.completionModel().index(0, 0))
+        cr = self.cursorRect()
+        cr.setWidth(self.completer.popup().sizeHintForColumn(0)
+                    + self.completer.popup().verticalScrollBar().sizeHint().width())
+        self.completer.complete(cr)
+
+    def is_attribute_access(self):
+        # Whether the word at the cursor follows a '.', where only jedi
+        # knows which names make sense
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.StartOfWord)
+        column = cursor.positionInBlock()
+        return column > 0 and cursor.block().text()[column - 1] == '.'
+
+    # --- Go to Definition ---
+    def go_to_definition(self):
+        name = self.text_under_cursor()
+        if not name.isidentifier():
+            return
+        # This buffer's own definitions are current even when it is unsaved,
+        # so the index's entries for its file are skipped
+        own_path = self.file_info.path if self.file_info is not None else None
+        symbols = [symbol for symbol in self.symbols if symbol.name == name]
+        if self.workspace is not None:
+            symbols += [symbol for symbol in self.workspace.definitions(name) if symbol.path != own_path]
+        if len(symbols) == 1:
+            self.open_symbol(symbols[0])
+        elif symbols:
+            menu = QMenu(self)
+            for symbol in symbols[:30]:
+                where = os.path.basename(symbol.path) if symbol.path else "this file"
+                qualified = f"{symbol.container}.{symbol.name}" if symbol.container else symbol.name
+                action = menu.addAction(f"{qualified}  ({symbol.kind}, {where}:{symbol.line})")
+                action.triggered.connect(lambda checked, s=symbol: self.open_symbol(s))
+            menu.exec(self.viewport().mapToGlobal(self.cursorRect().bottomLeft()))
+
+    def open_symbol(self, symbol):
+        if symbol.path is None:
+            self.go_to(symbol.line, symbol.column)
+        else:
+            self.open_location_requested.emit(symbol.path, symbol.line, symbol.column)
+
+    def go_to(self, line, column=0):
+        # line is 1-based; a collapsed region around it is unfolded
+        block = self.document().findBlockByNumber(max(line - 1, 0))
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + min(column, block.length() - 1))
+        self.setTextCursor(cursor)
+        self.centerCursor()
+
+    def shutdown(self):
+        if self.loader is not None:
+            self.loader.stop()
+        # Release per-document state held by the shared analysis worker
+        self.analysis.shutdown()
 
     # --- Bracket Matching ---
     def highlight_matching_brackets(self):
-        extra_selections = []
+        # The bracket just before the cursor wins over the one just after it
         cursor = self.textCursor()
         block = cursor.block()
-        text = block.text()
-        pos = cursor.positionInBlock() - 1
-
-        brackets = {'(': ')', '[': ']', '{': '}'}
-        rev_brackets = {v: k for k, v in brackets.items()}
-
-        if pos >= 0 and text[pos] in brackets:
-            char = text[pos]
-            match_char = brackets[char]
-            direction = 1
-            start_pos = pos
-        elif pos + 1 < len(text) and text[pos + 1] in rev_brackets:
-            char = text[pos + 1]
-            match_char = rev_brackets[char]
-            direction = -1
-            start_pos = pos + 1
-        else:
-            self.setExtraSelections(extra_selections)
+        summary = self.block_brackets(block)
+        column = cursor.positionInBlock()
+        index = summary.index_at(column - 1) if summary is not None else -1
+        if index < 0 and summary is not None:
+            index = summary.index_at(column)
+        match = find_match(block, index, self.block_brackets) if index >= 0 else UNINDEXED
+        if match is UNINDEXED:
+            # No bracket at the cursor, or the match lies in a part of a large
+            # file the background highlighter has not reached yet
+            self.set_extra_selections('brackets', [])
             return
 
-        match_pos = self.find_matching_bracket(block, start_pos, char, match_char, direction)
-        if match_pos:
-            fmt = QTextCharFormat()
-            fmt.setBackground(QColor('#49483E'))
-            # Highlight the brackets
-            for position in [cursor.position(), match_pos]:
-                selection = QTextEdit.ExtraSelection()
-                temp_cursor = self.textCursor()
-                temp_cursor.setPosition(position)
-                temp_cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor)
-                selection.cursor = temp_cursor
-                selection.format = fmt
-                extra_selections.append(selection)
-            self.setExtraSelections(extra_selections)
+        position = block.position() + summary.positions[index]
+        fmt = QTextCharFormat()
+        if match is not None and is_pair(summary.chars[index], match[1]):
+            fmt.setBackground(shared_colors()['bracket-match'])
+            positions = [position, match[0]]
         else:
-            self.setExtraSelections(extra_selections)
-
-    def find_matching_bracket(self, block, pos, char, match_char, direction):
-        text = block.text()
-        stack = 1
-        block_number = block.blockNumber()
-        while True:
-            pos += direction
-            if pos < 0 or pos >= len(text):
-                block_number += direction
-                block = self.document().findBlockByNumber(block_number)
-                if not block.isValid():
-                    return None
-                text = block.text()
-                pos = 0 if direction > 0 else len(text) - 1
-            c = text[pos]
-            if c == char:
-                stack += 1
-            elif c == match_char:
-                stack -= 1
-            if stack == 0:
-                cursor = QTextCursor(block)
-                cursor.setPosition(block.position() + pos)
-                return cursor.position()
+            fmt.setBackground(shared_colors()['bracket-mismatch'])  # Unmatched or mismatched
+            positions = [position] if match is None else [position, match[0]]
+
+        extra_selections = []
+        for position in positions:
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(self.document())
+            selection.cursor.setPosition(position)
+            selection.cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor)
+            selection.format = fmt
+            extra_selections.append(selection)
+        self.set_extra_selections('brackets', extra_selections)
+
+    def block_brackets(self, block):
+        # The block's entry in the bracket index kept by the highlighter, or
+        # None while a large file is still being highlighted in the background
+        data = block.userData()
+        if isinstance(data, BlockData) and data.revision == block.revision():
+            return data.brackets
         return None
 
+    # --- Code Folding ---
+    def update_folds(self, position, chars_removed, chars_added):
+        # Hands the edited blocks to the fold tree, which rescans only the
+        # lines around them
+        if self._appending:
+            return
+        document = self.document()
+        block = document.findBlock(position)
+        first = block.blockNumber()
+        # Qt can report one character past the end (e.g. for setPlainText())
+        last = document.findBlock(min(position + chars_added, document.characterCount() - 1))
+        lines = [block.text()]
+        while block != last and block.isValid():
+            block = block.next()
+            lines.append(block.text())
+        removed = len(lines) - (document.blockCount() - len(self.folds))
+        self.shift_breakpoints(first, removed, len(lines))
+        sync = self.folds.replace_lines(first, removed, lines)
+        if sync is not None:
+            self.apply_fold_visibility(*sync)
+
+    def apply_fold_visibility(self, first, last):
+        # Hides the blocks of collapsed regions in first .. last and shows the
+        # rest. Hidden blocks get no layout and are never painted.
+        document = self.document()
+        last = min(last, document.blockCount() - 1)
+        hidden = [(start, end) for start, end in self.folds.hidden_ranges() if end >= first]
+        start_block = block = document.findBlockByNumber(first)
+        number = first
+        index = 0
+        changed = False
+        while block.isValid() and number <= last:
+            while index < len(hidden) and hidden[index][1] < number:
+                index += 1
+            visible = not (index < len(hidden) and hidden[index][0] <= number)
+            if block.isVisible() != visible:
+                block.setVisible(visible)
+                changed = True
+            block = block.next()
+            number += 1
+        if not changed:
+            return
+        end = block.position() if block.isValid() else document.characterCount()
+        # Relayout without contentsChange, which would re-highlight and
+        # re-analyze the range as if it had been edited
+        document.blockSignals(True)
+        document.markContentsDirty(start_block.position(), end - start_block.position())
+        document.blockSignals(False)
+        self.viewport().update()
+        self.line_number_area.update()
+
+        # A region folded around the cursor leaves it at the end of the header
+        cursor = self.textCursor()
+        if not cursor.block().isVisible():
+            number = cursor.blockNumber()
+            header = next((start - 1 for start, end in self.folds.hidden_ranges()
+                           if start <= number <= end), number)
+            header_block = document.findBlockByNumber(header)
+            cursor.setPosition(header_block.position() + header_block.length() - 1)
+            self.setTextCursor(cursor)
+
+    def next_visible_block(self, block):
+        # The block after block, stepping over a collapsed region in one go
+        number = block.blockNumber()
+        if self.folds.is_folded(number):
+            block = self.document().findBlockByNumber(self.folds.region_end(number) + 1)
+        else:
+            block = block.next()
+        while block.isValid() and not block.isVisible():
+            block = block.next()
+        return block
+
+    def toggle_fold(self, line):
+        if self.folds.is_folded(line):
+            self.unfold(line)
+        else:
+            self.fold(line)
+
+    def fold(self, line):
+        if self.folds.fold(line):
+            self.apply_fold_visibility(line + 1, self.folds.region_end(line))
+
+    def unfold(self, line):
+        end = self.folds.region_end(line)
+        if self.folds.unfold(line):
+            self.apply_fold_visibility(line + 1, end)
+
+    def fold_at_cursor(self):
+        # Folds the innermost region around the cursor
+        line = self.textCursor().blockNumber()
+        while line >= 0:
+            end = self.folds.region_end(line)
+            if end is not None and end >= self.textCursor().blockNumber() and not self.folds.is_folded(line):
+                self.fold(line)
+                return
+            line -= 1
+
+    def unfold_at_cursor(self):
+        self.unfold(self.textCursor().blockNumber())
+
+    def fold_all(self):
+        self.folds.fold_all()
+        self.apply_fold_visibility(0, self.blockCount() - 1)
+
+    def unfold_all(self):
+        self.folds.unfold_all()
+        self.apply_fold_visibility(0, self.blockCount() - 1)
+
+    def reveal_cursor(self):
+        # Keeps the cursor out of collapsed regions: moving onto one from the
+        # line next to it steps over it, anything else (a search match, a
+        # selection) unfolds it
+        cursor = self.textCursor()
+        block = cursor.block()
+        previous, self._cursor_block = self._cursor_block, block.blockNumber()
+        if block.isVisible():
+            return
+        number = block.blockNumber()
+        first, last = next(((start, end) for start, end in self.folds.hidden_ranges()
+                            if start <= number <= end), (number, number))
+        if not cursor.hasSelection() and previous in (first - 1, last + 1):
+            target = self.document().findBlockByNumber(last + 1 if previous == first - 1 else first - 1)
+            if not target.isValid():
+                target = self.document().findBlockByNumber(first - 1)
+            cursor.setPosition(target.position() + min(cursor.positionInBlock(), target.length() - 1))
+            self.setTextCursor(cursor)
+            return
+        for start in self.folds.enclosing_folds(number):
+            self.folds.unfold(start)
+        self.apply_fold_visibility(first, last)
+
     # --- Context Menu ---
     def contextMenuEvent(self, event):
         menu = self.createStandardContextMenu()
 
         # Find and Replace
         find_action = QAction('Find', self)
-        find_action.triggered.connect(self.show_find_dialog)
+        find_action.triggered.connect(lambda: self.show_find_bar())
         menu.addAction(find_action)
 
         replace_action = QAction('Replace', self)
-        replace_action.triggered.connect(self.show_replace_dialog)
+        replace_action.triggered.connect(lambda: self.show_find_bar(replace=True))
         menu.addAction(replace_action)
 
+        # Go to Definition
+        definition_action = QAction('Go to Definition', self)
+        definition_action.setShortcut(QKeySequence("F12"))
+        definition_action.triggered.connect(self.go_to_definition)
+        menu.addAction(definition_action)
+
+        # Code Folding
+        fold_all_action = QAction('Fold All', self)
+        fold_all_action.triggered.connect(self.fold_all)
+        menu.addAction(fold_all_action)
+
+        unfold_all_action = QAction('Unfold All', self)
+        unfold_all_action.triggered.connect(self.unfold_all)
+        menu.addAction(unfold_all_action)
+
         # Code Snippets
         snippets_menu = QMenu("Insert Snippet", self)
         snippet_actions = {
@@ -496,35 +963,18 @@ class CodeEditor(QPlainTextEdit):
         menu.exec(event.globalPos())
 
     # --- Find and Replace ---
-    def show_find_dialog(self):
-        text, ok = QInputDialog.getText(self, 'Find', 'Find:')
-        if ok and text:
-            self.find_text(text)
-
-    def find_text(self, text):
-        if self.find(text):
-            pass
-        else:
-            cursor = self.textCursor()
-            cursor.setPosition(0)
-            self.setTextCursor(cursor)
-            if self.find(text):
-                pass
-            else:
-                QMessageBox.information(self, 'Find', 'Text not found.')
-
-    def show_replace_dialog(self):
-        find_text, ok = QInputDialog.getText(self, 'Replace', 'Find:')
-        if ok and find_text:
-            replace_text, ok = QInputDialog.getText(self, 'Replace', 'Replace with:')
-            if ok:
-                self.replace_text(find_text, replace_text)
-
-    def replace_text(self, find_text, replace_text):
-        cursor = self.textCursor()
-        cursor.beginEditBlock()
-        while self.find(find_text):
-            cursor = self.textCursor()
-            cursor.insertText(replace_text)
-        cursor.endEditBlock()
-        self.setTextCursor(cursor)
+    def show_find_bar(self, replace=False):
+        if self.find_bar is None:
+            self.find_bar = FindBar(self)
+        self.find_bar.open(replace)
+
+    def replace_all(self, query, replacement):
+        # Every match is replaced in a single edit spanning the first to the
+        # last match, so it is one undo step and one re-layout
+        start, end, new_text, count = replace_all(self.toPlainText(), query, replacement)
+        if count:
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(new_text)
+        return count
@@ -0,0 +1,93 @@
+# completion.py
+#
+# Qt-free completion cache. jedi is asked once per word, at the column where
+# the word starts, so its answer holds every name that fits there. While the
+# word is typed (or shortened) the cached names are filtered locally; an
+# edit anywhere but inside the word drops the cache.
+
+import re
+
+_WORD_END_RE = re.compile(r'\w*$')
+
+
+def word_before(line, column):
+    # (word, start column) of the identifier characters just before column
+    start = _WORD_END_RE.search(line, 0, column).start()
+    return line[start:column], start
+
+
+def fuzzy_pattern(prefix):
+    # The letters of prefix in order, with anything in between
+    return re.compile('.*?'.join(map(re.escape, prefix)), re.IGNORECASE)
+
+
+def rank(name, prefix, folded_prefix):
+    # Exact-case prefix matches first, then other prefix matches, then
+    # substrings, then scattered letters; private names after public ones
+    folded = name.lower()
+    if name.startswith(prefix):
+        group = 0
+    elif folded.startswith(folded_prefix):
+        group = 1
+    elif folded_prefix in folded:
+        group = 2
+    else:
+        group = 3
+    if name.startswith('_') and not prefix.startswith('_'):
+        group += 4
+    return group, len(name), folded
+
+
+class CompletionCache:
+    def __init__(self):
+        self.context = None  # (word start position, line text before the word)
+        self.names = None  # None while jedi has not answered
+        self.end = 0  # Document position just after the word being typed
+        self._narrowed = None  # (folded prefix, names matching it)
+
+    def matches(self, context):
+        return context == self.context
+
+    def begin(self, context, end):
+        self.context = context
+        self.names = None
+        self.end = end
+        self._narrowed = None
+
+    def store(self, names):
+        # False if the request was for a context that is gone
+        if self.context is None:
+            return False
+        self.names = list(names)
+        self._narrowed = None
+        return True
+
+    def invalidate(self):
+        self.context = None
+        self.names = None
+        self._narrowed = None
+
+    def note_edit(self, position, removed, added):
+        # From QTextDocument.contentsChange. Typing, deleting or pasting
+        # inside the word keeps the names; anything else may have changed them.
+        if self.context is None:
+            return
+        if self.context[0] <= position and position + removed <= self.end:
+            self.end += added - removed
+        else:
+            self.invalidate()
+
+    def filter(self, prefix):
+        # Cached names matching prefix, best first. A longer prefix only
+        # looks at the names the shorter one matched.
+        if self.names is None:
+            return []
+        folded = prefix.lower()
+        candidates = self.names
+        if self._narrowed is not None and folded.startswith(self._narrowed[0]):
+            candidates = self._narrowed[1]
+        if folded:
+            search = fuzzy_pattern(folded).search
+            candidates = [name for name in candidates if search(name)]
+        self._narrowed = (folded, candidates)
+        return sorted(candidates, key=lambda name: rank(name, prefix, folded))
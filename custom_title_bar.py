@@ -14,25 +14,24 @@ class TitleBar(QWidget):
 
     def init_ui(self):
         self.setFixedHeight(30)
-        self.setStyleSheet("background-color: #2d2d2d;")
+        # Styled by the theme; a QWidget subclass only paints a stylesheet
+        # background with this attribute
+        self.setObjectName("TitleBar")
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground)
 
         self.title = QLabel("LAEFEX - Version 1.1.0")
-        self.title.setStyleSheet("color: #ffffff; font-size: 12px;")
 
         # Minimize, Maximize, Close buttons
         self.minimize_button = QPushButton("-")
         self.minimize_button.setFixedSize(30, 30)
-        self.minimize_button.setStyleSheet("background-color: transparent; color: #ffffff;")
         self.minimize_button.clicked.connect(self.parent.showMinimized)
 
         self.maximize_button = QPushButton("□")
         self.maximize_button.setFixedSize(30, 30)
-        self.maximize_button.setStyleSheet("background-color: transparent; color: #ffffff;")
         self.maximize_button.clicked.connect(self.toggle_maximize_restore)
 
         self.close_button = QPushButton("✕")
         self.close_button.setFixedSize(30, 30)
-        self.close_button.setStyleSheet("background-color: transparent; color: #ffffff;")
         self.close_button.clicked.connect(self.parent.close)
 
         # Layout
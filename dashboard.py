@@ -2,13 +2,11 @@
 
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt
-from utils import fade_in_widget
 
 class Dashboard(QWidget):
     def __init__(self):
         super().__init__()
         self.setup_ui()
-        fade_in_widget(self, duration=1000)
 
     def setup_ui(self):
         layout = QVBoxLayout()
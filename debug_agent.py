@@ -0,0 +1,325 @@
+# debug_agent.py
+#
+# Debugger agent started by DebugManager as
+#
+#     python -u debug_agent.py <port> <authkey-hex> <script> [args...]
+#
+# It connects back to the GUI like kernel.py, takes the breakpoints, then
+# runs the script as __main__. Where it stops it reports the stack and
+# serves namespace pages until it is told how to go on. Messages are small
+# dicts:
+#
+#     GUI -> agent: start {breakpoints}, set_breakpoints {path, lines},
+#                   continue, step, next, return,
+#                   namespace {frame, path, offset, limit}
+#     agent -> GUI: stopped {reason, stack, error}, namespace_reply
+#
+# On Python 3.12+ lines are watched through sys.monitoring. A line that is
+# not a breakpoint switches its own event off the first time it runs, so
+# code away from breakpoints soon runs at close to full speed. Older
+# Pythons use a bdb.Bdb, which line-traces only frames of files that have
+# breakpoints but still sees every call.
+
+import bdb
+import os
+import queue
+import runpy
+import sys
+import threading
+import traceback
+from multiprocessing.connection import Client
+
+from kernel import snapshot  # Namespace pages in the format the Variable Explorer reads
+
+RESUME_OPS = ('continue', 'step', 'next', 'return')
+
+
+def canonic(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def code_path(filename):
+    # A code object's file as a canonical path; "<frozen runpy>" and the like stay as they are
+    return filename if filename.startswith('<') else canonic(filename)
+
+
+def frame_depth(frame):
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+# Frames of these files are never shown or stopped in
+INTERNAL_FILES = frozenset(code_path(function.__code__.co_filename)
+                           for function in (frame_depth, runpy.run_path, bdb.Bdb.reset, threading.Thread.run))
+
+
+class Agent:
+    def __init__(self, connection):
+        self.connection = connection
+        self.breakpoints = {}  # Canonical path -> frozenset of 1-based lines
+        self.on_breakpoints_changed = None  # Set by the tracer
+        self.commands = queue.Queue()  # Everything but breakpoints, read while stopped
+        self.detached = False  # The GUI went away; nothing stops any more
+        self.listener = None  # Ident of the thread running listen()
+        self._send_lock = threading.Lock()
+        self._pause_lock = threading.Lock()  # One thread is stopped at a time
+        self._paths = {}  # co_filename -> canonical path
+
+        # How to go on after a stop: None runs to the next breakpoint;
+        # 'step', 'next' and 'return' stop again by step_depth
+        self.mode = None
+        self.step_depth = 0
+        self.step_codes = frozenset()  # Code objects on the stack of the last stop
+
+    # --- Messages ---
+    def send(self, message):
+        with self._send_lock:
+            try:
+                self.connection.send(message)
+            except OSError:
+                pass
+
+    def reply(self, message, **fields):
+        fields.update(op=message['op'] + '_reply', id=message.get('id'))
+        self.send(fields)
+
+    def listen(self):
+        # Runs on a background thread: breakpoints apply at once, so they
+        # can be set while the script runs; the rest waits for a stop
+        self.listener = threading.get_ident()
+        while True:
+            try:
+                message = self.connection.recv()
+            except (EOFError, OSError):
+                self.detached = True
+                self.set_all_breakpoints({})
+                self.commands.put({'op': 'continue'})
+                break
+            if message.get('op') == 'set_breakpoints':
+                self.set_breakpoints(message['path'], message['lines'])
+            else:
+                self.commands.put(message)
+
+    # --- Breakpoints ---
+    def path_of(self, filename):
+        path = self._paths.get(filename)
+        if path is None:
+            path = self._paths[filename] = code_path(filename)
+        return path
+
+    def is_internal(self, filename):
+        return self.path_of(filename) in INTERNAL_FILES
+
+    def set_breakpoints(self, path, lines):
+        breakpoints = dict(self.breakpoints)
+        if lines:
+            breakpoints[canonic(path)] = frozenset(lines)
+        else:
+            breakpoints.pop(canonic(path), None)
+        self.set_all_breakpoints(breakpoints)
+
+    def set_all_breakpoints(self, breakpoints):
+        # Swapped in whole, so tracing threads never see it half updated
+        self.breakpoints = breakpoints
+        if self.on_breakpoints_changed is not None:
+            self.on_breakpoints_changed()
+
+    def breakpoint_at(self, filename, line):
+        lines = self.breakpoints.get(self.path_of(filename))
+        return lines is not None and line in lines
+
+    # --- Stops ---
+    def user_stack(self, frame):
+        # (frame, line) pairs, innermost first, down to the script's module frame
+        stack = []
+        while frame is not None and not self.is_internal(frame.f_code.co_filename):
+            stack.append((frame, frame.f_lineno))
+            frame = frame.f_back
+        return stack
+
+    def pause(self, frame, reason, error=None, stack=None):
+        # Reports the stop and serves requests until told how to go on;
+        # returns that op. stack defaults to frame's own.
+        if self.detached:
+            return 'continue'
+        with self._pause_lock:
+            if stack is None:
+                stack = self.user_stack(frame)
+            self.send({
+                'op': 'stopped',
+                'reason': reason,
+                'error': error,
+                'stack': [{'name': item.f_code.co_name, 'path': item.f_code.co_filename, 'line': line}
+                          for item, line in stack],
+            })
+            while True:
+                message = self.commands.get()
+                op = message.get('op')
+                if op in RESUME_OPS:
+                    break
+                if op == 'namespace':
+                    self.handle_namespace(message, stack)
+        self.mode = None if op == 'continue' else op
+        self.step_depth = frame_depth(frame)
+        self.step_codes = frozenset(item.f_code for item, _ in stack)
+        return op
+
+    def handle_namespace(self, message, stack):
+        index = message.get('frame', 0)
+        if not 0 <= index < len(stack):
+            self.reply(message, status='error', error="No such frame")
+            return
+        path = message.get('path', [])
+        try:
+            # A module frame's locals are its globals
+            result = snapshot(stack[index][0].f_locals, path, message.get('offset', 0), message.get('limit', 100))
+        except Exception as e:
+            self.reply(message, status='error', error=f"{type(e).__name__}: {e}")
+        else:
+            self.reply(message, status='ok', path=path, **result)
+
+    def step_stops(self, frame):
+        # Whether a step in progress stops at frame's current line
+        if self.mode == 'step':
+            return True
+        depth = frame_depth(frame)
+        return depth <= self.step_depth if self.mode == 'next' else depth < self.step_depth
+
+
+class MonitoringTracer:
+    # sys.monitoring (3.12+). Returning DISABLE from the LINE callback turns
+    # off that one line until restart_events(), which is called whenever
+    # the breakpoints change or a step starts.
+    def __init__(self, agent):
+        self.agent = agent
+        self.tool = sys.monitoring.DEBUGGER_ID
+
+    def run(self, script):
+        monitoring = sys.monitoring
+        monitoring.use_tool_id(self.tool, 'laefex')
+        monitoring.register_callback(self.tool, monitoring.events.LINE, self.line)
+        self.agent.on_breakpoints_changed = monitoring.restart_events
+        monitoring.set_events(self.tool, monitoring.events.LINE)
+        try:
+            runpy.run_path(script, run_name='__main__')
+        finally:
+            monitoring.set_events(self.tool, 0)
+            monitoring.free_tool_id(self.tool)
+
+    def line(self, code, line):
+        agent = self.agent
+        if threading.get_ident() == agent.listener:
+            return sys.monitoring.DISABLE  # The agent's own reader
+        if agent.breakpoint_at(code.co_filename, line):
+            self.stop(sys._getframe(1), 'breakpoint')
+            return None
+        if agent.mode is None or agent.is_internal(code.co_filename):
+            return sys.monitoring.DISABLE
+        frame = sys._getframe(1)
+        if agent.step_stops(frame):
+            self.stop(frame, 'step')
+            return None
+        # Deeper frames of other functions never stop this step; a function
+        # on the stepped stack may still return into a line that does
+        return None if code in agent.step_codes else sys.monitoring.DISABLE
+
+    def stop(self, frame, reason):
+        if self.agent.pause(frame, reason) != 'continue':
+            # Lines switched off while running must report again
+            sys.monitoring.restart_events()
+
+
+class TraceTracer(bdb.Bdb):
+    # sys.settrace through bdb, for Pythons without sys.monitoring. The
+    # breakpoints live in the agent; bdb only does the stepping.
+    def __init__(self, agent):
+        super().__init__()
+        self.agent = agent
+        agent.on_breakpoints_changed = self.breakpoints_changed
+
+    def run(self, script):
+        self.reset()
+        # Start as if continued from this frame, not stepping into the script
+        self.botframe = sys._getframe()
+        self.set_continue()
+        sys.settrace(self.trace_dispatch)
+        try:
+            runpy.run_path(script, run_name='__main__')
+        finally:
+            sys.settrace(None)
+
+    def break_anywhere(self, frame):
+        return self.agent.path_of(frame.f_code.co_filename) in self.agent.breakpoints
+
+    def break_here(self, frame):
+        return self.agent.breakpoint_at(frame.f_code.co_filename, frame.f_lineno)
+
+    def breakpoints_changed(self):
+        # Frames already running in a file that just got breakpoints were
+        # entered untraced; trace them from their next line on
+        for frame in sys._current_frames().values():
+            while frame is not None:
+                if frame.f_trace is None and self.break_anywhere(frame):
+                    frame.f_trace = self.trace_dispatch
+                frame = frame.f_back
+
+    def set_continue(self):
+        # Bdb's own stops tracing when it holds no breakpoints, and it never does
+        self._set_stopinfo(self.botframe, None, -1)
+
+    def user_line(self, frame):
+        if self.agent.is_internal(frame.f_code.co_filename):
+            self.set_continue()  # Stepped out of the script
+            return
+        op = self.agent.pause(frame, 'breakpoint' if self.break_here(frame) else 'step')
+        if op == 'step':
+            self.set_step()
+        elif op == 'next':
+            self.set_next(frame)
+        elif op == 'return':
+            self.set_return(frame)
+        else:
+            self.set_continue()
+
+
+def main(argv):
+    port, authkey = int(argv[1]), bytes.fromhex(argv[2])
+    script = os.path.abspath(argv[3])
+    # The script's folder replaces the agent's, whose modules must not
+    # shadow user imports
+    sys.argv = argv[3:]
+    sys.path[0] = os.path.dirname(script)
+    sys.modules.pop('kernel', None)
+    with Client(('127.0.0.1', port), authkey=authkey) as connection:
+        agent = Agent(connection)
+        start = connection.recv()
+        agent.set_all_breakpoints({canonic(path): frozenset(lines)
+                                   for path, lines in start.get('breakpoints', {}).items() if lines})
+        threading.Thread(target=agent.listen, daemon=True).start()
+        tracer = MonitoringTracer(agent) if hasattr(sys, 'monitoring') else TraceTracer(agent)
+        try:
+            tracer.run(script)
+        except SystemExit:
+            raise
+        except BaseException as e:
+            # Shown like a normal run, without the agent's frames, then the
+            # failing frame can be inspected before the process ends
+            exc_type, exc_value, tb = sys.exc_info()
+            while tb is not None and agent.is_internal(tb.tb_frame.f_code.co_filename):
+                tb = tb.tb_next
+            traceback.print_exception(exc_type, exc_value, tb)
+            sys.stderr.flush()
+            stack = []
+            while tb is not None:
+                stack.insert(0, (tb.tb_frame, tb.tb_lineno))
+                tb = tb.tb_next
+            if stack:
+                agent.pause(stack[0][0], 'exception', f"{type(e).__name__}: {e}", stack)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+# debug_manager.py
+
+import os
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from agent_connection import AgentConnection
+from execution import DEFAULT_GRACE_PERIOD
+from execution_manager import ExecutionManager
+
+AGENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug_agent.py')
+
+
+class DebugManager(QObject):
+    # Runs a script under debug_agent.py. The script's output comes through
+    # execution like any run; the connection carries breakpoints, stops and
+    # namespace pages.
+    stopped = pyqtSignal(object)  # 'stopped' message: reason, error, stack (innermost first)
+    resumed = pyqtSignal()
+    namespace_received = pyqtSignal(object)  # namespace_reply message
+    finished = pyqtSignal(object)  # ExecutionResult
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.execution = ExecutionManager(self)
+        self.connection = AgentConnection(self)
+        self.stack = None  # Frames of the current stop, None while running
+
+        self.execution.finished.connect(self._handle_finished)
+        self.connection.message_received.connect(self._handle_message)
+
+    def is_running(self):
+        return self.execution.is_running()
+
+    def is_paused(self):
+        return self.stack is not None
+
+    def start(self, path, breakpoints, args=(), cwd=None, interactive=False, terminal_size=None):
+        # breakpoints: {path: 1-based lines}, for every file that has any
+        if self.is_running():
+            return False
+        address = self.connection.listen()
+        self.send({'op': 'start', 'breakpoints': {file: sorted(lines) for file, lines in breakpoints.items()}})
+        try:
+            self.execution.run_file(AGENT_SCRIPT, args=[*address, path, *args],
+                                    cwd=cwd, interactive=interactive, terminal_size=terminal_size)
+        except Exception:
+            self.connection.close()
+            raise
+        return True
+
+    def stop(self, grace_period=DEFAULT_GRACE_PERIOD):
+        self.execution.stop(grace_period)
+
+    # --- Requests ---
+    def set_breakpoints(self, path, lines):
+        # Takes effect at once, also while the script runs
+        if self.is_running():
+            self.send({'op': 'set_breakpoints', 'path': path, 'lines': sorted(lines)})
+
+    def resume(self, op):
+        # op is 'continue', 'step' (into), 'next' (over) or 'return' (out)
+        if self.stack is None:
+            return
+        self.stack = None
+        self.send({'op': op})
+        self.resumed.emit()
+
+    def request_namespace(self, frame, path, offset=0, limit=100):
+        # Locals of stack[frame] at the current stop
+        if self.stack is None:
+            return None
+        return self.send({'op': 'namespace', 'frame': frame, 'path': list(path), 'offset': offset, 'limit': limit})
+
+    def send(self, message):
+        return self.connection.send(message)
+
+    # --- Connection ---
+    def _handle_message(self, message):
+        if message['op'] == 'stopped':
+            self.stack = message['stack']
+            self.stopped.emit(message)
+        elif message['op'] == 'namespace_reply':
+            self.namespace_received.emit(message)
+
+    def _handle_finished(self, result):
+        self.connection.close()
+        self.stack = None
+        self.finished.emit(result)
@@ -0,0 +1,83 @@
+# debug_panel.py
+
+import os
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import pyqtSignal
+
+# (op sent to the agent, button label, shortcut shown in the tooltip)
+STEP_BUTTONS = [
+    ('continue', "Continue", "F5"),
+    ('next', "Step Over", "F10"),
+    ('step', "Step Into", "F11"),
+    ('return', "Step Out", "Shift+F11"),
+]
+
+
+class DebugPanel(QWidget):
+    # Step buttons over the call stack of the current stop. Selecting a
+    # frame asks for it to be shown; its locals go to the Variable Explorer.
+    resume_requested = pyqtSignal(str)  # op, see STEP_BUTTONS
+    stop_requested = pyqtSignal()
+    frame_selected = pyqtSignal(int)  # Index into the stack, innermost first
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        buttons = QHBoxLayout()
+        self.step_buttons = []
+        for op, label, shortcut in STEP_BUTTONS:
+            button = QPushButton(label)
+            button.setToolTip(f"{label} ({shortcut})")
+            button.clicked.connect(lambda _checked, op=op: self.resume_requested.emit(op))
+            buttons.addWidget(button)
+            self.step_buttons.append(button)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_requested)
+        buttons.addWidget(self.stop_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.stack_list = QListWidget()
+        self.stack_list.currentRowChanged.connect(self.handle_row_changed)
+        layout.addWidget(self.stack_list)
+        self.clear()
+
+    def show_stop(self, message):
+        reason = message['reason']
+        if reason == 'exception':
+            self.status_label.setText(f"Stopped on an uncaught exception: {message['error']}")
+        else:
+            self.status_label.setText(f"Paused ({reason})")
+        self.stack_list.blockSignals(True)
+        self.stack_list.clear()
+        for frame in message['stack']:
+            item = QListWidgetItem(f"{frame['name']}  {os.path.basename(frame['path'])}:{frame['line']}")
+            item.setToolTip(f"{frame['path']}:{frame['line']}")
+            self.stack_list.addItem(item)
+        self.stack_list.setCurrentRow(0)
+        self.stack_list.blockSignals(False)
+        self.set_buttons(paused=True, running=True)
+
+    def set_running(self):
+        self.status_label.setText("Running...")
+        self.stack_list.clear()
+        self.set_buttons(paused=False, running=True)
+
+    def clear(self):
+        self.status_label.setText("Not debugging")
+        self.stack_list.clear()
+        self.set_buttons(paused=False, running=False)
+
+    def set_buttons(self, paused, running):
+        for button in self.step_buttons:
+            button.setEnabled(paused)
+        self.stop_button.setEnabled(running)
+
+    def handle_row_changed(self, row):
+        if row >= 0:
+            self.frame_selected.emit(row)
@@ -0,0 +1,450 @@
+# execution.py
+#
+# Qt-free execution engine. Scripts run in a child interpreter and their
+# output is streamed back through callbacks from background reader threads,
+# so callers (the GUI or a headless front end) never block on the child.
+# An interactive run gets a pseudo-terminal as stdin, stdout and stderr
+# (a stdin pipe off POSIX), and input for it is written by a thread of its
+# own.
+
+import codecs
+import collections
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import fcntl
+    import pty
+    import struct
+    import termios
+except ImportError:  # Windows
+    pty = None
+
+DEFAULT_GRACE_PERIOD = 2.0  # Seconds between terminate and kill
+READ_CHUNK_SIZE = 4096
+INPUT_RETRY_INTERVAL = 0.05  # Seconds between writes while the child is not reading its input
+OUTPUT_BUFFER_CHARS = 1024 * 1024  # Output an OutputBuffer holds before it drops the oldest
+RSS_SAMPLE_INTERVALS = (0.005, 0.1)  # Seconds; sampling starts fast and backs off
+
+# Run by the child with -c when its memory is limited or it is profiled:
+# caps the address space, then runs the script as __main__ with the usual
+# argv and sys.path, under cProfile if a stats path is given
+_BOOTSTRAP = '''\
+import os, runpy, sys
+limit, profile_path = int(sys.argv[1]), sys.argv[2]
+if limit:
+    import resource
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+sys.argv = sys.argv[3:]
+sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+if profile_path:
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(runpy.run_path, sys.argv[0], run_name='__main__')
+    finally:
+        profiler.dump_stats(profile_path)
+else:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+class ExecutionResult:
+    def __init__(self, exit_code, wall_time, cancelled=False, cpu_time=None, peak_rss=None):
+        self.exit_code = exit_code
+        self.wall_time = wall_time
+        self.cancelled = cancelled
+        # From the child's rusage; None where the platform does not report it
+        self.cpu_time = cpu_time  # User plus system seconds
+        self.peak_rss = peak_rss  # Bytes
+
+    def __repr__(self):
+        return (f"ExecutionResult(exit_code={self.exit_code!r}, "
+                f"wall_time={self.wall_time:.3f}, cancelled={self.cancelled!r}, "
+                f"cpu_time={self.cpu_time!r}, peak_rss={self.peak_rss!r})")
+
+
+def wait_exited(process):
+    # Blocks until the child exits. On POSIX it is left unreaped, so its pid
+    # stays valid for signals until reap(); Windows holds a process handle
+    # instead, and waiting there also reaps.
+    if not hasattr(os, 'waitid'):
+        process.wait()
+        return
+    try:
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+    except ChildProcessError:
+        pass
+
+
+def reap(process):
+    # Waits for a Popen child and returns (exit code, rusage or None). wait4
+    # is POSIX only; elsewhere, or if the child was somehow reaped already,
+    # only the exit code is known.
+    if hasattr(os, 'wait4'):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            pass
+        else:
+            if os.WIFSIGNALED(status):
+                process.returncode = -os.WTERMSIG(status)
+            else:
+                process.returncode = os.WEXITSTATUS(status)
+            return process.returncode, usage
+    return process.wait(), None
+
+
+def max_rss(usage):
+    # ru_maxrss in bytes; it is in KiB except on macOS
+    return usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def sample_peak_rss(pid):
+    # Linux only: the high-water RSS of the program the child is running now
+    try:
+        with open(f'/proc/{pid}/status', 'rb') as status:
+            for line in status:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class OutputBuffer:
+    # Hands output from reader threads to a consumer that takes it when it
+    # gets to it. Chunks queued meanwhile are merged per stream, so a burst
+    # is delivered as a few large chunks, and past max_chars the oldest text
+    # is dropped; a terminal that keeps a few thousand lines would drop it
+    # anyway.
+    def __init__(self, max_chars=OUTPUT_BUFFER_CHARS):
+        self.max_chars = max_chars
+        self._chunks = collections.deque()  # [stream, deque of texts]
+        self._size = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def put(self, stream, text):
+        # True when the buffer was empty, i.e. the consumer needs waking
+        with self._lock:
+            was_empty = not self._chunks
+            if self._chunks and self._chunks[-1][0] == stream:
+                self._chunks[-1][1].append(text)
+            else:
+                self._chunks.append([stream, collections.deque([text])])
+            self._size += len(text)
+            excess = self._size - self.max_chars
+            while excess > 0:
+                parts = self._chunks[0][1]
+                if len(parts[0]) <= excess:
+                    dropped = len(parts.popleft())
+                    if not parts:
+                        self._chunks.popleft()
+                else:
+                    dropped = excess
+                    parts[0] = parts[0][excess:]
+                self._size -= dropped
+                self._dropped += dropped
+                excess -= dropped
+            return was_empty
+
+    def take(self):
+        # ([(stream, text)], characters dropped since the last take)
+        with self._lock:
+            chunks = [(stream, ''.join(parts)) for stream, parts in self._chunks]
+            dropped = self._dropped
+            self._chunks.clear()
+            self._size = self._dropped = 0
+        return chunks, dropped
+
+
+class ScriptProcess:
+    def __init__(self, on_output=None, on_finished=None):
+        # on_output(stream_name, text) is called for every decoded chunk,
+        # on_finished(result) once the child has exited and its pipes are drained.
+        # Both are invoked from background threads.
+        self.on_output = on_output
+        self.on_finished = on_finished
+        self.process = None
+        self._active = False
+        self._cancelled = False
+        self._kill_timer = None
+        self._lock = threading.Lock()
+        self._inputs = None  # Queue of bytes for the writer thread of an interactive run
+        self._terminal = False  # The interactive run has a pseudo-terminal
+        self._line = ''  # Input typed since the last Enter, without a pseudo-terminal
+
+    def build_command(self, script_path, args=(), memory_limit=None, profile_path=None):
+        # -u keeps the child's stdout unbuffered so output streams as it is produced.
+        # memory_limit (bytes) needs the resource module, so it is ignored off POSIX.
+        # With profile_path the child writes cProfile stats there when the script ends.
+        if os.name != 'posix':
+            memory_limit = None
+        if memory_limit or profile_path:
+            return [sys.executable, '-u', '-c', _BOOTSTRAP, str(int(memory_limit or 0)), profile_path or '',
+                    script_path, *args]
+        return [sys.executable, '-u', script_path, *args]
+
+    def start(self, script_path, args=(), cwd=None, env=None, memory_limit=None, profile_path=None,
+              interactive=False, terminal_size=None):
+        # With interactive, write_input() feeds the child's stdin. On POSIX
+        # all three streams are then a pseudo-terminal of terminal_size
+        # (columns, rows), which echoes and edits input lines itself. stderr
+        # has to share it: input() writes its prompt there when on a
+        # terminal, and a pipe would not keep it in order with the echo.
+        if self.is_running():
+            raise RuntimeError("A process is already running.")
+
+        child_env = dict(os.environ if env is None else env)
+        child_env['PYTHONUNBUFFERED'] = '1'
+        child_env.setdefault('PYTHONIOENCODING', 'utf-8')
+
+        stdin, stdout, stderr = subprocess.DEVNULL, subprocess.PIPE, subprocess.PIPE
+        input_fd = terminal_fd = None
+        if interactive and pty is not None:
+            terminal_fd, child_fd = pty.openpty()
+            if terminal_size:
+                columns, rows = terminal_size
+                fcntl.ioctl(child_fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+            # Writes must never wait on a child that does not read; the reader selects first
+            os.set_blocking(terminal_fd, False)
+            stdin = stdout = stderr = child_fd
+            input_fd = terminal_fd
+        elif interactive:
+            stdin, input_fd = os.pipe()
+
+        self._cancelled = False
+        self._start_time = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                self.build_command(script_path, args, memory_limit, profile_path),
+                stdin=stdin,
+                stdout=stdout,
+                stderr=stderr,
+                cwd=cwd,
+                env=child_env,
+                # Own process group, so stop() also reaches grandchildren
+                start_new_session=(os.name == 'posix'),
+            )
+        except BaseException:
+            if input_fd is not None:
+                os.close(input_fd)
+            raise
+        finally:
+            # The child holds its own copies; ours would keep it from seeing EOF
+            if isinstance(stdin, int) and stdin >= 0:
+                os.close(stdin)
+        self._active = True
+
+        if terminal_fd is not None:
+            readers = [threading.Thread(target=self._read_terminal, args=(terminal_fd, 'stdout'), daemon=True)]
+        else:
+            readers = [
+                threading.Thread(target=self._read_stream, args=(self.process.stdout, 'stdout'), daemon=True),
+                threading.Thread(target=self._read_stream, args=(self.process.stderr, 'stderr'), daemon=True),
+            ]
+        for reader in readers:
+            reader.start()
+        finished = threading.Event()
+        self._inputs = writer = None
+        if input_fd is not None:
+            self._inputs = queue.Queue()
+            self._terminal = terminal_fd is not None
+            self._line = ''
+            writer = threading.Thread(target=self._write_input, args=(input_fd, self._inputs, finished), daemon=True)
+            writer.start()
+        threading.Thread(target=self._wait, args=(self.process, readers, finished, writer, terminal_fd),
+                         daemon=True).start()
+
+    def is_running(self):
+        # Stays True until the pipes are drained and on_finished has been called
+        return self._active
+
+    def write_input(self, text):
+        # Queues keystrokes for an interactive run; never blocks. A
+        # pseudo-terminal takes them as a terminal would: '\r' ends a line,
+        # '\x7f' erases, '\x04' at the start of a line is end of file. A
+        # pipe gets the same treatment here, including the echo.
+        inputs = self._inputs
+        if inputs is None or not self._active:
+            return
+        if self._terminal:
+            inputs.put(text.encode('utf-8'))
+            return
+        echo = []
+        for char in text:
+            if char in '\r\n':
+                inputs.put((self._line + '\n').encode('utf-8'))
+                self._line = ''
+                echo.append('\n')
+            elif char in '\x7f\b':
+                if self._line:
+                    self._line = self._line[:-1]
+                    echo.append('\b \b')
+            elif char == '\x04':
+                if self._line:
+                    inputs.put(self._line.encode('utf-8'))
+                    self._line = ''
+                else:
+                    inputs.put(None)  # Closes the pipe
+            else:
+                self._line += char
+                echo.append(char)
+        if echo and self.on_output:
+            self.on_output('stdout', ''.join(echo))
+
+    def _child_alive(self):
+        # Never poll(): that would reap the child before _wait()'s wait4 gets
+        # its resource usage. returncode is set by reap(), under self._lock.
+        return self.process is not None and self.process.returncode is None
+
+    def stop(self, grace_period=DEFAULT_GRACE_PERIOD):
+        # Ask the child to exit, then kill it if it is still alive after the grace period
+        with self._lock:
+            if not self._child_alive():
+                return
+            self._cancelled = True
+            self._send_signal(signal.SIGTERM if os.name == 'posix' else None)
+            if self._kill_timer is None:
+                self._kill_timer = threading.Timer(grace_period, self.kill)
+                self._kill_timer.daemon = True
+                self._kill_timer.start()
+
+    def interrupt(self):
+        # Raise KeyboardInterrupt in the child without ending it (POSIX only)
+        with self._lock:
+            if self._child_alive() and os.name == 'posix':
+                try:
+                    os.kill(self.process.pid, signal.SIGINT)
+                except ProcessLookupError:
+                    pass
+
+    def kill(self):
+        with self._lock:
+            if self._child_alive():
+                self._cancelled = True
+                self._send_signal(signal.SIGKILL if os.name == 'posix' else None, force=True)
+
+    def _send_signal(self, sig, force=False):
+        process = self.process
+        try:
+            if os.name == 'posix':
+                os.killpg(process.pid, sig)
+            elif force:
+                process.kill()
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass  # Already gone
+
+    def _read_stream(self, stream, name):
+        try:
+            self._read_chunks(lambda: stream.read1(READ_CHUNK_SIZE), name)
+        finally:
+            stream.close()
+
+    def _read_terminal(self, fd, name):
+        # The descriptor is non-blocking for the writer's sake, so wait until
+        # there is output. _wait() closes it once both threads are done.
+        def read():
+            while True:
+                select.select([fd], [], [])
+                try:
+                    return os.read(fd, READ_CHUNK_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    return b''  # EIO on Linux once every copy of the child's end is closed
+
+        self._read_chunks(read, name)
+
+    def _read_chunks(self, read, name):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while True:
+            data = read()
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text and self.on_output:
+                self.on_output(name, text)
+        text = decoder.decode(b'', final=True)
+        if text and self.on_output:
+            self.on_output(name, text)
+
+    def _write_input(self, fd, inputs, finished):
+        # Only this thread ever waits for the child to read its input. None
+        # from the queue ends it, closing the input if it is a pipe.
+        pending = b''
+        try:
+            while True:
+                if not pending:
+                    pending = inputs.get()
+                    if pending is None:
+                        break
+                try:
+                    pending = pending[os.write(fd, pending):]
+                except BlockingIOError:
+                    if finished.wait(INPUT_RETRY_INTERVAL):
+                        break
+        except OSError:
+            pass  # The child is gone
+        finally:
+            if not self._terminal:
+                os.close(fd)
+
+    def _wait(self, process, readers, finished, writer=None, terminal_fd=None):
+        # Samples the child's peak RSS while its pipes drain (see start())
+        sampled = sample_peak_rss(process.pid)
+        interval, max_interval = RSS_SAMPLE_INTERVALS
+        for reader in readers:
+            reader.join(interval if sampled is not None else None)
+            while reader.is_alive():
+                sampled = max(sampled, sample_peak_rss(process.pid) or 0)
+                interval = min(interval * 2, max_interval)
+                reader.join(interval)
+        wait_exited(process)
+        with self._lock:
+            # Reaped under the lock, so stop() never signals a recycled pid
+            exit_code, usage = reap(process)
+        wall_time = time.perf_counter() - self._start_time
+        with self._lock:
+            if self._kill_timer is not None:
+                self._kill_timer.cancel()
+                self._kill_timer = None
+        cpu_time = peak_rss = None
+        if usage is not None:
+            cpu_time = usage.ru_utime + usage.ru_stime
+            peak_rss = max_rss(usage)
+            # Linux counts the parent's pages into the child's ru_maxrss up to
+            # the exec, so it is only the child's own peak when it is above the
+            # parent's; otherwise the sampled peak is used
+            if sampled and peak_rss <= max_rss(resource.getrusage(resource.RUSAGE_SELF)):
+                peak_rss = sampled
+        elif sampled:
+            peak_rss = sampled
+        result = ExecutionResult(exit_code, wall_time, self._cancelled, cpu_time, peak_rss)
+        finished.set()
+        if writer is not None:
+            self._inputs.put(None)
+            writer.join()
+            self._inputs = None
+        if terminal_fd is not None:
+            os.close(terminal_fd)
+        self._active = False
+        if self.on_finished:
+            self.on_finished(result)
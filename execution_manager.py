@@ -0,0 +1,63 @@
+# execution_manager.py
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from execution import ScriptProcess, OutputBuffer, DEFAULT_GRACE_PERIOD
+
+
+class ExecutionManager(QObject):
+    # Output collects in a buffer on the engine's reader threads; the GUI
+    # thread is only woken when it was empty and then takes everything that
+    # arrived meanwhile, so a flood costs a few signals per frame.
+    output_received = pyqtSignal(str, str)  # stream name, text
+    finished = pyqtSignal(object)  # ExecutionResult
+
+    # Cross-thread hand-offs from the engine; Qt queues them onto the GUI
+    # thread because this object lives there
+    _output_ready = pyqtSignal()
+    _process_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.output = OutputBuffer()
+        self.process = ScriptProcess(
+            on_output=self._buffer_output,
+            on_finished=self._process_finished.emit,
+        )
+        self._output_ready.connect(self._deliver_output)
+        self._process_finished.connect(self._handle_process_finished)
+
+    def is_running(self):
+        return self.process.is_running()
+
+    def run_file(self, path, args=(), cwd=None, profile_path=None, interactive=False, terminal_size=None):
+        if self.is_running():
+            return False
+        self.process.start(path, args=args, cwd=cwd, profile_path=profile_path,
+                           interactive=interactive, terminal_size=terminal_size)
+        return True
+
+    def send_input(self, text):
+        self.process.write_input(text)
+
+    def interrupt(self):
+        self.process.interrupt()
+
+    def stop(self, grace_period=DEFAULT_GRACE_PERIOD):
+        self.process.stop(grace_period)
+
+    def _buffer_output(self, stream, text):
+        if self.output.put(stream, text):
+            self._output_ready.emit()
+
+    def _deliver_output(self):
+        chunks, dropped = self.output.take()
+        if dropped:
+            self.output_received.emit('stderr', f"[{dropped} characters of output skipped]\n")
+        for stream, text in chunks:
+            self.output_received.emit(stream, text)
+
+    def _handle_process_finished(self, result):
+        # Output still buffered comes first
+        self._deliver_output()
+        self.finished.emit(result)
@@ -0,0 +1,153 @@
+# file_io.py
+#
+# Qt-free file reading and writing. Files are probed from a small sample
+# (encoding, newline style, line count) and then read in chunks through
+# mmap, so a large file can be handed to the editor piece by piece. Saves
+# go to a temporary file next to the target that is then renamed over it,
+# so an interrupted save never leaves a truncated file behind.
+
+import codecs
+import io
+import mmap
+import os
+import re
+import tempfile
+
+CHUNK_SIZE = 256 * 1024  # Bytes decoded per chunk
+SAMPLE_SIZE = 64 * 1024  # Bytes looked at to guess the encoding
+COUNT_SIZE = 4 * 1024 * 1024  # Bytes per slice when counting lines
+FALLBACK_ENCODING = 'latin-1'  # Decodes any byte sequence
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# PEP 263 encoding declaration
+_CODING_RE = re.compile(rb'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+
+
+class FileInfo:
+    def __init__(self, path, size, encoding, newline, lines):
+        self.path = path
+        self.size = size
+        self.encoding = encoding
+        self.newline = newline  # Written back on save; the editor only sees '\n'
+        self.lines = lines  # Counted in bytes, so only an estimate for UTF-16/32
+
+    def __repr__(self):
+        return (f"FileInfo(path={self.path!r}, size={self.size!r}, encoding={self.encoding!r}, "
+                f"newline={self.newline!r}, lines={self.lines!r})")
+
+
+def detect_encoding(sample):
+    # BOM first, then a coding declaration in the first two lines, then
+    # whether the sample is valid UTF-8
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for line in sample.split(b'\n', 2)[:2]:
+        match = _CODING_RE.match(line)
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode('ascii')).name
+            except LookupError:
+                break
+    try:
+        # Not final: the sample may end inside a multi-byte character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return 'utf-8'
+
+
+def detect_newline(sample):
+    index = sample.find(b'\n')
+    if index > 0 and sample[index - 1:index] == b'\r':
+        return '\r\n'
+    if index < 0 and b'\r' in sample:
+        return '\r'
+    return '\n'
+
+
+def _open_map(file):
+    # Empty files and some special files cannot be mapped
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        return None
+
+
+def probe(path):
+    with open(path, 'rb') as file:
+        mapped = _open_map(file)
+        if mapped is None:
+            data = file.read()
+            sample, size, lines = data[:SAMPLE_SIZE], len(data), data.count(b'\n')
+        else:
+            with mapped:
+                sample, size = mapped[:SAMPLE_SIZE], len(mapped)
+                lines = sum(mapped[offset:offset + COUNT_SIZE].count(b'\n')
+                            for offset in range(0, size, COUNT_SIZE))
+    return FileInfo(path, size, detect_encoding(sample), detect_newline(sample), lines + 1)
+
+
+def read_chunks(path, encoding, chunk_size=CHUNK_SIZE):
+    # Yields (bytes read so far, text) with newlines translated to '\n' the
+    # way open() does. Raises UnicodeDecodeError if the file turns out not to
+    # be in encoding after all.
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    with open(path, 'rb') as file:
+        mapped = _open_map(file)
+        if mapped is None:
+            offset = 0
+            while True:
+                data = file.read(chunk_size)
+                if not data:
+                    break
+                offset += len(data)
+                yield offset, decoder.decode(data)
+        else:
+            with mapped:
+                for offset in range(0, len(mapped), chunk_size):
+                    data = mapped[offset:offset + chunk_size]
+                    yield offset + len(data), decoder.decode(data)
+                offset = len(mapped)
+    yield offset, decoder.decode(b'', final=True)
+
+
+def save_text(path, text, encoding='utf-8', newline='\n'):
+    # Encoding errors are raised before anything on disk is touched
+    if newline != '\n':
+        text = text.replace('\n', newline)
+    data = text.encode(encoding)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        _copy_mode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def _copy_mode(path, temp_path):
+    # mkstemp() creates the file private to the user; keep the permissions
+    # of the file being replaced, or the usual ones for a new file
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(temp_path, mode)
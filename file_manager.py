@@ -0,0 +1,78 @@
+# file_manager.py
+#
+# Qt side of file_io. A DocumentLoader streams a file into a CodeEditor a few
+# chunks per event loop turn, so the window keeps painting and responding
+# while a large file comes in. The editor is given the lexer for the file's
+# name before the first chunk arrives.
+
+import os
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import file_io
+from lexers import lexer_for_filename
+
+LOAD_CHUNK_SIZE = 64 * 1024  # Bytes appended to the document at a time
+TIME_SLICE = 0.015  # Seconds of loading per event loop turn
+
+
+class DocumentLoader(QObject):
+    progress = pyqtSignal(int, int)  # bytes read, file size
+    finished = pyqtSignal(object)  # FileInfo
+    failed = pyqtSignal(str)
+
+    def __init__(self, editor, path):
+        # Raises OSError if the file cannot be read
+        super().__init__(editor)
+        self.editor = editor
+        self.info = file_io.probe(os.path.abspath(path))
+        self.chunks = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.load_next)
+
+    def start(self):
+        self.editor.loader = self
+        lexer = lexer_for_filename(self.info.path)
+        if lexer is not self.editor.lexer:
+            self.editor.set_lexer(lexer)
+        self.editor.begin_loading(self.info.lines)
+        self.chunks = file_io.read_chunks(self.info.path, self.info.encoding, LOAD_CHUNK_SIZE)
+        self.timer.start()
+        self.load_next()  # Small files are done before the first paint
+
+    def load_next(self):
+        deadline = time.perf_counter() + TIME_SLICE
+        offset = 0
+        try:
+            while time.perf_counter() < deadline:
+                offset, text = next(self.chunks)
+                self.editor.append_text(text)
+        except StopIteration:
+            self.stop()
+            self.editor.end_loading()
+            self.finished.emit(self.info)
+            self.deleteLater()
+            return
+        except UnicodeDecodeError:
+            if self.info.encoding == file_io.FALLBACK_ENCODING:
+                raise
+            # The sample looked like the guessed encoding, the rest does not
+            self.stop()
+            self.info.encoding = file_io.FALLBACK_ENCODING
+            self.start()
+            return
+        except OSError as e:
+            self.stop()
+            self.editor.end_loading()
+            self.failed.emit(str(e))
+            self.deleteLater()
+            return
+        self.progress.emit(offset, self.info.size)
+
+    def stop(self):
+        self.timer.stop()
+        if self.chunks is not None:
+            self.chunks.close()  # Closes the file and its mapping
+            self.chunks = None
@@ -0,0 +1,280 @@
+# find_bar.py
+
+import re
+import threading
+
+from PyQt6.QtWidgets import QFrame, QWidget, QHBoxLayout, QVBoxLayout, QLineEdit, QToolButton, QLabel, QTextEdit
+from PyQt6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PyQt6.QtCore import Qt, QPoint, QTimer, pyqtSignal
+
+import settings
+from search import SearchQuery, find_all, match_at_or_after, matches_in_range
+
+SEARCH_DELAY = 150  # Milliseconds after the last keystroke or edit
+MATCH_COLOR = '#613214'
+CURRENT_MATCH_COLOR = '#515c6a'
+
+
+class FindBar(QFrame):
+    # Non-modal find/replace overlay in the top-right corner of a CodeEditor.
+    # All matches are found in one pass (on a background thread for large
+    # documents); only those in the viewport are drawn as extra selections.
+    _matches_found = pyqtSignal(int, object)  # generation, matches
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.matches = []  # Sorted (start, end) document ranges
+        self.current = -1
+        self.query = None
+        self.generation = 0
+        self._after_search = None
+
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+        self.setAutoFillBackground(True)
+        self.setup_ui()
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.run_search)
+
+        self._matches_found.connect(self.set_matches)
+        self.find_input.textChanged.connect(self.search_timer.start)
+        for button in (self.case_button, self.word_button, self.regex_button):
+            button.toggled.connect(lambda checked: self.run_search())
+        self.editor.document().contentsChange.connect(self.handle_contents_change)
+        self.editor.updateRequest.connect(self.handle_update_request)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(2)
+
+        find_row = QHBoxLayout()
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find")
+        self.find_input.setMinimumWidth(200)
+        find_row.addWidget(self.find_input)
+        self.case_button = self.tool_button("Aa", "Match Case", checkable=True)
+        self.word_button = self.tool_button("ab", "Match Whole Word", checkable=True)
+        self.regex_button = self.tool_button(".*", "Use Regular Expression", checkable=True)
+        for button in (self.case_button, self.word_button, self.regex_button):
+            find_row.addWidget(button)
+        self.count_label = QLabel("No results")
+        self.count_label.setMinimumWidth(80)
+        find_row.addWidget(self.count_label)
+        find_row.addWidget(self.tool_button("↑", "Previous Match (Shift+Enter)", self.find_previous))
+        find_row.addWidget(self.tool_button("↓", "Next Match (Enter)", self.find_next))
+        find_row.addWidget(self.tool_button("×", "Close (Escape)", self.close_bar))
+        layout.addLayout(find_row)
+
+        self.replace_row = QWidget()
+        replace_row = QHBoxLayout(self.replace_row)
+        replace_row.setContentsMargins(0, 0, 0, 0)
+        self.replace_input = QLineEdit()
+        self.replace_input.setPlaceholderText("Replace")
+        replace_row.addWidget(self.replace_input)
+        replace_row.addWidget(self.tool_button("Replace", "Replace", self.replace_current))
+        replace_row.addWidget(self.tool_button("All", "Replace All", self.replace_all))
+        layout.addWidget(self.replace_row)
+
+    def tool_button(self, text, tooltip, slot=None, checkable=False):
+        button = QToolButton()
+        button.setText(text)
+        button.setToolTip(tooltip)
+        button.setCheckable(checkable)
+        button.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        if slot is not None:
+            button.clicked.connect(slot)
+        return button
+
+    # --- Showing ---
+    def open(self, replace=False):
+        cursor = self.editor.textCursor()
+        selected = cursor.selectedText()
+        if selected and '\u2029' not in selected:  # Single-line selections only
+            self.find_input.setText(selected)
+        self.replace_row.setVisible(replace)
+        self.reposition()
+        self.show()
+        self.raise_()
+        self.find_input.setFocus()
+        self.find_input.selectAll()
+        self.run_search()
+
+    def close_bar(self):
+        self.hide()
+        self.generation += 1  # Drop results still on their way
+        self.matches = []
+        self.current = -1
+        self.editor.set_extra_selections('search', [])
+        self.editor.setFocus()
+
+    def reposition(self):
+        self.adjustSize()
+        viewport = self.editor.viewport().geometry()
+        self.move(viewport.right() - self.width() - 16, viewport.top())
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key == Qt.Key.Key_Escape:
+            self.close_bar()
+        elif key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            if self.replace_input.hasFocus():
+                self.replace_current()
+            elif event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.find_previous()
+            else:
+                self.find_next()
+        else:
+            super().keyPressEvent(event)
+            return
+        event.accept()
+
+    # --- Searching ---
+    def build_query(self):
+        return SearchQuery(self.find_input.text(),
+                           regex=self.regex_button.isChecked(),
+                           case_sensitive=self.case_button.isChecked(),
+                           whole_word=self.word_button.isChecked())
+
+    def handle_contents_change(self, position, chars_removed, chars_added):
+        if self.isVisible():
+            self.search_timer.start()
+
+    def run_search(self, then=None):
+        self.search_timer.stop()
+        self.generation += 1
+        self._after_search = then
+        self.query = self.build_query()
+        try:
+            self.query.compile()
+        except re.error as e:
+            self.set_matches(self.generation, [])
+            self.set_label(f"Invalid pattern: {e.msg}", error=True)
+            return
+
+        text = self.editor.toPlainText()
+        if len(text) > settings.value('search/background_chars'):
+            self.set_label("Searching...")
+            threading.Thread(target=self._search_in_background,
+                             args=(self.generation, text, self.query), daemon=True).start()
+        else:
+            self.set_matches(self.generation, find_all(text, self.query))
+
+    def _search_in_background(self, generation, text, query):
+        self._matches_found.emit(generation, find_all(text, query))
+
+    def set_matches(self, generation, matches):
+        if generation != self.generation:
+            return  # A newer search was started
+        self.matches = matches
+        cursor = self.editor.textCursor()
+        selection = (cursor.selectionStart(), cursor.selectionEnd())
+        index = match_at_or_after(matches, selection[0])
+        self.current = index if index < len(matches) and matches[index] == selection else -1
+        self.update_label()
+        self.update_selections()
+        then, self._after_search = self._after_search, None
+        if then is not None:
+            then()
+
+    def set_label(self, text, error=False):
+        self.count_label.setText(text)
+        self.count_label.setStyleSheet("color: #f48771;" if error else "")
+
+    def update_label(self):
+        if not self.query or not self.query.pattern:
+            self.set_label("")
+        elif not self.matches:
+            self.set_label("No results", error=True)
+        elif self.current >= 0:
+            self.set_label(f"{self.current + 1} of {len(self.matches)}")
+        else:
+            self.set_label(f"{len(self.matches)} matches")
+
+    # --- Navigation ---
+    def find_next(self):
+        if not self.matches:
+            return
+        cursor = self.editor.textCursor()
+        selection = (cursor.selectionStart(), cursor.selectionEnd())
+        index = match_at_or_after(self.matches, selection[0])
+        if index < len(self.matches) and self.matches[index] == selection:
+            index += 1
+        self.select_match(index % len(self.matches))
+
+    def find_previous(self):
+        if not self.matches:
+            return
+        index = match_at_or_after(self.matches, self.editor.textCursor().selectionStart()) - 1
+        self.select_match(index % len(self.matches))
+
+    def select_match(self, index):
+        start, end = self.matches[index]
+        cursor = self.editor.textCursor()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.current = index
+        self.update_label()
+        self.update_selections()
+
+    # --- Replacing ---
+    def replace_current(self):
+        if self.current < 0:
+            self.find_next()
+            return
+        cursor = self.editor.textCursor()
+        # selectedText() uses U+2029 for line breaks
+        selected = cursor.selectedText().replace('\u2029', '\n')
+        match = self.query.compile().fullmatch(selected)
+        if match is None:
+            self.find_next()
+            return
+        cursor.insertText(self.query.expand(match, self.replace_input.text()))
+        self.run_search(then=self.find_next)
+
+    def replace_all(self):
+        query = self.build_query()
+        try:
+            count = self.editor.replace_all(query, self.replace_input.text())
+        except re.error as e:
+            self.set_label(f"Invalid pattern: {e.msg}", error=True)
+            return
+        self.run_search()
+        self.set_label(f"Replaced {count}")
+
+    # --- Drawing ---
+    def handle_update_request(self, rect, dy):
+        if dy and self.matches:
+            self.update_selections()
+
+    def update_selections(self):
+        # Only matches in the viewport become extra selections, so a search
+        # with thousands of hits costs no more to draw than one with a few
+        if not self.matches:
+            self.editor.set_extra_selections('search', [])
+            return
+        viewport = self.editor.viewport()
+        start = self.editor.firstVisibleBlock().position()
+        last_block = self.editor.cursorForPosition(QPoint(viewport.width(), viewport.height())).block()
+        end = last_block.position() + last_block.length()
+
+        match_format = QTextCharFormat()
+        match_format.setBackground(QColor(MATCH_COLOR))
+        current_format = QTextCharFormat()
+        current_format.setBackground(QColor(CURRENT_MATCH_COLOR))
+        current = self.matches[self.current] if self.current >= 0 else None
+
+        selections = []
+        for match in matches_in_range(self.matches, start, end):
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(self.editor.document())
+            selection.cursor.setPosition(match[0])
+            selection.cursor.setPosition(match[1], QTextCursor.MoveMode.KeepAnchor)
+            selection.format = current_format if match == current else match_format
+            selections.append(selection)
+        self.editor.set_extra_selections('search', selections)
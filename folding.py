@@ -0,0 +1,219 @@
+# folding.py
+#
+# Fold regions. Indentation gives every block a region right away and is
+# kept up to date incrementally: an edit only rescans the lines between the
+# nearest shallower code lines around it. Regions from the analysis worker's
+# AST (multi-line docstrings, literals, calls) win over indentation wherever
+# they start on the same line. Lines are 0-based and regions are inclusive
+# (header line, last line). Each region is stored as its length on its header
+# line, so the regions below an edit move with the per-line lists instead of
+# being renumbered.
+
+import ast
+
+
+def indent_width(text):
+    # Indentation in columns, or None for lines that do not affect folding
+    # (blank lines and comments)
+    stripped = text.lstrip()
+    if not stripped or stripped.startswith('#'):
+        return None
+    return len(text[:len(text) - len(stripped)].expandtabs(4))
+
+
+def ast_regions(tree):
+    # {header line: last line} for every multi-line statement. Compound
+    # statements fold up to the end of their body, so an 'else:' or 'except'
+    # clause stays visible and gets a region of its own.
+    regions = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler):
+            start = node.lineno
+        elif isinstance(node, ast.stmt):
+            start = node.lineno
+        elif type(node).__name__ == 'match_case':  # Python 3.10+
+            start = node.pattern.lineno
+        else:
+            continue
+        body = getattr(node, 'body', None)
+        last = body[-1] if isinstance(body, list) and body else node
+        end = getattr(last, 'end_lineno', None)  # Python 3.8+
+        if end is not None and end > start:
+            regions[start - 1] = max(regions.get(start - 1, 0), end - 1)
+    return regions
+
+
+class FoldTree:
+    def __init__(self):
+        self.indents = []  # indent_width() per line
+        self.indent_spans = []  # Region length per header line, 0 for none
+        self.ast_spans = []
+        self.folded = set()  # Header lines of collapsed regions
+
+    def __len__(self):
+        return len(self.indents)
+
+    def region_end(self, line):
+        if not 0 <= line < len(self.indents):
+            return None
+        span = self.ast_spans[line] or self.indent_spans[line]
+        return line + span if span else None
+
+    def is_folded(self, line):
+        return line in self.folded
+
+    # --- Edits ---
+    def replace_lines(self, first, removed, lines):
+        # Lines first .. first + removed - 1 were replaced by lines (their new
+        # texts). Returns the (first, last) lines whose visibility may now be
+        # wrong, or None when nothing is folded.
+        old_last = first + removed - 1
+        new_last = first + len(lines) - 1
+        new_indents = [indent_width(text) for text in lines]
+        delta = len(new_indents) - removed
+        changed = [i for i in self.indents[first:old_last + 1] + new_indents if i is not None]
+        depth = min(changed) if changed else None
+
+        # Edits reaching into the hidden part of a region unfold it; editing
+        # just its header line keeps it folded
+        header_only = removed == 1 and len(lines) == 1
+        unfolded = [start for start in self.folded
+                    if start < first <= self.region_end(start)
+                    or (first <= start <= old_last and not (header_only and start == first))]
+        sync = None
+        if self.folded:
+            sync = [first, max(new_last, first)]
+            for start in unfolded:
+                end = self.region_end(start)
+                sync[0] = min(sync[0], start)
+                sync[1] = max(sync[1], end + delta if end > old_last else new_last)
+            self.folded.difference_update(unfolded)
+
+        # Walking up from the edit through lines of ever smaller indentation
+        # finds the header of every region that can contain it
+        chain = []
+        for line in range(first - 1, -1, -1):
+            indent = self.indents[line]
+            if indent is not None and (not chain or indent < self.indents[chain[-1]]):
+                chain.append(line)
+                if indent == 0:
+                    break
+
+        # Only the lines up to the nearest code lines at or above the edit's
+        # shallowest indentation can open or close a region it affects
+        lo = next((line for line in chain if depth is None or self.indents[line] <= depth), None)
+        if lo is None:
+            lo, ancestors = 0, []
+        else:
+            ancestors = [(line, self.indents[line]) for line in reversed(chain) if line < lo]
+        hi_old = old_last + 1
+        while hi_old < len(self.indents) and (self.indents[hi_old] is None
+                                              or (depth is not None and self.indents[hi_old] > depth)):
+            hi_old += 1
+        old_ends = {line: line + self.indent_spans[line] for line in chain if self.indent_spans[line]}
+
+        # AST regions around the edit stretch with it, the ones it cuts into
+        # are dropped until the next analysis replaces them
+        for line in chain:
+            span = self.ast_spans[line]
+            if span and line + span >= first:
+                self.ast_spans[line] = span + delta if line + span > old_last else 0
+
+        self.indents[first:old_last + 1] = new_indents
+        self.indent_spans[first:old_last + 1] = [0] * len(lines)
+        self.ast_spans[first:old_last + 1] = [0] * len(lines)
+        hi = hi_old + delta
+        self.indent_spans[lo:hi] = [0] * (hi - lo)
+        for start, end in self._scan(lo, hi, ancestors, old_ends, delta).items():
+            self.indent_spans[start] = end - start
+
+        folded = {start + delta if start > old_last else start for start in self.folded}
+        self.folded = set()
+        for start in folded:
+            if self.region_end(start) is not None:
+                self.folded.add(start)
+            else:
+                # The header line no longer opens a region
+                sync[1] = max(sync[1], len(self.indents) - 1)
+        return sync
+
+    def _scan(self, lo, hi, stack, old_ends, delta):
+        # Indentation regions opened in lo .. hi - 1. stack holds the regions
+        # already open at lo as (header line, indent).
+        regions = {}
+        last_code = None
+        for line in range(lo, hi):
+            indent = self.indents[line]
+            if indent is None:
+                continue
+            while stack and indent <= stack[-1][1]:
+                start = stack.pop()[0]
+                if last_code is not None and last_code > start:
+                    regions[start] = last_code
+            stack.append((line, indent))
+            last_code = line
+        closing = self.indents[hi] if hi < len(self.indents) else -1
+        while stack and closing <= stack[-1][1]:
+            start = stack.pop()[0]
+            if last_code is not None and last_code > start:
+                regions[start] = last_code
+        for start, _ in stack:
+            # Open past hi: only its end moved
+            if start in old_ends:
+                regions[start] = old_ends[start] + delta
+        return regions
+
+    def set_ast_regions(self, regions):
+        # Takes {header line: last line} from ast_regions(). Returns the
+        # (first, last) lines whose visibility may now be wrong, or None.
+        before = {start: self.region_end(start) for start in self.folded}
+        self.ast_spans = [0] * len(self.indents)
+        for start, end in regions.items():
+            if start < len(self.ast_spans):
+                self.ast_spans[start] = end - start
+        sync = None
+        for start, old_end in before.items():
+            end = self.region_end(start)
+            if end == old_end:
+                continue
+            if end is None:
+                self.folded.discard(start)
+            last = max(old_end, end or start)
+            sync = (start, last) if sync is None else (min(sync[0], start), max(sync[1], last))
+        return sync
+
+    # --- Folding ---
+    def fold(self, line):
+        if self.region_end(line) is None:
+            return False
+        self.folded.add(line)
+        return True
+
+    def unfold(self, line):
+        if line not in self.folded:
+            return False
+        self.folded.discard(line)
+        return True
+
+    def fold_all(self):
+        self.folded = {line for line in range(len(self.indents))
+                       if self.ast_spans[line] or self.indent_spans[line]}
+
+    def unfold_all(self):
+        self.folded = set()
+
+    def enclosing_folds(self, line):
+        # Folded headers whose hidden part contains line
+        return [start for start in self.folded if start < line <= self.region_end(start)]
+
+    def hidden_ranges(self):
+        # (first, last) hidden line of every outermost collapsed region, in order
+        ranges = []
+        for start in sorted(self.folded):
+            end = self.region_end(start)
+            if ranges and start <= ranges[-1][1]:
+                if end > ranges[-1][1]:
+                    ranges[-1] = (ranges[-1][0], end)  # Overlapping AST regions
+                continue
+            ranges.append((start + 1, end))
+        return ranges
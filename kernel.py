@@ -0,0 +1,179 @@
+# kernel.py
+#
+# Long-lived interpreter started by KernelManager as
+#
+#     python -u kernel.py <port> <authkey-hex>
+#
+# It connects back to the GUI over a local multiprocessing connection and
+# executes code in one persistent namespace, so imports and data stay warm
+# between runs. Program output goes to the process's own stdout/stderr, which
+# the GUI streams like any other run; the connection only carries small
+# control messages (dicts) and paged namespace snapshots.
+
+import os
+import reprlib
+import signal
+import sys
+import time
+import traceback
+import types
+from multiprocessing.connection import Client
+
+VALUE_REPR_LIMIT = 120
+HIDDEN_TYPES = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type)
+
+_repr = reprlib.Repr()
+_repr.maxstring = VALUE_REPR_LIMIT
+_repr.maxother = VALUE_REPR_LIMIT
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = 10
+
+
+# --- Namespace Snapshots ---
+def short_repr(value):
+    try:
+        text = _repr.repr(value)
+    except Exception as e:
+        text = f"<repr failed: {type(e).__name__}>"
+    return text if len(text) <= VALUE_REPR_LIMIT else text[:VALUE_REPR_LIMIT - 3] + '...'
+
+
+def children(value):
+    # (label, child) pairs shown when a value is expanded in the explorer
+    if isinstance(value, dict):
+        return [(short_repr(key), item) for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [(f"[{index}]", item) for index, item in enumerate(value)]
+    if isinstance(value, (set, frozenset)):
+        return [(f"{{{index}}}", item) for index, item in enumerate(value)]
+    if isinstance(value, HIDDEN_TYPES):
+        return []
+    attributes = getattr(value, '__dict__', None)
+    if isinstance(attributes, dict):
+        return [(name, item) for name, item in attributes.items() if not name.startswith('_')]
+    return []
+
+
+def is_expandable(value):
+    if isinstance(value, (dict, list, tuple, set, frozenset)):
+        return len(value) > 0
+    try:
+        return bool(children(value))
+    except Exception:
+        return False
+
+
+def describe(label, value):
+    return {
+        'name': label,
+        'type': type(value).__name__,
+        'value': short_repr(value),
+        'expandable': is_expandable(value),
+    }
+
+
+def top_level(namespace):
+    return sorted(
+        ((name, value) for name, value in namespace.items()
+         if not name.startswith('_') and not isinstance(value, HIDDEN_TYPES)),
+        key=lambda item: item[0].lower())
+
+
+def snapshot(namespace, path, offset, limit):
+    # path is a list of indices into successive children() listings
+    items = top_level(namespace)
+    for index in path:
+        items = children(items[index][1])
+    page = items[offset:offset + limit]
+    return {
+        'total': len(items),
+        'offset': offset,
+        'entries': [describe(label, value) for label, value in page],
+    }
+
+
+# --- Kernel ---
+class Kernel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+
+    def serve(self):
+        while True:
+            try:
+                message = self.connection.recv()
+            except KeyboardInterrupt:
+                continue  # Interrupt arrived while idle
+            except EOFError:
+                break  # The GUI went away
+            op = message.get('op')
+            if op == 'shutdown':
+                break
+            handler = getattr(self, 'handle_' + op, None)
+            if handler is None:
+                self.reply(message, status='error', error=f"Unknown op: {op}")
+                continue
+            try:
+                handler(message)
+            except KeyboardInterrupt:
+                self.reply(message, status='error', error='Interrupted')
+            except Exception as e:
+                self.reply(message, status='error', error=f"{type(e).__name__}: {e}")
+
+    def reply(self, message, **fields):
+        fields.update(op=message['op'] + '_reply', id=message.get('id'))
+        self.connection.send(fields)
+
+    def handle_execute(self, message):
+        filename = message.get('filename', '<kernel>')
+        if message.get('cwd'):
+            os.chdir(message['cwd'])
+        sys.argv = [filename]
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = 'ok'
+        try:
+            exec(compile(message['code'], filename, 'exec'), self.namespace)
+        except SystemExit:
+            pass
+        except BaseException:
+            status = 'error'
+            self.print_user_traceback()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        self.reply(message, status=status,
+                   wall_time=time.perf_counter() - start,
+                   cpu_time=time.process_time() - cpu_start)
+
+    def handle_namespace(self, message):
+        path = message.get('path', [])
+        result = snapshot(self.namespace, path, message.get('offset', 0), message.get('limit', 100))
+        self.reply(message, status='ok', path=path, **result)
+
+    def handle_reset(self, message):
+        self.namespace.clear()
+        self.namespace.update({'__name__': '__main__', '__builtins__': __builtins__})
+        self.reply(message, status='ok')
+
+    def print_user_traceback(self):
+        # Drop the kernel's own frames from the top of the traceback
+        exc_type, exc_value, tb = sys.exc_info()
+        while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+            tb = tb.tb_next
+        traceback.print_exception(exc_type, exc_value, tb)
+
+
+def main(argv):
+    port, authkey = int(argv[1]), bytes.fromhex(argv[2])
+    # SIGINT from the GUI interrupts the running cell, not the kernel
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    # The kernel directory must not shadow user imports
+    kernel_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or '.') != kernel_dir]
+    sys.path.insert(0, '')
+    with Client(('127.0.0.1', port), authkey=authkey) as connection:
+        Kernel(connection).serve()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,134 @@
+# kernel_manager.py
+
+import os
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from agent_connection import AgentConnection
+from execution import ScriptProcess, OutputBuffer
+
+KERNEL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kernel.py')
+
+# Kernel states
+STATE_DEAD = 'dead'
+STATE_STARTING = 'starting'
+STATE_IDLE = 'idle'
+STATE_BUSY = 'busy'
+
+
+class KernelManager(QObject):
+    # Output is batched through an OutputBuffer as in ExecutionManager, so a
+    # cell printing in a tight loop costs a few signals per frame
+    output_received = pyqtSignal(str, str)  # stream name, text
+    execution_finished = pyqtSignal(object)  # execute_reply message
+    namespace_received = pyqtSignal(object)  # namespace_reply message
+    state_changed = pyqtSignal(str)
+
+    # Cross-thread hand-offs from the engine
+    _output_ready = pyqtSignal()
+    _process_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.state = STATE_DEAD
+        self.connection = AgentConnection(self)
+        self._restart_pending = False
+
+        self.output = OutputBuffer()
+        self.process = ScriptProcess(
+            on_output=self._buffer_output,
+            on_finished=self._process_finished.emit,
+        )
+        self._output_ready.connect(self._deliver_output)
+        self.connection.connected.connect(self._handle_connected)
+        self.connection.message_received.connect(self._handle_message)
+        self._process_finished.connect(self._handle_process_finished)
+
+    def is_alive(self):
+        return self.state != STATE_DEAD
+
+    def is_busy(self):
+        return self.state == STATE_BUSY
+
+    def start(self):
+        if self.is_alive() or self.process.is_running():
+            return
+        try:
+            self.process.start(KERNEL_SCRIPT, args=self.connection.listen())
+        except Exception:
+            self.connection.close()
+            raise
+        self._set_state(STATE_STARTING)
+
+    def restart(self):
+        if self.process.is_running():
+            # Started again once the old process has fully exited
+            self._restart_pending = True
+            self.shutdown()
+        else:
+            self.start()
+
+    def shutdown(self):
+        if self.connection.is_connected():
+            self.connection.send({'op': 'shutdown'})
+        self.process.stop()
+
+    def interrupt(self):
+        self.process.interrupt()
+
+    # --- Requests ---
+    def execute(self, code, filename='<editor>', cwd=None):
+        self.start()
+        self._set_state(STATE_BUSY)
+        return self.send({'op': 'execute', 'code': code, 'filename': filename, 'cwd': cwd})
+
+    def request_namespace(self, path, offset=0, limit=100):
+        if not self.is_alive():
+            return None
+        return self.send({'op': 'namespace', 'path': list(path), 'offset': offset, 'limit': limit})
+
+    def send(self, message):
+        return self.connection.send(message)
+
+    # --- Output ---
+    def _buffer_output(self, stream, text):
+        if self.output.put(stream, text):
+            self._output_ready.emit()
+
+    def _deliver_output(self):
+        chunks, dropped = self.output.take()
+        if dropped:
+            self.output_received.emit('stderr', f"[{dropped} characters of output skipped]\n")
+        for stream, text in chunks:
+            self.output_received.emit(stream, text)
+
+    # --- Connection ---
+    def _handle_connected(self):
+        if self.state == STATE_STARTING:
+            self._set_state(STATE_IDLE)
+
+    def _handle_message(self, message):
+        if message['op'] == 'execute_reply':
+            # Output already read comes before the reply
+            self._deliver_output()
+            self._set_state(STATE_IDLE)
+            self.execution_finished.emit(message)
+        elif message['op'] == 'namespace_reply':
+            self.namespace_received.emit(message)
+
+    def _handle_process_finished(self, result):
+        self._deliver_output()
+        was_busy = self.is_busy()
+        self.connection.close()
+        self._set_state(STATE_DEAD)
+        if was_busy:
+            self.execution_finished.emit({'op': 'execute_reply', 'status': 'dead',
+                                          'exit_code': result.exit_code})
+        if self._restart_pending:
+            self._restart_pending = False
+            self.start()
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(state)
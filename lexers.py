@@ -0,0 +1,206 @@
+# lexers.py
+#
+# Qt-free line lexers and the registry that maps languages and file names to
+# them. Lexers are stateless and compiled once per process; every document
+# shares the same instances. A lexer turns one line plus the state the
+# previous line ended in into (start, length, kind) tokens and a new state.
+# Kinds are the keys of the highlighter's format table; state 0 is "normal".
+
+import builtins
+import keyword
+import os
+import re
+
+# --- Python ---
+# The state a line ends in says whether the next line starts inside a
+# triple-quoted string.
+STATE_NORMAL = 0
+STATE_TRIPLE_SINGLE = 1
+STATE_TRIPLE_DOUBLE = 2
+
+_TRIPLE_END = {
+    STATE_TRIPLE_SINGLE: re.compile(r"(?:\\.|[^\\])*?'''"),
+    STATE_TRIPLE_DOUBLE: re.compile(r'(?:\\.|[^\\])*?"""'),
+}
+
+PYTHON_KEYWORDS = frozenset(keyword.kwlist)
+PYTHON_BUILTINS = frozenset(name for name in dir(builtins) if not name.startswith('_'))
+
+# One alternation matched left to right replaces the per-keyword/per-operator scans
+_TOKEN_RE = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<triple>(?:[rRbBuUfF]{1,2})?(?:'''|\"\"\"))
+  | (?P<string>(?:[rRbBuUfF]{1,2})?(?:'(?:[^'\\]|\\.)*'?|"(?:[^"\\]|\\.)*"?))
+  | (?P<number>(?:\b|(?<![\w.])(?=\.\d))(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+
+        |(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?[jJ]?))
+  | (?P<decorator>^\s*@[\w.]+)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<operator>\*\*=?|//=?|>>=?|<<=?|->|:=|[-+*/%&|^~<>=!]=?|@=?)
+  | (?P<brace>[()\[\]{}])
+""", re.VERBOSE)
+
+
+def tokenize_python(text, state=STATE_NORMAL):
+    """Scan one line of Python source in a single pass.
+
+    Returns a list of ``(start, length, kind)`` tuples and the state the line
+    ends in. ``state`` is the state the previous line ended in (negative
+    values, as used by Qt for unhighlighted blocks, count as normal).
+    """
+    tokens = []
+    pos = 0
+    length = len(text)
+
+    if state in _TRIPLE_END:
+        match = _TRIPLE_END[state].match(text)
+        if not match:
+            if length:
+                tokens.append((0, length, 'string'))
+            return tokens, state
+        pos = match.end()
+        tokens.append((0, pos, 'string'))
+
+    previous_name = None
+    while pos < length:
+        match = _TOKEN_RE.search(text, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, pos = match.span()
+
+        if kind == 'triple':
+            quote_state = STATE_TRIPLE_SINGLE if match.group()[-1] == "'" else STATE_TRIPLE_DOUBLE
+            end_match = _TRIPLE_END[quote_state].match(text, pos)
+            if not end_match:
+                tokens.append((start, length - start, 'string'))
+                return tokens, quote_state
+            pos = end_match.end()
+            kind = 'string'
+        elif kind == 'name':
+            word = match.group()
+            if previous_name in ('def', 'class'):
+                kind = 'def_class'
+            elif word in PYTHON_KEYWORDS:
+                kind = 'keyword'
+            elif word in PYTHON_BUILTINS:
+                kind = 'builtin'
+            else:
+                previous_name = word
+                continue  # Plain identifiers are not formatted
+            previous_name = word
+            tokens.append((start, pos - start, kind))
+            continue
+
+        previous_name = None
+        tokens.append((start, pos - start, kind))
+
+    return tokens, STATE_NORMAL
+
+
+class Lexer:
+    name = 'text'
+
+    def tokenize(self, text, state=0):
+        return [], 0
+
+
+class PythonLexer(Lexer):
+    name = 'python'
+
+    def tokenize(self, text, state=STATE_NORMAL):
+        return tokenize_python(text, state)
+
+
+# --- Pygments ---
+class PygmentsLexer(Lexer):
+    # Wraps any Pygments lexer, one line at a time. Constructs spanning lines
+    # are not tracked, so the state is always normal.
+    def __init__(self, pygments_lexer):
+        from pygments.token import Token
+        self.pygments_lexer = pygments_lexer
+        self.name = pygments_lexer.aliases[0] if pygments_lexer.aliases else pygments_lexer.name
+        # Most specific first: Name.Builtin must win over Name
+        self.kinds = [
+            (Token.Comment, 'comment'),
+            (Token.Literal.String, 'string'),
+            (Token.Literal.Number, 'number'),
+            (Token.Keyword, 'keyword'),
+            (Token.Name.Builtin, 'builtin'),
+            (Token.Name.Decorator, 'decorator'),
+            (Token.Name.Function, 'def_class'),
+            (Token.Name.Class, 'def_class'),
+            (Token.Operator, 'operator'),
+        ]
+        self._cache = {}
+
+    def _kind(self, token_type):
+        try:
+            return self._cache[token_type]
+        except KeyError:
+            kind = next((kind for base, kind in self.kinds if token_type in base), None)
+            self._cache[token_type] = kind
+            return kind
+
+    def tokenize(self, text, state=0):
+        from pygments.token import Token
+        tokens = []
+        for start, token_type, value in self.pygments_lexer.get_tokens_unprocessed(text):
+            if token_type in Token.Punctuation and value in '()[]{}':
+                kind = 'brace'
+            else:
+                kind = self._kind(token_type)
+            if kind and value:
+                tokens.append((start, min(len(value), len(text) - start), kind))
+        return tokens, 0
+
+
+def _pygments_lexer(**lookup):
+    try:
+        from pygments import lexers as pygments_lexers
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return None  # Pygments is optional
+    options = {'stripnl': False, 'stripall': False, 'ensurenl': False}
+    try:
+        if 'filename' in lookup:
+            return PygmentsLexer(pygments_lexers.get_lexer_for_filename(lookup['filename'], **options))
+        return PygmentsLexer(pygments_lexers.get_lexer_by_name(lookup['name'], **options))
+    except ClassNotFound:
+        return None
+
+
+# --- Registry ---
+_factories = {}  # Language name -> lexer factory
+_extensions = {}  # File extension -> language name
+_instances = {}  # Language name -> shared lexer instance
+
+
+def register_lexer(name, factory, extensions=()):
+    _factories[name] = factory
+    _instances.pop(name, None)
+    for extension in extensions:
+        _extensions[extension.lower()] = name
+
+
+def get_lexer(name):
+    # Registered lexers first, then anything Pygments knows; plain text otherwise
+    if name not in _instances:
+        if name in _factories:
+            _instances[name] = _factories[name]()
+        else:
+            _instances[name] = _pygments_lexer(name=name) or _factories['text']()
+    return _instances[name]
+
+
+def lexer_for_filename(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in _extensions:
+        return get_lexer(_extensions[extension])
+    key = 'file:' + (extension or os.path.basename(path))
+    if key not in _instances:
+        _instances[key] = _pygments_lexer(filename=os.path.basename(path)) or get_lexer('text')
+    return _instances[key]
+
+
+register_lexer('text', Lexer, ('.txt',))
+register_lexer('python', PythonLexer, ('.py', '.pyw', '.pyi'))
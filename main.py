@@ -1,36 +1,122 @@
 # main.py
 
+import time
+_START = time.perf_counter()  # Startup profiling counts module imports too
+
 import sys
+
+if __name__ == "__main__" and sys.argv[1:2] and sys.argv[1] in ('run', 'batch'):
+    # Headless commands (see cli.py) never import Qt
+    import cli
+    sys.exit(cli.main())
+
+import argparse
 import os
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QPlainTextEdit,
-    QTreeWidget, QTreeWidgetItem, QDockWidget, QStatusBar, QFileDialog,
+    QApplication, QMainWindow, QWidget, QVBoxLayout,
+    QDockWidget, QStatusBar, QFileDialog,
     QMessageBox, QInputDialog, QFontDialog, QTabWidget, QHBoxLayout, QPushButton,
     QMenu, QSizePolicy
 )
 from PyQt6.QtGui import QKeySequence, QFontDatabase, QShortcut, QAction, QColor, QIcon
-from PyQt6.QtCore import Qt, QPoint, QTimer
+from PyQt6.QtCore import Qt, QPoint, QTimer, QEvent, pyqtSignal
 
 from code_editor import CodeEditor
+from tab_manager import TabManager, SuspendedTab
+from file_manager import DocumentLoader
+from lexers import lexer_for_filename
+from workspace import Workspace
+from symbol_search import SymbolSearchDialog
 from dashboard import Dashboard
 from custom_title_bar import TitleBar
-from utils import fade_in_widget
+from animations import fade_in
+from utils import cached_icon, PhaseTimer
 from theme_manager import ThemeManager
-import qtawesome as qta
+from execution_manager import ExecutionManager
+from debug_manager import DebugManager
+from debug_panel import DebugPanel
+from batch_manager import BatchManager
+from batch_results import BatchResultsPanel
+from batch import BatchJob, collect_scripts
+from profiler_panel import ProfilerPanel
+from profiling import ProfileData, RunRecord, format_bytes
+import cli
+from kernel_manager import KernelManager
+from variable_explorer import VariableExplorer
+from terminal import TerminalWidget
+import settings
+import file_io
 
 class LAEFEXExecutor(QMainWindow):
-    def __init__(self):
+    startup_finished = pyqtSignal()
+
+    def __init__(self, startup_timer=None):
         super().__init__()
+        self.startup_timer = startup_timer or PhaseTimer()
+        self._first_paint_seen = False
+        self.deferred_icons = []  # (button, qtawesome name, color), set after the first paint
         self.setWindowTitle("LAEFEX - Version 1.1.0")
         self.setGeometry(100, 100, 1000, 700)
         self.bin_folder = os.path.join(os.path.dirname(__file__), 'bin')
         if not os.path.exists(self.bin_folder):
             os.makedirs(self.bin_folder)
-        self.load_fonts()
         self.theme_manager = ThemeManager(self.bin_folder)
+        self.execution_manager = ExecutionManager(self)
+        self.execution_manager.output_received.connect(self.handle_process_output)
+        self.execution_manager.finished.connect(self.handle_process_finished)
+        self._run_temp_path = None
+        self._run_profile_path = None  # cProfile stats of the current run, when profiling
+        self._run_name = None
+        self.debugger = DebugManager(self)
+        self.debugger.execution.output_received.connect(self.handle_process_output)
+        self.debugger.stopped.connect(self.handle_debug_stopped)
+        self.debugger.resumed.connect(self.handle_debug_resumed)
+        self.debugger.finished.connect(self.handle_debug_finished)
+        self._debug_temp_path = None
+        self._debug_editor = None  # Editor being debugged, and the path the program knows it by
+        self._debug_path = None
+        self.batch_manager = BatchManager(self)
+        self.batch_manager.job_started.connect(self.handle_batch_job)
+        self.batch_manager.job_finished.connect(self.handle_batch_job)
+        self.batch_manager.finished.connect(self.handle_batch_finished)
+        self._batch_temp_paths = []
+        self.kernel = KernelManager(self)
+        self.kernel.output_received.connect(self.handle_process_output)
+        self.kernel.execution_finished.connect(self.handle_kernel_finished)
+        self.workspace = Workspace(os.path.join(self.bin_folder, 'cache', 'index'), self)
+        self.workspace.index_updated.connect(self.handle_index_updated)
+        self.workspace.index_failed.connect(
+            lambda error: self.status_bar.showMessage(f"Indexing failed: {error}", 5000))
+        self.startup_timer.mark('window')
         self.setup_ui()
+        self.startup_timer.mark('setup_ui')
+        self.kernel.namespace_received.connect(
+            lambda reply: self.variable_explorer.handle_reply(reply, self.kernel))
+        self.debugger.namespace_received.connect(
+            lambda reply: self.variable_explorer.handle_reply(reply, self.debugger))
         self.fade_in_main_window()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_seen:
+            self._first_paint_seen = True
+            self.startup_timer.mark('first paint')
+            # Fonts and icons are not needed for the first frame
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        self.load_fonts()
+        self.startup_timer.mark('fonts')
+        self.load_icons()
+        self.startup_timer.mark('icons')
+        self.startup_finished.emit()
+
+    def load_icons(self):
+        cache_dir = os.path.join(self.bin_folder, 'cache', 'icons')
+        for button, name, color in self.deferred_icons:
+            button.setIcon(cached_icon(name, color, cache_dir))
+        self.deferred_icons.clear()
+
     def load_fonts(self):
         # Load fonts from bin/fonts
         fonts_dir = os.path.join(self.bin_folder, 'fonts')
@@ -67,26 +153,17 @@ class LAEFEXExecutor(QMainWindow):
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
         self.tab_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.tab_widget.setStyleSheet("""
-            QTabBar::tab {
-                background: #2d2d2d;
-                color: #ffffff;
-                padding: 10px;
-            }
-            QTabBar::tab:selected {
-                background: #3d3d3d;
-            }
-            QTabWidget::pane {
-                border: none;
-            }
-        """)
+        self.tab_widget.setObjectName("EditorTabs")  # Styled by the theme
+        # Background tabs are suspended and rebuilt when activated
+        self.tab_manager = TabManager(self.tab_widget, self.create_editor, self)
 
         # Add Dashboard Tab
         dashboard = Dashboard()
         index = self.tab_widget.addTab(dashboard, "Dashboard")
         self.tab_widget.setCurrentIndex(index)
+        fade_in(dashboard, duration=1000)
 
-        self.new_tab()
+        self.new_tab(animate=False)
 
         # Add tab widget to main layout
         main_layout.addWidget(self.tab_widget)
@@ -94,17 +171,19 @@ class LAEFEXExecutor(QMainWindow):
         self.setCentralWidget(central_widget)
 
         # Variable Explorer Dock
-        self.variable_explorer = QTreeWidget()
-        self.variable_explorer.setHeaderLabels(['Variable', 'Type', 'Value'])
+        # Filled from the kernel's namespace after each kernel run
+        self.variable_explorer = VariableExplorer()
+        self.variable_explorer.set_source(self.kernel.request_namespace, self.kernel)
         variable_dock = QDockWidget("Variable Explorer", self)
         variable_dock.setWidget(self.variable_explorer)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, variable_dock)
 
-        # Integrated Terminal
-        self.terminal = QPlainTextEdit()
-        self.terminal.setReadOnly(True)
-        self.terminal.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-        self.terminal.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
+        # Integrated Terminal; keystrokes go to the running script
+        self.terminal = TerminalWidget()
+        for manager in (self.execution_manager, self.debugger.execution):
+            # Ignored by whichever is not running
+            self.terminal.input_entered.connect(manager.send_input)
+            self.terminal.interrupt_requested.connect(manager.interrupt)
         terminal_dock = QDockWidget("Terminal", self)
         terminal_dock.setWidget(self.terminal)
         terminal_dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea)
@@ -112,21 +191,68 @@ class LAEFEXExecutor(QMainWindow):
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, terminal_dock)
         self.terminal_dock = terminal_dock  # Keep a reference
 
+        # Debugger
+        # Step buttons and the call stack; the selected frame's locals go to the Variable Explorer
+        self.debug_panel = DebugPanel()
+        self.debug_panel.resume_requested.connect(self.debug_step)
+        self.debug_panel.stop_requested.connect(self.debugger.stop)
+        self.debug_panel.frame_selected.connect(self.show_debug_frame)
+        self.debug_dock = QDockWidget("Debugger", self)
+        self.debug_dock.setWidget(self.debug_panel)
+        self.debug_dock.hide()
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.debug_dock)
+
+        # Profiler
+        # Cost of every run, with hot functions and a flame graph for profiled ones
+        self.profiler_panel = ProfilerPanel()
+        self.profiler_dock = QDockWidget("Profiler", self)
+        self.profiler_dock.setWidget(self.profiler_panel)
+        self.profiler_dock.hide()
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.profiler_dock)
+
+        # Batch Results
+        self.batch_results = BatchResultsPanel()
+        self.batch_dock = QDockWidget("Batch Results", self)
+        self.batch_dock.setWidget(self.batch_results)
+        self.batch_dock.hide()
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.batch_dock)
+
         # Apply default theme
-        self.apply_theme('dark')  # Set your default theme here
+        self.theme_manager.theme_changed.connect(self.apply_editor_theme)
+        self.theme_manager.apply_theme('dark', self, quiet=True)  # Set your default theme here
 
         # Status Bar
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self.theme_manager.reload_failed.connect(
+            lambda error: self.status_bar.showMessage(f"Theme not reloaded: {error}", 5000))
 
         # Shortcuts
         new_tab_shortcut = QShortcut(QKeySequence("Ctrl+T"), self)
         new_tab_shortcut.activated.connect(self.new_tab)
         close_tab_shortcut = QShortcut(QKeySequence("Ctrl+W"), self)
         close_tab_shortcut.activated.connect(self.close_current_tab)
+        run_kernel_shortcut = QShortcut(QKeySequence("Ctrl+Return"), self)
+        run_kernel_shortcut.activated.connect(self.run_in_kernel)
+        open_shortcut = QShortcut(QKeySequence("Ctrl+O"), self)
+        open_shortcut.activated.connect(self.open_file_dialog)
+        save_shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
+        save_shortcut.activated.connect(self.save_file)
+        save_as_shortcut = QShortcut(QKeySequence("Ctrl+Shift+S"), self)
+        save_as_shortcut.activated.connect(self.save_file_as)
+        open_folder_shortcut = QShortcut(QKeySequence("Ctrl+Shift+O"), self)
+        open_folder_shortcut.activated.connect(self.open_folder_dialog)
+        symbol_search_shortcut = QShortcut(QKeySequence("Ctrl+P"), self)
+        symbol_search_shortcut.activated.connect(self.show_symbol_search)
+        debug_shortcut = QShortcut(QKeySequence("F5"), self)
+        debug_shortcut.activated.connect(self.debug_code)
+        for key, op in (("F10", 'next'), ("F11", 'step'), ("Shift+F11", 'return')):
+            step_shortcut = QShortcut(QKeySequence(key), self)
+            step_shortcut.activated.connect(lambda op=op: self.debug_step(op))
 
     def fade_in_main_window(self):
-        fade_in_widget(self, duration=1500)
+        # Through windowOpacity, which costs nothing once the fade is over
+        fade_in(self, duration=1500)
 
     def create_tool_bar(self):
         # Create custom toolbar
@@ -136,69 +262,99 @@ class LAEFEXExecutor(QMainWindow):
         tool_bar_layout.setSpacing(10)
 
         self.tool_bar.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.tool_bar.setStyleSheet("background-color: #252525;")
+        self.tool_bar.setObjectName("ToolBar")  # Styled by the theme, buttons included
+
+        # Open Button
+        open_button = QPushButton()
+        self.deferred_icons.append((open_button, 'fa.folder-open', 'white'))
+        open_button.setFixedSize(40, 40)
+        open_button.setToolTip("Open File (Ctrl+O)")
+        open_button.clicked.connect(self.open_file_dialog)
+        tool_bar_layout.addWidget(open_button)
+
+        # Open Folder Button
+        folder_button = QPushButton()
+        self.deferred_icons.append((folder_button, 'fa.folder', 'white'))
+        folder_button.setFixedSize(40, 40)
+        folder_button.setToolTip("Open Folder (Ctrl+Shift+O)")
+        folder_button.clicked.connect(self.open_folder_dialog)
+        tool_bar_layout.addWidget(folder_button)
+
+        # Save Button
+        save_button = QPushButton()
+        self.deferred_icons.append((save_button, 'fa.save', 'white'))
+        save_button.setFixedSize(40, 40)
+        save_button.setToolTip("Save File (Ctrl+S)")
+        save_button.clicked.connect(self.save_file)
+        tool_bar_layout.addWidget(save_button)
 
         # Run Button
-        run_icon = qta.icon('fa.play', color='green')
-        run_button = QPushButton(run_icon, "")
+        run_button = QPushButton()
+        self.deferred_icons.append((run_button, 'fa.play', 'green'))
         run_button.setFixedSize(40, 40)
         run_button.setToolTip("Run Code")
-        run_button.setStyleSheet(self.button_style())
         run_button.clicked.connect(self.run_code)
         tool_bar_layout.addWidget(run_button)
 
+        # Run Batch Button
+        batch_button = QPushButton()
+        self.deferred_icons.append((batch_button, 'fa.tasks', 'green'))
+        batch_button.setFixedSize(40, 40)
+        batch_button.setToolTip("Run Batch")
+        batch_button.clicked.connect(self.open_batch_menu)
+        tool_bar_layout.addWidget(batch_button)
+
+        # Run in Kernel Button
+        kernel_button = QPushButton()
+        self.deferred_icons.append((kernel_button, 'fa.bolt', 'yellow'))
+        kernel_button.setFixedSize(40, 40)
+        kernel_button.setToolTip("Run Selection or Cell in Kernel (Ctrl+Return)")
+        kernel_button.clicked.connect(self.run_in_kernel)
+        tool_bar_layout.addWidget(kernel_button)
+
+        # Restart Kernel Button
+        restart_button = QPushButton()
+        self.deferred_icons.append((restart_button, 'fa.refresh', 'white'))
+        restart_button.setFixedSize(40, 40)
+        restart_button.setToolTip("Restart Kernel")
+        restart_button.clicked.connect(self.restart_kernel)
+        tool_bar_layout.addWidget(restart_button)
+
         # Debug Button
-        debug_icon = qta.icon('fa.bug', color='orange')
-        debug_button = QPushButton(debug_icon, "")
+        debug_button = QPushButton()
+        self.deferred_icons.append((debug_button, 'fa.bug', 'orange'))
         debug_button.setFixedSize(40, 40)
         debug_button.setToolTip("Debug Code")
-        debug_button.setStyleSheet(self.button_style())
         debug_button.clicked.connect(self.debug_code)
         tool_bar_layout.addWidget(debug_button)
 
         # Stop Button
-        stop_icon = qta.icon('fa.stop', color='red')
-        stop_button = QPushButton(stop_icon, "")
+        stop_button = QPushButton()
+        self.deferred_icons.append((stop_button, 'fa.stop', 'red'))
         stop_button.setFixedSize(40, 40)
         stop_button.setToolTip("Stop Execution")
-        stop_button.setStyleSheet(self.button_style())
         stop_button.clicked.connect(self.stop_code)
         tool_bar_layout.addWidget(stop_button)
 
         # Settings Button
-        settings_icon = qta.icon('fa.cog', color='white')
-        settings_button = QPushButton(settings_icon, "")
+        settings_button = QPushButton()
+        self.deferred_icons.append((settings_button, 'fa.cog', 'white'))
         settings_button.setFixedSize(40, 40)
         settings_button.setToolTip("Settings")
-        settings_button.setStyleSheet(self.button_style())
         settings_button.clicked.connect(self.open_settings_menu)
         tool_bar_layout.addWidget(settings_button)
 
         # Toggle Terminal Button
-        terminal_icon = qta.icon('fa.terminal', color='white')
-        terminal_button = QPushButton(terminal_icon, "")
+        terminal_button = QPushButton()
+        self.deferred_icons.append((terminal_button, 'fa.terminal', 'white'))
         terminal_button.setFixedSize(40, 40)
         terminal_button.setToolTip("Toggle Terminal")
-        terminal_button.setStyleSheet(self.button_style())
         terminal_button.clicked.connect(self.toggle_terminal_visibility)
         tool_bar_layout.addWidget(terminal_button)
 
         # Spacer
         tool_bar_layout.addStretch()
 
-    def button_style(self):
-        return """
-            QPushButton {
-                background-color: #2d2d2d;
-                color: #ffffff;
-                border: none;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background-color: #3d3d3d;
-            }
-        """
-
     def open_settings_menu(self):
         # Create a simple settings menu
         menu = QMenu()
@@ -210,6 +366,34 @@ class LAEFEXExecutor(QMainWindow):
         change_font_action.triggered.connect(self.change_font)
         menu.addAction(change_font_action)
 
+        motion_action = QAction("Reduce Motion", self)
+        motion_action.setCheckable(True)
+        motion_action.setChecked(settings.value('ui/reduced_motion'))
+        motion_action.toggled.connect(lambda checked: settings.set_value('ui/reduced_motion', checked))
+        menu.addAction(motion_action)
+
+        log_action = QAction("Save Terminal Logs to Disk", self)
+        log_action.setCheckable(True)
+        log_action.setChecked(settings.value('terminal/log_to_disk'))
+        log_action.toggled.connect(lambda checked: settings.set_value('terminal/log_to_disk', checked))
+        menu.addAction(log_action)
+
+        interactive_action = QAction("Run Scripts in an Interactive Terminal", self)
+        interactive_action.setCheckable(True)
+        interactive_action.setChecked(settings.value('run/interactive'))
+        interactive_action.toggled.connect(lambda checked: settings.set_value('run/interactive', checked))
+        menu.addAction(interactive_action)
+
+        profile_action = QAction("Profile Runs with cProfile", self)
+        profile_action.setCheckable(True)
+        profile_action.setChecked(settings.value('run/profile'))
+        profile_action.toggled.connect(lambda checked: settings.set_value('run/profile', checked))
+        menu.addAction(profile_action)
+
+        profiler_action = QAction("Show Profiler", self)
+        profiler_action.triggered.connect(self.profiler_dock.show)
+        menu.addAction(profiler_action)
+
         # Position the menu under the settings button
         sender = self.sender()
         if sender:
@@ -218,14 +402,43 @@ class LAEFEXExecutor(QMainWindow):
     def apply_theme(self, theme_name):
         self.theme_manager.apply_theme(theme_name, self)
 
-    def new_tab(self):
-        # Create a new code editor
+    def apply_editor_theme(self, theme, changed):
+        # Editors in background tabs catch up when they are shown
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, CodeEditor):
+                widget.apply_theme(changed)
+
+    def create_editor(self):
+        # Also used to rebuild a suspended tab's editor
         code_editor = CodeEditor()
-        fade_in_widget(code_editor, duration=800)
+        code_editor.document().modificationChanged.connect(lambda _: self.update_tab_title(code_editor))
+        code_editor.workspace = self.workspace
+        code_editor.open_location_requested.connect(self.open_location)
+        code_editor.breakpoint_signal.connect(lambda _line: self.send_breakpoints(code_editor))
+        return code_editor
+
+    def new_tab(self, animate=True):
+        # Create a new code editor
+        code_editor = self.create_editor()
 
         # Add to tab widget
         index = self.tab_widget.addTab(code_editor, "Untitled")
         self.tab_widget.setCurrentIndex(index)
+        if animate:
+            fade_in(code_editor, duration=800)
+        return code_editor
+
+    def update_tab_title(self, code_editor):
+        index = self.tab_widget.indexOf(code_editor)
+        if index < 0:
+            return
+        info = code_editor.file_info
+        title = os.path.basename(info.path) if info is not None else "Untitled"
+        if code_editor.document().isModified() and code_editor.loader is None:
+            title += " *"
+        self.tab_widget.setTabText(index, title)
+        self.tab_widget.setTabToolTip(index, info.path if info is not None else "")
 
     def close_tab(self, index):
         widget = self.tab_widget.widget(index)
@@ -234,6 +447,9 @@ class LAEFEXExecutor(QMainWindow):
             QMessageBox.warning(self, "Action Denied", "Cannot close the Dashboard tab.")
         else:
             self.tab_widget.removeTab(index)
+            if isinstance(widget, CodeEditor):
+                widget.shutdown()
+            widget.deleteLater()
 
     def close_current_tab(self):
         index = self.tab_widget.currentIndex()
@@ -246,50 +462,530 @@ class LAEFEXExecutor(QMainWindow):
             return current_widget
         return None
 
+    # --- File Actions ---
+    def open_file_dialog(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Open File", self.file_dialog_dir(),
+                                                "Python Files (*.py *.pyw);;All Files (*)")
+        for path in paths:
+            self.open_file(path)
+
+    def file_dialog_dir(self):
+        code_editor = self.get_current_code_editor()
+        if code_editor is not None and code_editor.file_info is not None:
+            return os.path.dirname(code_editor.file_info.path)
+        return self.workspace.root or os.getcwd()
+
+    def open_file(self, path):
+        path = os.path.abspath(path)
+        # Switch to the file if it is already open
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, (CodeEditor, SuspendedTab)) and widget.file_info is not None \
+                    and os.path.normcase(widget.file_info.path) == os.path.normcase(path):
+                # Activating a suspended tab replaces it with a new editor
+                self.tab_widget.setCurrentIndex(index)
+                return self.tab_widget.widget(index)
+
+        # An empty, untouched tab is reused
+        code_editor = self.get_current_code_editor()
+        created = code_editor is None or code_editor.file_info is not None \
+            or code_editor.document().isModified() or not code_editor.document().isEmpty()
+        if created:
+            code_editor = self.new_tab()
+        try:
+            loader = DocumentLoader(code_editor, path)
+        except OSError as e:
+            if created:
+                # No empty tab is left behind for a file that could not be opened
+                self.close_tab(self.tab_widget.indexOf(code_editor))
+            QMessageBox.critical(self, "Open File", f"Could not open {path}:\n{e}")
+            return None
+        code_editor.file_info = loader.info
+        loader.progress.connect(lambda done, total: self.status_bar.showMessage(
+            f"Loading {os.path.basename(path)}... {done * 100 // max(total, 1)}%"))
+        loader.finished.connect(lambda info: self.handle_file_loaded(code_editor, info))
+        loader.failed.connect(lambda error: self.handle_file_failed(code_editor, path, error))
+        self.update_tab_title(code_editor)
+        loader.start()
+        return code_editor
+
+    def open_location(self, path, line, column):
+        code_editor = self.open_file(path)
+        if code_editor is None:
+            return
+        if code_editor.loader is not None:
+            code_editor.loader.finished.connect(lambda info: code_editor.go_to(line, column))
+        else:
+            code_editor.go_to(line, column)
+        code_editor.setFocus()
+
+    def handle_file_loaded(self, code_editor, info):
+        self.update_tab_title(code_editor)
+        self.status_bar.showMessage(f"Opened {info.path} ({info.encoding})", 3000)
+
+    def handle_file_failed(self, code_editor, path, error):
+        # Keep what was read, but never save it over the file
+        code_editor.file_info = None
+        self.update_tab_title(code_editor)
+        QMessageBox.critical(self, "Open File", f"Could not read {path}:\n{error}")
+
+    def save_file(self):
+        code_editor = self.get_current_code_editor()
+        if code_editor is None:
+            return False
+        if code_editor.file_info is None:
+            return self.save_file_as()
+        return self.write_file(code_editor, code_editor.file_info.path)
+
+    def save_file_as(self):
+        code_editor = self.get_current_code_editor()
+        if code_editor is None:
+            return False
+        path, _ = QFileDialog.getSaveFileName(self, "Save File As", self.file_dialog_dir(),
+                                              "Python Files (*.py *.pyw);;All Files (*)")
+        if not path:
+            return False
+        return self.write_file(code_editor, path)
+
+    def write_file(self, code_editor, path):
+        if code_editor.loader is not None:
+            self.status_bar.showMessage("The file is still loading.", 3000)
+            return False
+        info = code_editor.file_info
+        encoding, newline = (info.encoding, info.newline) if info is not None else ('utf-8', '\n')
+        text = code_editor.toPlainText()
+        try:
+            try:
+                size = file_io.save_text(path, text, encoding, newline)
+            except UnicodeEncodeError as e:
+                # Text typed since opening does not fit the file's encoding;
+                # the file is only re-encoded if the user agrees
+                answer = QMessageBox.question(
+                    self, "Save File",
+                    f"{os.path.basename(path)} contains {e.object[e.start:e.end]!r}, which cannot be "
+                    f"saved as {encoding}.\n\nSave the file as UTF-8 instead?")
+                if answer != QMessageBox.StandardButton.Yes:
+                    self.status_bar.showMessage(f"Not saved: the text does not fit {encoding}", 3000)
+                    return False
+                encoding = 'utf-8'
+                size = file_io.save_text(path, text, encoding, newline)
+        except OSError as e:
+            QMessageBox.critical(self, "Save File", f"Could not save {path}:\n{e}")
+            return False
+        code_editor.file_info = file_io.FileInfo(os.path.abspath(path), size, encoding, newline,
+                                                 code_editor.blockCount())
+        code_editor.document().setModified(False)
+        # Saving under a new extension changes the language
+        lexer = lexer_for_filename(path)
+        if lexer is not code_editor.lexer:
+            code_editor.set_lexer(lexer)
+        self.update_tab_title(code_editor)
+        self.status_bar.showMessage(f"Saved {path} ({encoding})", 3000)
+        if self.workspace.contains(path):
+            self.workspace.refresh()
+        return True
+
+    # --- Workspace ---
+    def open_folder_dialog(self):
+        root = QFileDialog.getExistingDirectory(self, "Open Folder", self.file_dialog_dir())
+        if root:
+            self.workspace.open_folder(root)
+            self.status_bar.showMessage(f"Indexing {root}...")
+
+    def handle_index_updated(self, stats):
+        if stats.parsed or stats.removed:
+            self.status_bar.showMessage(
+                f"Indexed {stats.parsed} of {stats.files} files in {stats.elapsed:.2f}s", 3000)
+
+    def show_symbol_search(self):
+        dialog = SymbolSearchDialog(self.workspace, self)
+        dialog.location_selected.connect(self.open_location)
+        dialog.exec()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # Files may have been changed by other programs in the meantime
+        if event.type() == QEvent.Type.ActivationChange and self.isActiveWindow():
+            self.workspace.refresh()
+
     def run_code(self):
         code_editor = self.get_current_code_editor()
         if code_editor:
-            code = code_editor.editor.toPlainText()
-            self.terminal.clear()
+            if self.execution_manager.is_running() or self.debugger.is_running():
+                self.status_bar.showMessage("A script is already running.", 3000)
+                return
+            if code_editor.loader is not None:
+                self.status_bar.showMessage("The file is still loading.", 3000)
+                return
+            self.terminal.start_session()
 
-            # Write the code to a temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
-                tmp_file.write(code)
-                tmp_file_path = tmp_file.name
+            path, cwd, self._run_temp_path = self.script_for_editor(code_editor)
+            self._run_name = self.tab_widget.tabText(self.tab_widget.indexOf(code_editor)).rstrip(' *')
+            if settings.value('run/profile'):
+                import tempfile
+                handle, self._run_profile_path = tempfile.mkstemp(suffix='.prof')
+                os.close(handle)
 
-            # Execute the code in a subprocess
-            import subprocess
+            # Execute the code in a subprocess without blocking the event loop
+            interactive = settings.value('run/interactive')
             try:
-                result = subprocess.run(
-                    [sys.executable, tmp_file_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                output = result.stdout
-                errors = result.stderr
-
-                if output:
-                    self.terminal.appendPlainText(output)
-                if errors:
-                    self.terminal.appendPlainText(errors)
-                # Show terminal if there is output
-                if output or errors:
-                    self.terminal_dock.show()
-                # Since subprocess runs in a separate process, we cannot update the variable explorer
-                self.variable_explorer.clear()
+                self.execution_manager.run_file(path, cwd=cwd, profile_path=self._run_profile_path,
+                                                interactive=interactive,
+                                                terminal_size=self.terminal.terminal_size())
             except Exception as e:
                 self.terminal.appendPlainText(str(e))
                 self.terminal_dock.show()
-            finally:
-                os.remove(tmp_file_path)  # Clean up the temporary file
+                self.remove_run_temp_file()
+                self.take_run_profile()
+                return
+            self.terminal.set_interactive(interactive)
+            self.status_bar.showMessage("Running...")
+
+    def script_for_editor(self, code_editor):
+        # (path, cwd, temporary file or None) to run code_editor's code from
+        info = code_editor.file_info
+        if info is not None and not code_editor.document().isModified():
+            # Saved and unchanged: run the file itself, from its folder
+            return info.path, os.path.dirname(info.path), None
+        # Write the code to a temporary file; it is removed once the process finishes
+        import tempfile
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
+            tmp_file.write(code_editor.toPlainText())
+        return tmp_file.name, None, tmp_file.name
 
+    # --- Batch Runs ---
+    def open_batch_menu(self):
+        menu = QMenu()
+        tabs_action = QAction("Run All Open Tabs", self)
+        tabs_action.triggered.connect(self.run_batch_tabs)
+        menu.addAction(tabs_action)
+        files_action = QAction("Run Files...", self)
+        files_action.triggered.connect(self.run_batch_files)
+        menu.addAction(files_action)
+        folder_action = QAction("Run Folder...", self)
+        folder_action.triggered.connect(self.run_batch_folder)
+        menu.addAction(folder_action)
+        sender = self.sender()
+        if sender:
+            menu.exec(sender.mapToGlobal(QPoint(0, sender.height())))
+
+    def run_batch_tabs(self):
+        if self.batch_manager.is_running():
+            self.status_bar.showMessage("A batch is already running.", 3000)
+            return
+        import tempfile
+        jobs = []
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            # Suspended tabs run from their snapshot, without being rebuilt
+            if isinstance(widget, SuspendedTab):
+                modified, text = widget.snapshot.modified, widget.snapshot.text
+            elif isinstance(widget, CodeEditor) and widget.loader is None:
+                modified, text = widget.document().isModified(), widget.toPlainText
+            else:
+                continue
+            info = widget.file_info
+            name = self.tab_widget.tabText(index)
+            if info is not None and not modified:
+                jobs.append(BatchJob(info.path, name))
+                continue
+            code = text()
+            if not code.strip():
+                continue
+            # Unsaved code runs from a temporary file, like run_code
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
+                tmp_file.write(code)
+            self._batch_temp_paths.append(tmp_file.name)
+            jobs.append(BatchJob(tmp_file.name, name, cwd=os.path.dirname(info.path) if info else os.getcwd()))
+        self.run_batch(jobs)
+
+    def run_batch_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Run Files", self.file_dialog_dir(),
+                                                "Python Files (*.py);;All Files (*)")
+        if paths:
+            self.run_batch([BatchJob(path) for path in paths])
+
+    def run_batch_folder(self):
+        root = QFileDialog.getExistingDirectory(self, "Run Folder", self.file_dialog_dir())
+        if root:
+            self.run_batch([BatchJob(path) for path in collect_scripts([root])])
+
+    def run_batch(self, jobs):
+        if self.batch_manager.is_running():
+            self.status_bar.showMessage("A batch is already running.", 3000)
+            return
+        if not jobs:
+            self.status_bar.showMessage("Nothing to run.", 3000)
+            return
+        self.batch_results.set_jobs(jobs)
+        self.batch_dock.show()
+        memory_limit = settings.value('batch/memory_limit')
+        self.batch_manager.run(jobs, settings.value('batch/workers'), settings.value('batch/timeout'),
+                               memory_limit * 1024 * 1024)
+        self.status_bar.showMessage(f"Running {len(jobs)} scripts...")
+
+    def handle_batch_job(self, job):
+        self.batch_results.update_job(job)
+
+    def handle_batch_finished(self):
+        self.remove_batch_temp_files()
+        self.status_bar.showMessage(f"Batch finished: {self.batch_results.summary_label.text()}")
+
+    def remove_batch_temp_files(self):
+        for path in self._batch_temp_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._batch_temp_paths.clear()
+
+    def handle_process_output(self, stream, text):
+        # Queued and drawn by the terminal once per frame
+        self.terminal.append_output(stream, text)
+        if not self.terminal_dock.isVisible():
+            self.terminal_dock.show()
+
+    def handle_process_finished(self, result):
+        self.terminal.set_interactive(False)
+        profile = self.take_run_profile()
+        self.remove_run_temp_file()
+        self.profiler_panel.add_run(RunRecord(self._run_name, result, profile))
+        if profile is not None:
+            self.profiler_dock.show()
+        if result.cancelled:
+            message = f"Execution stopped after {result.wall_time:.2f}s"
+        else:
+            message = f"Process finished with exit code {result.exit_code} in {result.wall_time:.2f}s"
+        if result.cpu_time is not None:
+            message += f" (CPU {result.cpu_time:.2f}s, peak memory {format_bytes(result.peak_rss)})"
+        if self.terminal.log_path:
+            message += f" (log: {self.terminal.log_path})"
+        self.terminal.close_log()
+        self.status_bar.showMessage(message)
+
+    def run_in_kernel(self):
+        # Run the selection (or the current "# %%" cell) in the persistent kernel
+        code_editor = self.get_current_code_editor()
+        if code_editor is None:
+            return
+        if self.kernel.is_busy():
+            self.status_bar.showMessage("The kernel is busy.", 3000)
+            return
+        code = code_editor.selected_or_cell_code()
+        if not code.strip():
+            return
+        self.kernel.execute(code)
+        self.status_bar.showMessage("Running in kernel...")
+
+    def handle_kernel_finished(self, reply):
+        status = reply.get('status')
+        if status == 'dead':
+            self.status_bar.showMessage(f"Kernel died (exit code {reply.get('exit_code')})")
+            if self.variable_explorer.source is self.kernel:
+                self.variable_explorer.clear()
+            return
+        if status == 'ok':
+            message = f"Kernel run finished in {reply['wall_time']:.2f}s (CPU {reply['cpu_time']:.2f}s)"
+        else:
+            message = f"Kernel run failed: {reply.get('error', 'see terminal')}"
+        self.status_bar.showMessage(message)
+        # A debug session that owns the explorer keeps it
+        if self.variable_explorer.source is self.kernel:
+            self.variable_explorer.refresh()
+
+    def restart_kernel(self):
+        if self.variable_explorer.source is self.kernel:
+            self.variable_explorer.clear()
+        self.kernel.restart()
+        self.status_bar.showMessage("Restarting kernel...", 3000)
+
+    def take_run_profile(self):
+        # Loads and removes the run's stats file. The stats are missing when
+        # the run was stopped before the script ended.
+        if self._run_profile_path is None:
+            return None
+        try:
+            return ProfileData.load(self._run_profile_path)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        finally:
+            try:
+                os.remove(self._run_profile_path)
+            except OSError:
+                pass
+            self._run_profile_path = None
+
+    def remove_run_temp_file(self):
+        if self._run_temp_path:
+            try:
+                os.remove(self._run_temp_path)
+            except OSError:
+                pass
+            self._run_temp_path = None
+
+    # --- Debugging ---
     def debug_code(self):
-        QMessageBox.information(self, "Debug", "Debugging not implemented yet.")
+        if self.debugger.is_running():
+            # F5 while paused goes on to the next breakpoint
+            self.debug_step('continue')
+            return
+        code_editor = self.get_current_code_editor()
+        if code_editor is None:
+            return
+        if self.execution_manager.is_running():
+            self.status_bar.showMessage("A script is already running.", 3000)
+            return
+        if code_editor.loader is not None:
+            self.status_bar.showMessage("The file is still loading.", 3000)
+            return
+        self.terminal.start_session('debug')
+        path, cwd, self._debug_temp_path = self.script_for_editor(code_editor)
+        self._debug_editor, self._debug_path = code_editor, path
+        interactive = settings.value('run/interactive')
+        try:
+            self.debugger.start(path, self.collect_breakpoints(), cwd=cwd, interactive=interactive,
+                                terminal_size=self.terminal.terminal_size())
+        except Exception as e:
+            self.terminal.appendPlainText(str(e))
+            self.terminal_dock.show()
+            self.remove_debug_temp_file()
+            self._debug_editor = self._debug_path = None
+            return
+        self.terminal.set_interactive(interactive)
+        self.debug_panel.set_running()
+        self.debug_dock.show()
+        self.status_bar.showMessage("Debugging...")
+
+    def debug_step(self, op):
+        if self.debugger.is_paused():
+            self.debugger.resume(op)
+
+    def debug_path_of(self, widget):
+        # The file the debugged program knows widget's code by
+        if widget is self._debug_editor:
+            return self._debug_path
+        return widget.file_info.path if widget.file_info is not None else None
+
+    def collect_breakpoints(self):
+        # {path: 1-based lines} over all tabs, suspended ones included
+        breakpoints = {}
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, CodeEditor):
+                lines = widget.breakpoints
+            elif isinstance(widget, SuspendedTab):
+                lines = widget.snapshot.breakpoints
+            else:
+                continue
+            path = self.debug_path_of(widget)
+            if lines and path is not None:
+                breakpoints[path] = [line + 1 for line in lines]
+        return breakpoints
+
+    def send_breakpoints(self, code_editor):
+        # Breakpoints toggled during a session apply right away
+        path = self.debug_path_of(code_editor)
+        if path is not None:
+            self.debugger.set_breakpoints(path, [line + 1 for line in code_editor.breakpoints])
+
+    def editor_for_debug_path(self, path):
+        # Tabs are compared by identity: the debugged editor may have been
+        # suspended, or closed, since the session started
+        for index in range(self.tab_widget.count()):
+            if self.tab_widget.widget(index) is self._debug_editor:
+                if os.path.normcase(path) == os.path.normcase(self._debug_path):
+                    self.tab_widget.setCurrentIndex(index)
+                    return self._debug_editor
+                break
+        if not os.path.isfile(path):
+            return None
+        return self.open_file(path)
+
+    def clear_debug_line(self):
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, CodeEditor) and widget.debug_line is not None:
+                widget.set_debug_line(None)
+
+    def show_debug_frame(self, index):
+        stack = self.debugger.stack
+        if not stack or not 0 <= index < len(stack):
+            return
+        frame = stack[index]
+        self.clear_debug_line()
+        code_editor = self.editor_for_debug_path(frame['path'])
+        if code_editor is not None:
+            line = frame['line']
+            if code_editor.loader is not None:
+                code_editor.loader.finished.connect(lambda info: self.mark_debug_line(code_editor, line))
+            else:
+                self.mark_debug_line(code_editor, line)
+        self.variable_explorer.set_source(
+            lambda path, offset, limit: self.debugger.request_namespace(index, path, offset, limit),
+            self.debugger)
+
+    def mark_debug_line(self, code_editor, line):
+        code_editor.go_to(line)
+        code_editor.set_debug_line(line)
+
+    def handle_debug_stopped(self, message):
+        self.debug_panel.show_stop(message)
+        self.debug_dock.show()
+        self.show_debug_frame(0)
+        if message['reason'] == 'exception':
+            self.status_bar.showMessage(f"Stopped on an uncaught exception: {message['error']}")
+        elif message['stack']:
+            frame = message['stack'][0]
+            self.status_bar.showMessage(f"Paused at {os.path.basename(frame['path'])}:{frame['line']}")
+
+    def handle_debug_resumed(self):
+        self.clear_debug_line()
+        # The stopped frames' locals are gone
+        self.variable_explorer.set_source(None)
+        self.debug_panel.set_running()
+        self.status_bar.showMessage("Debugging...")
+
+    def handle_debug_finished(self, result):
+        self.terminal.set_interactive(False)
+        self.clear_debug_line()
+        self.remove_debug_temp_file()
+        self._debug_editor = self._debug_path = None
+        self.debug_panel.clear()
+        # Back to the kernel's namespace
+        self.variable_explorer.set_source(self.kernel.request_namespace, self.kernel)
+        if result.cancelled:
+            message = f"Debugging stopped after {result.wall_time:.2f}s"
+        else:
+            message = f"Debugged process finished with exit code {result.exit_code} in {result.wall_time:.2f}s"
+        if self.terminal.log_path:
+            message += f" (log: {self.terminal.log_path})"
+        self.terminal.close_log()
+        self.status_bar.showMessage(message)
+
+    def remove_debug_temp_file(self):
+        if self._debug_temp_path:
+            try:
+                os.remove(self._debug_temp_path)
+            except OSError:
+                pass
+            self._debug_temp_path = None
 
     def stop_code(self):
-        QMessageBox.information(self, "Stop", "Stopping code not implemented yet.")
+        if self.kernel.is_busy():
+            # Interrupt the cell but keep the kernel's state
+            self.status_bar.showMessage("Interrupting kernel...")
+            self.kernel.interrupt()
+        elif self.execution_manager.is_running():
+            self.status_bar.showMessage("Stopping...")
+            self.execution_manager.stop()
+        elif self.debugger.is_running():
+            self.status_bar.showMessage("Stopping...")
+            self.debugger.stop()
+        elif self.batch_manager.is_running():
+            self.status_bar.showMessage("Stopping batch...")
+            self.batch_manager.stop()
+        else:
+            self.status_bar.showMessage("No script is running.", 3000)
 
     def toggle_terminal_visibility(self):
         if self.terminal_dock.isVisible():
@@ -300,7 +996,9 @@ class LAEFEXExecutor(QMainWindow):
     # --- Settings Actions ---
     def change_theme(self):
         themes = self.theme_manager.get_available_themes()
-        theme, ok = QInputDialog.getItem(self, "Select Theme", "Theme:", themes, 0, False)
+        current = self.theme_manager.current
+        index = themes.index(current.name) if current is not None and current.name in themes else 0
+        theme, ok = QInputDialog.getItem(self, "Select Theme", "Theme:", themes, index, False)
         if ok and theme:
             self.apply_theme(theme)
 
@@ -309,13 +1007,42 @@ class LAEFEXExecutor(QMainWindow):
         if ok:
             self.setFont(font)
 
+    def closeEvent(self, event):
+        # Don't leave an orphaned child process behind
+        self.execution_manager.stop(grace_period=0)
+        self.debugger.stop(grace_period=0)
+        self.batch_manager.stop()
+        self.kernel.shutdown()
+        self.workspace.close()
+        super().closeEvent(event)
+
     # --- Help Actions ---
     def show_about(self):
         QMessageBox.information(self, "About LAEFEX",
                                 "LAEFEX Version 1.1.0\n\nA powerful Python code editor and executor.")
 
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = LAEFEXExecutor()
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] and argv[0] in cli.COMMANDS:
+        return cli.main(argv)
+
+    parser = argparse.ArgumentParser(prog='laefex')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print how long each startup phase took and exit after the first paint")
+    args, qt_args = parser.parse_known_args(argv)
+
+    timer = PhaseTimer(start=_START)
+    timer.mark('imports')
+    app = QApplication(sys.argv[:1] + qt_args)
+    timer.mark('QApplication')
+    window = LAEFEXExecutor(startup_timer=timer)
     window.show()
-    sys.exit(app.exec())
+    timer.mark('show')
+    if args.profile_startup:
+        window.startup_finished.connect(timer.report)
+        window.startup_finished.connect(app.quit)
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# minimap.py
+#
+# Code overview on the right of a CodeEditor. Every line is one pixel row pair
+# and every character one pixel column, coloured from the tokens the
+# highlighter already cached on the block (BlockData). Rows are rendered into
+# QImage tiles of TILE_LINES lines. A paint only re-renders the rows whose
+# block changed since they were drawn, so typing costs one row, not a redraw.
+
+import re
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QColor, QImage, QPainter
+from PyQt6.QtCore import Qt, QPoint, QRect, QSize
+
+from syntax_highlighter import BlockData, shared_formats, shared_colors
+
+LINE_HEIGHT = 2  # Pixels per line
+CHAR_WIDTH = 1  # Pixels per character
+MAX_COLUMNS = 120  # Characters drawn per line
+PADDING = 4
+TILE_LINES = 128
+MAX_TILES = 48  # Tiles kept in memory, least recently shown are dropped first
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def summarize(text, tokens):
+    # Downsampled line: one (column, length, kind) run per word, coloured by
+    # the token the word starts in (kind None for plain text)
+    runs = []
+    index = 0
+    for match in _WORD_RE.finditer(text, 0, MAX_COLUMNS):
+        start = match.start()
+        while index < len(tokens) and tokens[index][0] + tokens[index][1] <= start:
+            index += 1
+        kind = tokens[index][2] if index < len(tokens) and tokens[index][0] <= start else None
+        runs.append((start, match.end() - start, kind))
+    return tuple(runs)
+
+
+def block_summary(block):
+    # Cached on the block's BlockData, so it is computed once per highlight.
+    # Blocks a large file's background pass has not reached yet are drawn as
+    # plain text.
+    data = block.userData()
+    if isinstance(data, BlockData) and data.revision == block.revision():
+        if data.minimap is None:
+            data.minimap = summarize(block.text(), data.tokens)
+        return data.minimap
+    return summarize(block.text(), ())
+
+
+def row_key(block):
+    # What a row is drawn from: the block's BlockData (replaced whenever the
+    # block is re-highlighted), or its revision while it has none
+    data = block.userData()
+    if isinstance(data, BlockData) and data.revision == block.revision():
+        return data
+    return block.revision()
+
+
+class _Tile:
+    __slots__ = ('image', 'keys')
+
+    def __init__(self):
+        self.image = QImage(Minimap.WIDTH, TILE_LINES * LINE_HEIGHT, QImage.Format.Format_RGB32)
+        self.image.fill(shared_colors()['minimap-background'])
+        # row_key() of the block each row was drawn from; None for blank rows
+        self.keys = [None] * TILE_LINES
+
+
+class Minimap(QWidget):
+    WIDTH = PADDING * 2 + MAX_COLUMNS * CHAR_WIDTH
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.setObjectName("Minimap")
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.tiles = OrderedDict()  # Tile index -> _Tile
+        self.line_count = editor.document().blockCount()
+        self._refreshed = None  # Lines and highlighter the tiles on screen were checked for
+        self.colors = {}
+        self.update_colors()
+
+        editor.document().contentsChange.connect(self.handle_contents_change)
+        # Scrolling, edits, re-highlighting and the cursor blink all come
+        # through here; a paint is cheap when no row changed
+        editor.updateRequest.connect(lambda rect, dy: self.update())
+
+    def sizeHint(self):
+        return QSize(self.WIDTH, 0)
+
+    def update_colors(self):
+        colors = shared_colors()
+        self.background = colors['minimap-background']
+        self.viewport_color = colors['minimap-viewport']
+        formats = shared_formats()[0]
+        self.colors = {kind: QColor(fmt.foreground().color()) for kind, fmt in formats.items()}
+        self.colors[None] = colors['minimap-text']
+
+    def apply_theme(self):
+        # Every tile is drawn again, in the new colors
+        self.update_colors()
+        self.tiles.clear()
+        self._refreshed = None
+        self.update()
+
+    def map_range(self):
+        # First line shown and the number of rows that fit. The map scrolls in
+        # proportion to the editor once the file is taller than the widget.
+        rows = self.height() // LINE_HEIGHT + 1
+        bar = self.editor.verticalScrollBar()
+        fraction = bar.value() / bar.maximum() if bar.maximum() > 0 else 0.0
+        return int(round(max(self.line_count - rows, 0) * fraction)), rows
+
+    # --- Painting ---
+    def paintEvent(self, event):
+        first, rows = self.map_range()
+        last = min(first + rows, self.line_count)
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), self.background)
+        if last > first:
+            # Rows only change when their block is highlighted again, so
+            # after an edit or scroll every row on screen is checked, and
+            # otherwise only the rows highlighted since the last paint
+            highlighter = self.editor.highlighter
+            highlighted = highlighter.take_highlighted_range()
+            state = (first, last, highlighter)
+            shown = range(first // TILE_LINES, (last - 1) // TILE_LINES + 1)
+            if state != self._refreshed or any(index not in self.tiles for index in shown):
+                self.refresh(first, last)
+                self._refreshed = state
+            elif highlighted is not None and highlighted[0] < last and highlighted[1] >= first:
+                self.refresh(max(first, highlighted[0]), min(last, highlighted[1] + 1))
+            for index in shown:
+                y = (index * TILE_LINES - first) * LINE_HEIGHT
+                painter.drawImage(0, y, self.tiles[index].image)
+
+        # The part of the file the editor shows
+        top = self.editor.firstVisibleBlock().blockNumber()
+        viewport = self.editor.viewport()
+        bottom = self.editor.cursorForPosition(QPoint(0, viewport.height() - 1)).blockNumber()
+        painter.fillRect(QRect(0, (top - first) * LINE_HEIGHT, self.width(),
+                               (bottom - top + 1) * LINE_HEIGHT), self.viewport_color)
+        painter.end()
+
+    def refresh(self, first, last):
+        # Brings the tiles for lines first .. last - 1 up to date, drawing only
+        # the rows whose block changed
+        block = self.editor.document().findBlockByNumber(first)
+        line = first
+        while line < last:
+            index = line // TILE_LINES
+            tile = self.tile(index)
+            painter = None
+            end = min((index + 1) * TILE_LINES, last)
+            keys = tile.keys
+            while line < end and block.isValid():
+                row = line - index * TILE_LINES
+                # Identity with the BlockData drawn last time is the fast path
+                if keys[row] is None or block.userData() is not keys[row]:
+                    key = row_key(block)
+                    if key != keys[row]:
+                        if painter is None:
+                            painter = QPainter(tile.image)
+                        self.draw_row(painter, row, block)
+                        keys[row] = key
+                block = block.next()
+                line += 1
+            if painter is not None:
+                painter.end()
+            line = end
+
+    def draw_row(self, painter, row, block):
+        y = row * LINE_HEIGHT
+        painter.fillRect(0, y, self.WIDTH, LINE_HEIGHT, self.background)
+        for column, length, kind in block_summary(block):
+            length = min(length, MAX_COLUMNS - column)
+            painter.fillRect(PADDING + column * CHAR_WIDTH, y, length * CHAR_WIDTH, LINE_HEIGHT,
+                             self.colors.get(kind, self.colors[None]))
+
+    def tile(self, index):
+        tile = self.tiles.get(index)
+        if tile is None:
+            tile = self.tiles[index] = _Tile()
+            while len(self.tiles) > MAX_TILES:
+                self.tiles.popitem(last=False)
+        else:
+            self.tiles.move_to_end(index)
+        return tile
+
+    # --- Edits ---
+    def handle_contents_change(self, position, chars_removed, chars_added):
+        # Edited rows are redrawn by the next paint anyway, since they are
+        # highlighted again. When lines were added or removed, the rows below
+        # the edit are moved by blitting the tiles on screen; tiles off screen
+        # are dropped and rebuilt if they are shown again.
+        document = self.editor.document()
+        delta = document.blockCount() - self.line_count
+        self.line_count = document.blockCount()
+        if delta == 0 or not self.tiles:
+            return
+        self._refreshed = None
+        first = document.findBlock(position).blockNumber()
+        # Qt can report one character past the end (e.g. for setPlainText())
+        new_last = document.findBlock(min(position + chars_added, document.characterCount() - 1)).blockNumber()
+        shown, rows = self.map_range()
+        old_tiles = self.tiles
+        self.tiles = OrderedDict()
+        for index in range(shown // TILE_LINES, (shown + rows) // TILE_LINES + 1):
+            start = index * TILE_LINES
+            if start >= self.line_count:
+                break
+            tile = _Tile()
+            painter = QPainter(tile.image)
+            self._copy_lines(painter, tile, old_tiles, start, min(first, start + TILE_LINES), 0)
+            self._copy_lines(painter, tile, old_tiles, max(new_last + 1, start), start + TILE_LINES, delta)
+            painter.end()
+            self.tiles[index] = tile
+
+    @staticmethod
+    def _copy_lines(painter, tile, old_tiles, begin, end, shift):
+        # Copies lines begin .. end - 1 of tile from the old tiles, where they
+        # were shift lines higher up
+        line = begin
+        while line < end:
+            old_line = line - shift
+            if old_line < 0:
+                line = shift
+                continue
+            old_index = old_line // TILE_LINES
+            old_row = old_line - old_index * TILE_LINES
+            count = min(end - line, TILE_LINES - old_row)
+            old = old_tiles.get(old_index)
+            if old is not None:
+                tile_start = line % TILE_LINES
+                source = QRect(0, old_row * LINE_HEIGHT, Minimap.WIDTH, count * LINE_HEIGHT)
+                painter.drawImage(QPoint(0, tile_start * LINE_HEIGHT), old.image, source)
+                tile.keys[tile_start:tile_start + count] = old.keys[old_row:old_row + count]
+            line += count
+
+    # --- Navigation ---
+    def mousePressEvent(self, event):
+        self.scroll_to(event.position().y())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.scroll_to(event.position().y())
+
+    def scroll_to(self, y):
+        # Centres the editor on the line under the mouse
+        first, _ = self.map_range()
+        line = min(max(first + int(y) // LINE_HEIGHT, 0), self.line_count - 1)
+        block = self.editor.document().findBlockByNumber(line)
+        bar = self.editor.verticalScrollBar()
+        # The scroll bar counts layout lines; collapsed blocks have none
+        bar.setValue(block.firstLineNumber() - bar.pageStep() // 2)
@@ -0,0 +1,224 @@
+# profiler_panel.py
+
+import time
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QSplitter, QTabWidget, QTableWidget, QTableWidgetItem, QScrollArea,
+    QAbstractItemView, QHeaderView, QToolTip
+)
+from PyQt6.QtGui import QColor, QPainter, QFontMetrics
+from PyQt6.QtCore import Qt, QRectF, QSize
+
+from profiling import RunHistory, format_bytes, label_hue
+
+RECORD_ROLE = Qt.ItemDataRole.UserRole
+HOT_FUNCTION_LIMIT = 500
+HISTORY_COLUMNS = ['Run', 'Script', 'Exit Code', 'Wall (s)', 'vs. Previous', 'CPU (s)', 'Peak RSS', 'Profile']
+FUNCTION_COLUMNS = ['Function', 'Calls', 'Self (ms)', 'Cumulative (ms)', 'Self %']
+
+
+class SortableItem(QTableWidgetItem):
+    # Compares by a value other than the text (sizes, percentages, "-")
+    def __init__(self, text, value):
+        super().__init__(text)
+        self.value = value
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, SortableItem):
+            return (self.value is None, self.value or 0) < (other.value is None, other.value or 0)
+        return super().__lt__(other)
+
+
+def table(columns):
+    widget = QTableWidget(0, len(columns))
+    widget.setHorizontalHeaderLabels(columns)
+    widget.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+    widget.verticalHeader().hide()
+    widget.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    widget.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    widget.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    widget.setSortingEnabled(True)
+    return widget
+
+
+class FlameGraphView(QWidget):
+    # Icicle-style flame graph: callers above callees, widths proportional
+    # to time. Clicking a frame zooms into it, clicking the top row or
+    # double-clicking zooms back out.
+    ROW_HEIGHT = 18
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.root = None
+        self.focus = None
+        self._frames = []  # (QRectF, FlameNode) from the last paint, for hit tests
+
+    def set_root(self, root):
+        self.root = self.focus = root
+        self.update_height()
+
+    def update_height(self):
+        depth = self.focus.depth() if self.focus is not None else 0
+        self.setMinimumHeight(depth * self.ROW_HEIGHT)
+        self.updateGeometry()
+        self.update()
+
+    def sizeHint(self):
+        return QSize(400, 200)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#1e1e1e'))
+        self._frames = []
+        if self.focus is None or self.focus.value <= 0:
+            painter.setPen(QColor('#808080'))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Profile a run to see where its time went.")
+            return
+        metrics = QFontMetrics(self.font())
+        scale = self.width() / self.focus.value
+        clip = QRectF(event.rect())
+        stack = [(self.focus, 0.0, 0)]
+        while stack:
+            node, x, depth = stack.pop()
+            rect = QRectF(x, depth * self.ROW_HEIGHT, node.value * scale, self.ROW_HEIGHT - 1)
+            if rect.width() < 1:
+                continue
+            child_x = x
+            for child in node.children:
+                stack.append((child, child_x, depth + 1))
+                child_x += child.value * scale
+            if not rect.intersects(clip):
+                continue
+            self._frames.append((rect, node))
+            color = QColor.fromHsv(label_hue(node.label) % 60, 160, 220) if node.key else QColor('#606060')
+            painter.fillRect(rect.adjusted(0, 0, -1, 0), color)
+            if rect.width() > 30:
+                painter.setPen(QColor('#000000'))
+                text = metrics.elidedText(node.label, Qt.TextElideMode.ElideRight, int(rect.width()) - 6)
+                painter.drawText(rect.adjusted(3, 0, -3, 0),
+                                 Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, text)
+
+    def frame_at(self, position):
+        for rect, node in self._frames:
+            if rect.contains(position):
+                return node
+        return None
+
+    def mouseMoveEvent(self, event):
+        node = self.frame_at(event.position())
+        if node is None:
+            QToolTip.hideText()
+            return
+        share = node.value / self.root.value * 100 if self.root.value else 0
+        QToolTip.showText(event.globalPosition().toPoint(),
+                          f"{node.label}\n{node.value * 1000:.1f} ms ({share:.1f}%)", self)
+
+    def mousePressEvent(self, event):
+        node = self.frame_at(event.position())
+        if node is None:
+            return
+        self.focus = self.root if node is self.focus else node
+        self.update_height()
+
+    def mouseDoubleClickEvent(self, event):
+        self.focus = self.root
+        self.update_height()
+
+
+class ProfilerPanel(QWidget):
+    # History of runs with their cost, and the hot functions and flame graph
+    # of the selected run when it was profiled
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.history = RunHistory()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+
+        self.history_table = table(HISTORY_COLUMNS)
+        self.history_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        self.history_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        # Newest run first until another column is picked
+        self.history_table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.DescendingOrder)
+        self.history_table.itemSelectionChanged.connect(self.show_selected_run)
+        splitter.addWidget(self.history_table)
+
+        self.views = QTabWidget()
+        self.function_table = table(FUNCTION_COLUMNS)
+        self.views.addTab(self.function_table, "Hot Functions")
+        self.flame_graph = FlameGraphView()
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.flame_graph)
+        self.views.addTab(scroll, "Flame Graph")
+        splitter.addWidget(self.views)
+        layout.addWidget(splitter)
+
+    def add_run(self, record):
+        self.history.add(record)
+        result = record.result
+        previous = self.history.previous(record)
+        change = None
+        if previous is not None and previous.result.wall_time > 0:
+            change = (result.wall_time / previous.result.wall_time - 1) * 100
+
+        table_widget = self.history_table
+        table_widget.setSortingEnabled(False)
+        # Rows of records that fell out of the history go first
+        kept = {other.id for other in self.history.records}
+        for row in reversed(range(table_widget.rowCount())):
+            if table_widget.item(row, 0).data(RECORD_ROLE).id not in kept:
+                table_widget.removeRow(row)
+        row = table_widget.rowCount()
+        table_widget.insertRow(row)
+        run_item = SortableItem(f"{record.id}  {time.strftime('%H:%M:%S', time.localtime(record.finished))}",
+                                record.id)
+        run_item.setData(RECORD_ROLE, record)
+        run_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        table_widget.setItem(row, 0, run_item)
+        table_widget.setItem(row, 1, QTableWidgetItem(record.name))
+        table_widget.setItem(row, 2, SortableItem(str(result.exit_code), result.exit_code))
+        table_widget.setItem(row, 3, SortableItem(f"{result.wall_time:.3f}", result.wall_time))
+        change_item = SortableItem(f"{change:+.1f}%" if change is not None else '-', change)
+        if change is not None:
+            change_item.setForeground(QColor('#f48771' if change > 0 else '#4ec9b0'))
+        table_widget.setItem(row, 4, change_item)
+        cpu_text = f"{result.cpu_time:.3f}" if result.cpu_time is not None else '-'
+        table_widget.setItem(row, 5, SortableItem(cpu_text, result.cpu_time))
+        table_widget.setItem(row, 6, SortableItem(format_bytes(result.peak_rss), result.peak_rss))
+        table_widget.setItem(row, 7, QTableWidgetItem("yes" if record.profile is not None else ""))
+        table_widget.setSortingEnabled(True)
+        table_widget.selectRow(table_widget.row(run_item))
+
+    def show_selected_run(self):
+        row = self.history_table.currentRow()
+        record = self.history_table.item(row, 0).data(RECORD_ROLE) if row >= 0 else None
+        profile = record.profile if record is not None else None
+        self.show_functions(profile)
+        self.flame_graph.set_root(profile.flame_graph() if profile is not None else None)
+
+    def show_functions(self, profile):
+        table_widget = self.function_table
+        table_widget.setSortingEnabled(False)
+        table_widget.setRowCount(0)
+        if profile is None:
+            return
+        functions = profile.hot_functions(HOT_FUNCTION_LIMIT)
+        total = profile.total_time or 1
+        table_widget.setRowCount(len(functions))
+        for row, function in enumerate(functions):
+            name_item = QTableWidgetItem(function.label)
+            name_item.setToolTip(f"{function.key[0]}:{function.key[1]}")
+            table_widget.setItem(row, 0, name_item)
+            calls = (f"{function.calls}/{function.primitive_calls}"
+                     if function.calls != function.primitive_calls else str(function.calls))
+            table_widget.setItem(row, 1, SortableItem(calls, function.calls))
+            table_widget.setItem(row, 2, SortableItem(f"{function.self_time * 1000:.2f}", function.self_time))
+            table_widget.setItem(row, 3, SortableItem(f"{function.cumulative_time * 1000:.2f}",
+                                                      function.cumulative_time))
+            share = function.self_time / total * 100
+            table_widget.setItem(row, 4, SortableItem(f"{share:.1f}", share))
+        table_widget.setSortingEnabled(True)
+        table_widget.sortItems(2, Qt.SortOrder.DescendingOrder)
@@ -0,0 +1,151 @@
+# profiling.py
+#
+# Qt-free side of run profiling. A RunRecord keeps what one execution cost
+# (wall and CPU time, peak RSS) and, when the run was profiled, the cProfile
+# statistics the child dumped. Those are offered as a flat table of functions
+# and as a call tree for a flame graph. cProfile only records caller ->
+# callee edges, not whole stacks, so the tree splits a function's time
+# between its callers' subtrees in proportion to those edges, as gprof-style
+# tools do.
+
+import itertools
+import os
+import pstats
+import time
+import zlib
+
+MAX_HISTORY = 50  # Runs kept; older ones are dropped
+FLAME_MAX_DEPTH = 64
+FLAME_MIN_FRACTION = 0.002  # Flame nodes with less of the total time are left out
+
+
+def function_label(key):
+    filename, line, name = key
+    if filename == '~':
+        return name  # Built-ins, e.g. <built-in method builtins.print>
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def label_hue(label):
+    # Stable across sessions, unlike hash()
+    return zlib.crc32(label.encode('utf-8')) % 360
+
+
+def format_bytes(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class FunctionStats:
+    def __init__(self, key, calls, primitive_calls, self_time, cumulative_time):
+        self.key = key
+        self.label = function_label(key)
+        self.calls = calls
+        self.primitive_calls = primitive_calls  # Calls that were not recursive
+        self.self_time = self_time
+        self.cumulative_time = cumulative_time
+
+    def __repr__(self):
+        return (f"FunctionStats(label={self.label!r}, calls={self.calls!r}, "
+                f"self_time={self.self_time:.6f}, cumulative_time={self.cumulative_time:.6f})")
+
+
+class FlameNode:
+    def __init__(self, key, label, value):
+        self.key = key  # pstats function key, None for the root
+        self.label = label
+        self.value = value  # Seconds
+        self.children = []
+
+    def depth(self):
+        return 1 + max((child.depth() for child in self.children), default=0)
+
+
+class ProfileData:
+    def __init__(self, stats):
+        # stats is pstats.Stats.stats: {key: (primitive calls, calls, self
+        # time, cumulative time, {caller key: (calls, primitive calls, self
+        # time, cumulative time)})}
+        self.stats = stats
+        self.functions = [FunctionStats(key, calls, primitive, self_time, cumulative)
+                          for key, (primitive, calls, self_time, cumulative, _) in stats.items()]
+        self.total_time = sum(function.self_time for function in self.functions)
+        self._flame = None
+
+    @classmethod
+    def load(cls, path):
+        # Raises OSError, or EOFError/ValueError for an incomplete file
+        return cls(pstats.Stats(path).stats)
+
+    def hot_functions(self, limit=None):
+        functions = sorted(self.functions, key=lambda function: function.self_time, reverse=True)
+        return functions[:limit] if limit else functions
+
+    def flame_graph(self):
+        if self._flame is None:
+            self._flame = self._build_flame_graph()
+        return self._flame
+
+    def _build_flame_graph(self):
+        callees = {key: {} for key in self.stats}
+        roots = []
+        for key, (_, _, _, cumulative, callers) in self.stats.items():
+            if not callers:
+                roots.append((key, cumulative))
+            for caller, edge in callers.items():
+                callees.setdefault(caller, {})[key] = edge[3]
+
+        root = FlameNode(None, 'all', sum(value for _, value in roots) or self.total_time)
+        minimum = root.value * FLAME_MIN_FRACTION
+
+        def build(key, value, depth, path):
+            node = FlameNode(key, function_label(key), value)
+            cumulative = self.stats[key][3] if key in self.stats else 0
+            if depth >= FLAME_MAX_DEPTH or cumulative <= 0:
+                return node
+            # This node's share of everything the function spent in callees
+            share = min(1.0, value / cumulative)
+            edges = sorted(callees.get(key, {}).items(), key=lambda item: item[1], reverse=True)
+            for callee, edge_time in edges:
+                child_value = edge_time * share
+                if child_value < minimum or callee in path:  # Recursion is folded into the first frame
+                    continue
+                node.children.append(build(callee, child_value, depth + 1, path | {callee}))
+            return node
+
+        for key, value in sorted(roots, key=lambda item: item[1], reverse=True):
+            if value >= minimum:
+                root.children.append(build(key, value, 1, frozenset([key])))
+        return root
+
+
+class RunRecord:
+    _ids = itertools.count(1)
+
+    def __init__(self, name, result, profile=None):
+        self.id = next(RunRecord._ids)
+        self.name = name
+        self.finished = time.time()
+        self.result = result  # ExecutionResult
+        self.profile = profile  # ProfileData, or None if the run was not profiled
+
+
+class RunHistory:
+    def __init__(self, limit=MAX_HISTORY):
+        self.limit = limit
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+        del self.records[:-self.limit]
+
+    def previous(self, record):
+        # The last earlier run of the same script, to compare against
+        for other in reversed(self.records):
+            if other.id < record.id and other.name == record.name:
+                return other
+        return None
@@ -0,0 +1,102 @@
+# search.py
+#
+# Qt-free find/replace engine. Matches are computed in one pass over the
+# whole text and returned as (start, end) ranges in document positions, which
+# count UTF-16 code units like QTextDocument does.
+
+import bisect
+import re
+
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+class SearchQuery:
+    def __init__(self, pattern, regex=False, case_sensitive=False, whole_word=False):
+        self.pattern = pattern
+        self.regex = regex
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+
+    def compile(self):
+        # Raises re.error for an invalid regular expression
+        source = self.pattern if self.regex else re.escape(self.pattern)
+        if self.whole_word:
+            source = rf'(?<!\w)(?:{source})(?!\w)'
+        flags = re.MULTILINE
+        if not self.case_sensitive:
+            flags |= re.IGNORECASE
+        return re.compile(source, flags)
+
+    def expand(self, match, replacement):
+        # Regex replacements may refer to groups (\1, \g<name>)
+        return match.expand(replacement) if self.regex else replacement
+
+    def __eq__(self, other):
+        return isinstance(other, SearchQuery) and vars(self) == vars(other)
+
+
+class DocumentOffsets:
+    # Converts Python string indices to QTextDocument positions. Characters
+    # outside the BMP take two UTF-16 units, so every index after one shifts.
+    def __init__(self, text):
+        self.astral = [] if text.isascii() else [m.start() for m in _ASTRAL_RE.finditer(text)]
+
+    def __call__(self, index):
+        if not self.astral:
+            return index
+        return index + bisect.bisect_left(self.astral, index)
+
+
+def find_all(text, query):
+    # Every match as a (start, end) document range, in order
+    if not query.pattern:
+        return []
+    offsets = DocumentOffsets(text)
+    return [(offsets(m.start()), offsets(m.end())) for m in query.compile().finditer(text)]
+
+
+def replace_all(text, query, replacement):
+    # Returns (start, end, new_text, count): the document range spanning the
+    # first to the last match and what replaces it, so the caller can apply
+    # every replacement as one edit. start is None when nothing matched.
+    if not query.pattern:
+        return None, None, '', 0
+    pattern = query.compile()
+    first = pattern.search(text)
+    if first is None:
+        return None, None, '', 0
+    if not query.regex:
+        replacement = replacement.replace('\\', r'\\')  # Taken literally by subn
+    new_text, count = pattern.subn(replacement, text)
+    # Everything before the first match is unchanged and so is a common
+    # suffix; only the span in between is handed back
+    start = first.start()
+    suffix = common_suffix_length(text, new_text, min(len(text), len(new_text)) - start)
+    offsets = DocumentOffsets(text)
+    return offsets(start), offsets(len(text) - suffix), new_text[start:len(new_text) - suffix], count
+
+
+def common_suffix_length(a, b, limit):
+    # Binary search on slice comparisons, which run at C speed
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def match_at_or_after(matches, position):
+    # Index of the first match starting at or after position, or len(matches)
+    return bisect.bisect_left(matches, (position, -1))
+
+
+def matches_in_range(matches, start, end):
+    # Slice of the matches that overlap [start, end)
+    first = bisect.bisect_left(matches, (start, -1))
+    if first > 0 and matches[first - 1][1] > start:
+        first -= 1
+    last = bisect.bisect_left(matches, (end, -1))
+    return matches[first:last]
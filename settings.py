@@ -0,0 +1,53 @@
+# settings.py
+
+import os
+import tempfile
+
+from PyQt6.QtCore import QSettings
+
+# Tunables that users may override through QSettings (LAEFEX/LAEFEX)
+DEFAULTS = {
+    # Above this many lines the editor highlights lazily around the viewport
+    'editor/large_file_lines': 20000,
+    # Show a minimap to the right of each editor
+    'editor/minimap': True,
+    # Skip fade-in animations (reduced motion, or a slow machine)
+    'ui/reduced_motion': False,
+    # Lines kept in the terminal; older output is discarded
+    'terminal/max_lines': 10000,
+    # Also write the full output of every run to a log file in log_dir
+    'terminal/log_to_disk': False,
+    'terminal/log_dir': os.path.join(tempfile.gettempdir(), 'laefex-logs'),
+    # Documents longer than this (in characters) are searched on a background thread
+    'search/background_chars': 1000000,
+    # Worker processes that parse a project folder's files for the symbol index
+    'index/processes': min(4, os.cpu_count() or 1),
+    # Run scripts under cProfile and show the result in the Profiler dock
+    'run/profile': False,
+    # Give scripts a terminal (a pseudo-terminal on POSIX) that the terminal
+    # pane sends keystrokes to, so input() works. A pseudo-terminal merges
+    # stderr into stdout, so tracebacks are then no longer shown in red.
+    'run/interactive': False,
+    # Scripts a batch runs at once, and the limits each one runs under (0 for none)
+    'batch/workers': os.cpu_count() or 1,
+    'batch/timeout': 0,  # Seconds
+    'batch/memory_limit': 0,  # MB
+    # Editors kept alive; the least recently used tabs beyond this are
+    # suspended to their text and rebuilt when activated (0 keeps them all)
+    'tabs/live_editors': 8,
+    # Undo steps a suspended tab keeps
+    'tabs/undo_checkpoints': 50,
+}
+
+
+def _settings():
+    return QSettings('LAEFEX', 'LAEFEX')
+
+
+def value(key):
+    default = DEFAULTS[key]
+    return _settings().value(key, default, type=type(default))
+
+
+def set_value(key, new_value):
+    _settings().setValue(key, new_value)
@@ -0,0 +1,271 @@
+# symbol_index.py
+#
+# Qt-free, on-disk index of the classes, functions and module-level names of
+# every Python file in a project folder. The index is a SQLite database kept
+# next to the other caches. update() stats the folder, compares each file's
+# mtime and size with what was indexed and parses only the files that
+# changed, spreading them over a process pool when there are many. Lookups go
+# through SQLite's B-tree indexes on the (lower-cased) names, so they do not
+# grow with the size of the project.
+
+import ast
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCHEMA_VERSION = 1
+SOURCE_EXTENSIONS = ('.py', '.pyw')
+SKIPPED_DIRS = {'__pycache__', 'node_modules', 'site-packages', 'venv', 'env', 'build', 'dist'}
+MAX_FILE_SIZE = 4 * 1024 * 1024  # Bytes; larger files are usually generated
+POOL_THRESHOLD = 32  # Fewer changed files than this are parsed without a pool
+BATCH_SIZE = 64  # Files parsed and committed together
+
+_SCHEMA = '''
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    module TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE symbols (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    folded TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    container TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    column INTEGER NOT NULL
+);
+CREATE INDEX symbols_folded ON symbols(folded);
+CREATE INDEX symbols_file ON symbols(file_id);
+'''
+
+
+class Symbol:
+    def __init__(self, name, kind, path, line, column, container=''):
+        self.name = name
+        self.kind = kind  # 'class', 'function', 'method' or 'variable'
+        self.path = path  # None for the editor's own, unsaved buffer
+        self.line = line  # 1-based, like ast
+        self.column = column
+        self.container = container  # Dotted name of the enclosing classes
+
+    def __repr__(self):
+        return (f"Symbol(name={self.name!r}, kind={self.kind!r}, path={self.path!r}, "
+                f"line={self.line!r}, column={self.column!r}, container={self.container!r})")
+
+
+class IndexStats:
+    def __init__(self, files, parsed, removed, elapsed):
+        self.files = files
+        self.parsed = parsed
+        self.removed = removed
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"IndexStats(files={self.files!r}, parsed={self.parsed!r}, "
+                f"removed={self.removed!r}, elapsed={self.elapsed:.3f})")
+
+
+# --- Parsing ---
+def module_symbols(tree, path=None):
+    # Definitions at module level and in class bodies; names local to
+    # functions are left to jedi
+    symbols = []
+
+    def visit(body, container):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                symbols.append(Symbol(node.name, 'class', path, node.lineno, node.col_offset, container))
+                visit(node.body, f'{container}.{node.name}' if container else node.name)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = 'method' if container else 'function'
+                symbols.append(Symbol(node.name, kind, path, node.lineno, node.col_offset, container))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        symbols.append(Symbol(target.id, 'variable', path, target.lineno,
+                                              target.col_offset, container))
+            elif isinstance(node, (ast.If, ast.Try)):
+                # Definitions guarded by a version check or an ImportError
+                visit(node.body, container)
+                visit(node.orelse, container)
+
+    visit(tree.body, '')
+    return symbols
+
+
+def parse_file(path):
+    # Runs in the pool's worker processes. Returns the rows to store for
+    # path; a file that does not parse is stored without symbols, so it is
+    # not parsed again until it changes.
+    try:
+        with open(path, 'rb') as file:
+            source = file.read()
+        tree = ast.parse(source, path)
+    except (OSError, SyntaxError, ValueError):
+        return path, []
+    return path, [(s.name, s.kind, s.container, s.line, s.column) for s in module_symbols(tree)]
+
+
+def module_name(root, path):
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    if parts[-1] == '__init__' and len(parts) > 1:
+        parts.pop()
+    return '.'.join(parts)
+
+
+def scan_sources(root):
+    # {path: (mtime in ns, size)} of the project's source files
+    sources = {}
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIPPED_DIRS]
+        for name in files:
+            if not name.endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size <= MAX_FILE_SIZE:
+                sources[path] = (stat.st_mtime_ns, stat.st_size)
+    return sources
+
+
+def database_path(cache_dir, root):
+    # One database per project folder
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{os.path.basename(os.path.abspath(root)) or "root"}-{digest}.sqlite3')
+
+
+# --- Index ---
+class SymbolIndex:
+    # SQLite connections belong to the thread that opened them, so the
+    # thread updating the index opens its own SymbolIndex on the same file
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._names = None  # See name_text()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        # Readers are never blocked by the thread updating the index
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            with self.connection:
+                self.connection.execute('DROP TABLE IF EXISTS symbols')
+                self.connection.execute('DROP TABLE IF EXISTS files')
+                self.connection.executescript(_SCHEMA)
+                self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        self.connection.close()
+
+    def invalidate(self, names=None):
+        # Called after another connection updated the database, with that
+        # connection's name_text() if it has one
+        self._names = names
+
+    def update(self, root, processes=1, stop=None):
+        # Brings the index in line with the files under root. stop is an
+        # optional threading.Event that ends the update between batches.
+        start = time.perf_counter()
+        self.invalidate()
+        root = os.path.abspath(root)
+        sources = scan_sources(root)
+        indexed = {path: (file_id, mtime, size)
+                   for file_id, path, mtime, size in self.connection.execute(
+                       'SELECT id, path, mtime, size FROM files')}
+        removed = [indexed[path][0] for path in indexed.keys() - sources.keys()]
+        changed = [path for path, stat in sources.items()
+                   if path not in indexed or indexed[path][1:] != stat]
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE id = ?', [(i,) for i in removed])
+
+        pool = None
+        if processes > 1 and len(changed) >= POOL_THRESHOLD:
+            # Not forked: the parent is a multi-threaded GUI process
+            pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+        parsed = 0
+        try:
+            for first in range(0, len(changed), BATCH_SIZE):
+                if stop is not None and stop.is_set():
+                    break
+                batch = changed[first:first + BATCH_SIZE]
+                results = pool.map(parse_file, batch, chunksize=8) if pool else map(parse_file, batch)
+                with self.connection:
+                    for path, rows in results:
+                        self._store(root, path, sources[path], rows)
+                parsed += len(batch)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return IndexStats(len(sources), parsed, len(removed), time.perf_counter() - start)
+
+    def _store(self, root, path, stat, rows):
+        self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+        file_id = self.connection.execute(
+            'INSERT INTO files (path, module, mtime, size) VALUES (?, ?, ?, ?)',
+            (path, module_name(root, path), stat[0], stat[1])).lastrowid
+        self.connection.executemany(
+            'INSERT INTO symbols (file_id, name, folded, kind, container, line, column) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(file_id, name, name.lower(), kind, container, line, column)
+             for name, kind, container, line, column in rows])
+
+    # --- Lookups ---
+    def complete(self, prefix, limit=50):
+        # Distinct names starting with prefix, ignoring case
+        folded = prefix.lower()
+        rows = self.connection.execute(
+            'SELECT DISTINCT name FROM symbols WHERE folded >= ? AND folded < ? ORDER BY folded LIMIT ?',
+            (folded, folded + '\uffff', limit))
+        return [name for name, in rows]
+
+    def definitions(self, name):
+        rows = self.connection.execute(
+            'SELECT name, kind, path, line, column, container FROM symbols '
+            'JOIN files ON files.id = symbols.file_id WHERE folded = ? AND name = ? '
+            'ORDER BY kind = \'variable\', path, line',
+            (name.lower(), name))
+        return [Symbol(*row) for row in rows]
+
+    def name_text(self):
+        # Every distinct lower-cased name on a line of its own. Substring
+        # search is a str.find() over this instead of a table scan.
+        if self._names is None:
+            names = self.connection.execute('SELECT DISTINCT folded FROM symbols')
+            self._names = '\n' + '\n'.join(folded for folded, in names) + '\n'
+        return self._names
+
+    def search(self, query, limit=100):
+        # Names starting with query first, then names containing it
+        folded = query.lower()
+        if not folded:
+            return []
+        columns = ('SELECT name, kind, path, line, column, container FROM symbols '
+                   'JOIN files ON files.id = symbols.file_id ')
+        rows = self.connection.execute(
+            columns + 'WHERE folded >= ? AND folded < ? ORDER BY length(name), folded LIMIT ?',
+            (folded, folded + '\uffff', limit)).fetchall()
+        if len(rows) < limit and len(folded) > 1 and '\n' not in folded:
+            text = self.name_text()
+            found = []
+            position = text.find(folded)
+            while position >= 0 and len(found) < limit - len(rows):
+                start = text.rfind('\n', 0, position) + 1
+                end = text.find('\n', position)
+                if position > start:  # Names starting with query are already in
+                    found.append(text[start:end])
+                position = text.find(folded, end)
+            if found:
+                rows += self.connection.execute(
+                    columns + f'WHERE folded IN ({", ".join("?" * len(found))}) LIMIT ?',
+                    (*found, limit - len(rows))).fetchall()
+        return [Symbol(*row) for row in rows]
@@ -0,0 +1,69 @@
+# symbol_search.py
+
+import os
+
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import Qt, pyqtSignal
+
+SYMBOL_ROLE = Qt.ItemDataRole.UserRole
+RESULT_LIMIT = 100
+
+
+class SymbolSearchDialog(QDialog):
+    # Workspace symbol search: every keystroke queries the symbol index and
+    # the chosen symbol is emitted as a location to open
+    location_selected = pyqtSignal(str, int, int)  # path, line (1-based), column
+
+    def __init__(self, workspace, parent=None):
+        super().__init__(parent)
+        self.workspace = workspace
+        self.setWindowTitle("Go to Symbol in Workspace")
+        self.resize(560, 400)
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Symbol name")
+        layout.addWidget(self.query_input)
+        self.results = QListWidget()
+        layout.addWidget(self.results)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.query_input.textChanged.connect(self.run_search)
+        self.query_input.returnPressed.connect(self.accept_current)
+        self.results.itemActivated.connect(self.accept_item)
+        self.run_search('')
+
+    def run_search(self, query):
+        self.results.clear()
+        if self.workspace.root is None:
+            self.status_label.setText("Open a folder to search its symbols.")
+            return
+        symbols = self.workspace.search(query.strip(), RESULT_LIMIT)
+        for symbol in symbols:
+            qualified = f"{symbol.container}.{symbol.name}" if symbol.container else symbol.name
+            where = os.path.relpath(symbol.path, self.workspace.root)
+            item = QListWidgetItem(f"{qualified}    {symbol.kind} · {where}:{symbol.line}")
+            item.setData(SYMBOL_ROLE, symbol)
+            self.results.addItem(item)
+        if symbols:
+            self.results.setCurrentRow(0)
+        self.status_label.setText(f"{len(symbols)}{'+' if len(symbols) == RESULT_LIMIT else ''} symbols"
+                                  if query.strip() else "")
+
+    def keyPressEvent(self, event):
+        # Up and Down move through the results while typing
+        if event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down):
+            self.results.keyPressEvent(event)
+            return
+        super().keyPressEvent(event)
+
+    def accept_current(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.accept_item(item)
+
+    def accept_item(self, item):
+        symbol = item.data(SYMBOL_ROLE)
+        self.accept()
+        self.location_selected.emit(symbol.path, symbol.line, symbol.column)
@@ -1,70 +1,385 @@
 # syntax_highlighter.py
+#
+# The one highlighting engine for all editors. Tokens come from the shared
+# lexers in lexers.py; formats are built once per process and updated in
+# place when the theme changes.
 
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-from PyQt6.QtCore import QRegularExpression
+import time
 
-class PythonHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
-        super().__init__(document)
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QTextBlockUserData, QTextLayout
+from PyQt6.QtCore import QObject, QTimer
+
+from analysis import SEVERITY_ERROR, SEVERITY_WARNING
+from lexers import get_lexer
+from brackets import summarize
+from theme import SYNTAX_KINDS, builtin_theme, group_variables, syntax_variable
+
+
+def utf16_offsets(text):
+    # Python indexes by code point while Qt indexes by UTF-16 unit. Returns a
+    # mapping table, or None when both agree (no characters outside the BMP).
+    if text.isascii() or not any(ord(c) > 0xFFFF for c in text):
+        return None
+    offsets = [0] * (len(text) + 1)
+    for i, c in enumerate(text):
+        offsets[i + 1] = offsets[i] + (2 if ord(c) > 0xFFFF else 1)
+    return offsets
+
+
+# --- Highlighting Formats ---
+_formats = None
+_colors = None
+
+
+def shared_formats():
+    # Built once per process and shared by every highlighter and document
+    global _formats
+    if _formats is None:
+        _formats = create_formats()
+    return _formats
+
+
+def shared_colors():
+    # Gutter, current line, bracket and minimap colors by theme variable,
+    # shared by every editor like the formats
+    global _colors
+    if _colors is None:
+        _colors = create_colors()
+    return _colors
+
+
+def set_theme(theme):
+    # Updated in place, since highlighters and editors keep references to
+    # the dicts. Editors still have to recolor what they already drew.
+    formats, diagnostic_formats = shared_formats()
+    new_formats, new_diagnostic_formats = create_formats(theme)
+    formats.update(new_formats)
+    diagnostic_formats.update(new_diagnostic_formats)
+    shared_colors().update(create_colors(theme))
+
+
+def create_formats(theme=None):
+    theme = theme or builtin_theme()
+
+    def char_format(name):
+        color, italic, bold = theme.style(name)
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(color))
+        fmt.setFontItalic(italic)
+        if bold:
+            fmt.setFontWeight(QFont.Weight.Bold)
+        return fmt
+
+    formats = {kind: char_format(syntax_variable(kind)) for kind in SYNTAX_KINDS}
+
+    diagnostic_formats = {}
+    for severity, name in ((SEVERITY_ERROR, 'diagnostic-error'), (SEVERITY_WARNING, 'diagnostic-warning')):
+        fmt = QTextCharFormat()
+        fmt.setUnderlineColor(QColor(theme.color(name)))
+        fmt.setUnderlineStyle(QTextCharFormat.UnderlineStyle.SpellCheckUnderline)
+        diagnostic_formats[severity] = fmt
+    return formats, diagnostic_formats
+
+
+def create_colors(theme=None):
+    theme = theme or builtin_theme()
+    return {name: QColor(theme.color(name)) for name in group_variables('gutter', 'editor', 'minimap')}
+
+
+# --- Block Data ---
+class BlockData(QTextBlockUserData):
+    # Tokenizer output cached on the block, along with what it was computed
+    # from: the incoming lexer state and the block's text revision. brackets
+    # is the block's entry in the bracket index (brackets.BlockBrackets);
+    # minimap is its minimap row, filled in when the row is first drawn.
+    def __init__(self, tokens, state_in, revision, generation=0, brackets=None):
+        super().__init__()
+        self.tokens = tokens
+        self.brackets = brackets
+        self.minimap = None
+        self.state_in = state_in
+        self.revision = revision
+        self.generation = generation
+
+
+# --- Diagnostics ---
+class DiagnosticsMixin:
+    # Diagnostics from the analysis worker, keyed by block number. Hosts
+    # provide document(), rehighlightBlock() and diagnostic_formats.
+    def set_diagnostics(self, diagnostics):
+        # Re-highlight only the blocks whose diagnostics actually changed
+        changed = [line for line in self.diagnostics.keys() | diagnostics.keys()
+                   if self.diagnostics.get(line) != diagnostics.get(line)]
+        self.diagnostics = diagnostics
+        document = self.document()
+        for line in sorted(changed):
+            block = document.findBlockByNumber(line)
+            if block.isValid():
+                self.rehighlightBlock(block)
+
+    def diagnostics_at(self, block_number, column):
+        return [message for start, end, message, _ in self.diagnostics.get(block_number, ())
+                if start <= column and (end is None or column < end)]
+
+    def diagnostic_ranges(self, block_number, text, offsets):
+        # Yields (start, end, format) in UTF-16 units, never empty
+        for start, end, _, severity in self.diagnostics.get(block_number, ()):
+            end = len(text) if end is None else min(end, len(text))
+            start = min(start, max(len(text) - 1, 0))
+            end = max(end, start + 1)
+            if offsets:
+                start, end = offsets[start], offsets[min(end, len(text))]
+            yield start, end, self.diagnostic_formats[severity]
+
+
+# --- Change Tracking ---
+class ChangeTrackingMixin:
+    # Remembers which blocks were (re)highlighted, so a view that caches the
+    # highlighting (the minimap) only re-checks those
+    highlighted_range = None
+
+    def mark_highlighted(self, number):
+        if self.highlighted_range is None:
+            self.highlighted_range = (number, number)
+        else:
+            low, high = self.highlighted_range
+            self.highlighted_range = (min(low, number), max(high, number))
 
-        self.highlighting_rules = []
-
-        # Keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor('#CC7832'))  # Orange color
-        keyword_patterns = [
-            r'\bdef\b', r'\bclass\b', r'\breturn\b', r'\bif\b', r'\belse\b',
-            r'\belif\b', r'\bwhile\b', r'\bfor\b', r'\bin\b', r'\bimport\b',
-            r'\bfrom\b', r'\bas\b', r'\bpass\b', r'\bbreak\b', r'\bcontinue\b',
-            r'\bTrue\b', r'\bFalse\b', r'\bNone\b', r'\band\b', r'\bor\b', r'\bnot\b',
-            r'\bprint\b', r'\blen\b', r'\braise\b', r'\bexcept\b', r'\btry\b', r'\bfinally\b'
-        ]
-        for pattern in keyword_patterns:
-            expression = QRegularExpression(pattern)
-            self.highlighting_rules.append((expression, keyword_format))
-
-        # Built-in functions
-        builtin_format = QTextCharFormat()
-        builtin_format.setForeground(QColor('#A9B7C6'))  # Light blue
-        builtin_patterns = [
-            r'\babs\b', r'\bdict\b', r'\bhelp\b', r'\bmin\b', r'\bsetattr\b',
-            r'\ball\b', r'\bdir\b', r'\bhex\b', r'\bnext\b', r'\bslice\b',
-            r'\bany\b', r'\bdivmod\b', r'\bid\b', r'\bobject\b', r'\bsorted\b',
-            r'\bascii\b', r'\benumerate\b', r'\binput\b', r'\boct\b', r'\bstaticmethod\b',
-            # Add more built-in functions as needed
-        ]
-        for pattern in builtin_patterns:
-            expression = QRegularExpression(pattern)
-            self.highlighting_rules.append((expression, builtin_format))
-
-        # Single-line comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor('#808080'))  # Gray color
-        comment_pattern = QRegularExpression(r'#.*')
-        self.highlighting_rules.append((comment_pattern, comment_format))
-
-        # Strings
-        string_format = QTextCharFormat()
-        string_format.setForeground(QColor('#6A8759'))  # Green color
-        string_patterns = [
-            QRegularExpression(r'"[^"\\]*(\\.[^"\\]*)*"'),
-            QRegularExpression(r"'[^'\\]*(\\.[^'\\]*)*'")
-        ]
-        for pattern in string_patterns:
-            self.highlighting_rules.append((pattern, string_format))
-
-        # Numbers
-        number_format = QTextCharFormat()
-        number_format.setForeground(QColor('#6897BB'))  # Blue color
-        number_pattern = QRegularExpression(r'\b[0-9]+\b')
-        self.highlighting_rules.append((number_pattern, number_format))
+    def take_highlighted_range(self):
+        # (first, last) block number highlighted since the last call, or None
+        highlighted, self.highlighted_range = self.highlighted_range, None
+        return highlighted
+
+
+# --- Syntax Highlighter ---
+class SyntaxHighlighter(DiagnosticsMixin, ChangeTrackingMixin, QSyntaxHighlighter):
+    def __init__(self, document, lexer=None):
+        super().__init__(document)
+        self.lexer = lexer or get_lexer('python')
+        self.formats, self.diagnostic_formats = shared_formats()
+        self.diagnostics = {}
+        self.recoloring = False
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.highlighting_rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                start = match.capturedStart()
-                length = match.capturedLength()
-                self.setFormat(start, length, fmt)
-        self.setCurrentBlockState(0)
+        # Qt only calls us again for the following block when the state we
+        # leave changes, so an edit re-highlights just the lines it affects.
+        block = self.currentBlock()
+        state_in = self.previousBlockState()
+        data = self.currentBlockUserData()
+        reuse = (self.recoloring and isinstance(data, BlockData)
+                 and data.state_in == state_in and data.revision == block.revision())
+        if reuse:
+            tokens, state = data.tokens, self.currentBlockState()
+        else:
+            tokens, state = self.lexer.tokenize(text, state_in)
+        offsets = utf16_offsets(text)
+        for start, length, kind in tokens:
+            if offsets:
+                start, length = offsets[start], offsets[start + length] - offsets[start]
+            self.setFormat(start, length, self.formats[kind])
+        if self.diagnostics:
+            for start, end, underline in self.diagnostic_ranges(block.blockNumber(), text, offsets):
+                # Merge the underline into the syntax colors character by character
+                for position in range(start, end):
+                    fmt = self.format(position)
+                    fmt.merge(underline)
+                    self.setFormat(position, 1, fmt)
+        if not reuse:
+            self.setCurrentBlockUserData(BlockData(tokens, state_in, block.revision(),
+                                                   brackets=summarize(text, tokens)))
+        self.mark_highlighted(block.blockNumber())
+        self.setCurrentBlockState(state)
+
+    def set_lexer(self, lexer):
+        if lexer is not self.lexer:
+            self.lexer = lexer
+            self.rehighlight()
+
+    def recolor(self):
+        # After a theme change. The tokens cached on the blocks are still
+        # right, so the new formats are applied without running the lexer.
+        self.recoloring = True
+        try:
+            self.rehighlight()
+        finally:
+            self.recoloring = False
+
+    def detach(self):
+        self.setDocument(None)
+
+
+# --- Large-File Highlighter ---
+class LazyHighlighter(DiagnosticsMixin, ChangeTrackingMixin, QObject):
+    # Used instead of SyntaxHighlighter above the large-file threshold, where
+    # QSyntaxHighlighter would highlight the whole document up front. Formats
+    # go straight onto block layouts: the blocks around the viewport first,
+    # the rest in idle-time chunks. A block keeps its cached formats for as
+    # long as its text and incoming lexer state are unchanged.
+    VIEWPORT_MARGIN = 100  # Blocks highlighted above and below the viewport
+    CHUNK_BUDGET = 0.004  # Seconds of background highlighting per timer tick
+
+    def __init__(self, editor, lexer=None):
+        super().__init__(editor)
+        self.editor = editor
+        self.lexer = lexer or get_lexer('python')
+        self.formats, self.diagnostic_formats = shared_formats()
+        self.diagnostics = {}
+        self.generation = 0
+        self.token_generation = 0  # Blocks highlighted before this generation have stale tokens
+        self._next_block = 0  # Background pass position
+
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(0)
+        self.viewport_timer.timeout.connect(self.highlight_viewport)
+
+        self.background_timer = QTimer(self)
+        self.background_timer.setInterval(0)
+        self.background_timer.timeout.connect(self.highlight_chunk)
+
+        self.document().contentsChange.connect(self.handle_contents_change)
+        self.editor.updateRequest.connect(self.schedule_viewport)
+        self.rehighlight()
+
+    def document(self):
+        return self.editor.document()
+
+    def detach(self):
+        self.viewport_timer.stop()
+        self.background_timer.stop()
+        self.document().contentsChange.disconnect(self.handle_contents_change)
+        self.editor.updateRequest.disconnect(self.schedule_viewport)
+        self.deleteLater()
+
+    def rehighlight(self):
+        # Invalidate every cached block without touching them now
+        self.generation += 1
+        self.token_generation = self.generation
+        self._next_block = 0
+        self.schedule_viewport()
+        self.background_timer.start()
+
+    def recolor(self):
+        # Like rehighlight(), but blocks keep their tokens and only get the
+        # new theme's formats
+        self.generation += 1
+        self._next_block = 0
+        self.schedule_viewport()
+        self.background_timer.start()
+
+    def set_lexer(self, lexer):
+        if lexer is not self.lexer:
+            self.lexer = lexer
+            self.rehighlight()
+
+    def rehighlightBlock(self, block):
+        self.highlight_block(block, force=True)
+
+    def schedule_viewport(self, *args):
+        self.viewport_timer.start()
+
+    def visible_range(self):
+        # Block numbers of the first and last visible block; collapsed
+        # regions in between count for nothing
+        block = self.editor.firstVisibleBlock()
+        first = block.blockNumber()
+        line_height = max(self.editor.fontMetrics().height(), 1)
+        for _ in range(self.editor.viewport().height() // line_height + 1):
+            following = self.editor.next_visible_block(block)
+            if not following.isValid():
+                break
+            block = following
+        return first, block.blockNumber()
+
+    def highlight_block(self, block, force=False):
+        # Returns True if the block had to be (re)highlighted
+        previous = block.previous()
+        state_in = previous.userState() if previous.isValid() else 0
+        if state_in < 0:
+            state_in = 0  # Not reached yet; the background pass corrects it
+        data = block.userData()
+        current = (not force and isinstance(data, BlockData) and data.state_in == state_in
+                   and data.revision == block.revision())
+        if current and data.generation == self.generation:
+            return False
+
+        text = block.text()
+        reuse = current and data.generation >= self.token_generation
+        if reuse:
+            tokens, state = data.tokens, block.userState()
+        else:
+            tokens, state = self.lexer.tokenize(text, state_in)
+        offsets = utf16_offsets(text)
+        ranges = []
+        for start, length, kind in tokens:
+            if offsets:
+                start, length = offsets[start], offsets[start + length] - offsets[start]
+            ranges.append(self._format_range(start, length, self.formats[kind]))
+        if self.diagnostics:
+            # Overlapping layout formats are merged, keeping the syntax colors
+            for start, end, underline in self.diagnostic_ranges(block.blockNumber(), text, offsets):
+                ranges.append(self._format_range(start, end - start, underline))
+
+        # setFormats() marks the block dirty, so Qt relayouts and repaints it
+        block.layout().setFormats(ranges)
+        if reuse:
+            data.generation = self.generation
+        else:
+            block.setUserData(BlockData(tokens, state_in, block.revision(), self.generation,
+                                        summarize(text, tokens)))
+        block.setUserState(state)
+        self.mark_highlighted(block.blockNumber())
+        return True
+
+    @staticmethod
+    def _format_range(start, length, fmt):
+        format_range = QTextLayout.FormatRange()
+        format_range.start = start
+        format_range.length = length
+        format_range.format = fmt
+        return format_range
+
+    def highlight_viewport(self):
+        first, last = self.visible_range()
+        block = self.document().findBlockByNumber(max(first - self.VIEWPORT_MARGIN, 0))
+        while block.isValid() and block.blockNumber() <= last + self.VIEWPORT_MARGIN:
+            self.highlight_block(block)
+            # Hidden blocks are left to the background pass
+            block = self.editor.next_visible_block(block)
+
+    def highlight_chunk(self):
+        deadline = time.perf_counter() + self.CHUNK_BUDGET
+        block = self.document().findBlockByNumber(self._next_block)
+        count = 0
+        while block.isValid():
+            self.highlight_block(block)
+            block = block.next()
+            count += 1
+            if count % 64 == 0 and time.perf_counter() > deadline:
+                break
+        if block.isValid():
+            self._next_block = block.blockNumber()
+        else:
+            self._next_block = self.document().blockCount()
+            self.background_timer.stop()
+
+    def handle_contents_change(self, position, chars_removed, chars_added):
+        document = self.document()
+        block = document.findBlock(position)
+        # Qt can report one character past the end (e.g. for setPlainText())
+        end = document.findBlock(min(position + chars_added, document.characterCount() - 1)).blockNumber()
+        self._next_block = min(self._next_block, block.blockNumber())
+
+        # Edits (and a changed end state) are highlighted right away up to the
+        # end of the viewport; anything further is left to the background pass
+        limit = self.visible_range()[1] + self.VIEWPORT_MARGIN
+        while block.isValid():
+            # Blocks inside the edit are always redone: text inserted into an
+            # existing block does not necessarily change its revision
+            number = block.blockNumber()
+            changed = self.highlight_block(block, force=number <= end)
+            if number >= limit or (number >= end and not changed):
+                break
+            block = block.next()
+        if not self.background_timer.isActive():
+            self.background_timer.start()
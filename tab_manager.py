@@ -0,0 +1,176 @@
+# tab_manager.py
+#
+# Keeps only the most recently used editors alive. Older tabs are suspended:
+# their state goes into a tab_snapshot.EditorSnapshot, the CodeEditor (with
+# its highlighter, completer, minimap and analysis state) is deleted, and a
+# bare SuspendedTab holds the tab's place until it is activated again.
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import QObject, QTimer
+
+import settings
+from code_editor import CodeEditor
+from search import DocumentOffsets
+from tab_snapshot import EditorSnapshot, apply_diff
+
+SUSPEND_DELAY = 1000  # ms after a tab switch before background tabs are suspended
+
+
+class SuspendedTab(QWidget):
+    # Stands in for a suspended editor. Offers the little main.py asks of
+    # every tab: the file shown and whether a load is under way.
+    def __init__(self, snapshot):
+        super().__init__()
+        self.snapshot = snapshot
+        self.file_info = snapshot.file_info
+        self.loader = None
+
+
+def capture(editor, checkpoints):
+    # Snapshot of editor, which is left unusable: the undo history is read by
+    # undoing it, so this is only done to an editor about to be deleted
+    document = editor.document()
+    cursor = editor.textCursor()
+    state = {
+        'cursor': (cursor.anchor(), cursor.position()),
+        'scroll': (editor.horizontalScrollBar().value(), editor.verticalScrollBar().value()),
+        'folded': sorted(editor.folds.folded),
+        'breakpoints': sorted(editor.breakpoints),
+        'file_info': editor.file_info,
+        'lexer': editor.lexer,
+    }
+    # Nothing listens while the history is walked back
+    editor.highlighter.detach()
+    document.blockSignals(True)
+    versions = [document.toPlainText()]
+    clean = [not document.isModified()]
+    while len(versions) <= checkpoints and document.isUndoAvailable():
+        document.undo()
+        versions.append(document.toPlainText())
+        clean.append(not document.isModified())
+    versions.reverse()
+    clean.reverse()
+    clean_version = clean.index(True) if True in clean else None
+    return EditorSnapshot(versions, clean_version, **state)
+
+
+def restore(editor, snapshot):
+    # Fills a new editor from snapshot; each checkpoint becomes one undo step
+    if snapshot.lexer is not None and snapshot.lexer is not editor.lexer:
+        editor.set_lexer(snapshot.lexer)
+    editor.file_info = snapshot.file_info
+    document = editor.document()
+    text, redo_steps = snapshot.replay()
+    editor.setPlainText(text)
+    document.setModified(snapshot.clean_version != 0)
+    for version, step in enumerate(redo_steps, 1):
+        # The diffs index Python strings; the document counts UTF-16 units
+        start, end, replacement = step
+        offsets = DocumentOffsets(text)
+        cursor = QTextCursor(document)
+        cursor.setPosition(offsets(start))
+        cursor.setPosition(offsets(end), QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(replacement)
+        text = apply_diff(text, step)
+        if version == snapshot.clean_version:
+            document.setModified(False)
+    for line in snapshot.folded:
+        editor.fold(line)
+    editor.set_breakpoints(snapshot.breakpoints)
+    anchor, position = snapshot.cursor
+    cursor = QTextCursor(document)
+    cursor.setPosition(min(anchor, document.characterCount() - 1))
+    cursor.setPosition(min(position, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+    editor.setTextCursor(cursor)
+    horizontal, vertical = snapshot.scroll
+    editor.horizontalScrollBar().setValue(horizontal)
+    editor.verticalScrollBar().setValue(vertical)
+
+
+class TabManager(QObject):
+    def __init__(self, tab_widget, create_editor, parent=None):
+        # create_editor() returns a new, connected CodeEditor not yet in a tab
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.create_editor = create_editor
+        self.recent = []  # Live editors, most recently active first
+        self._replacing = False
+
+        self.suspend_timer = QTimer(self)
+        self.suspend_timer.setSingleShot(True)
+        self.suspend_timer.setInterval(SUSPEND_DELAY)
+        self.suspend_timer.timeout.connect(self.suspend_idle)
+        tab_widget.currentChanged.connect(self.handle_current_changed)
+
+    def handle_current_changed(self, index):
+        if self._replacing:
+            return
+        widget = self.tab_widget.widget(index)
+        if isinstance(widget, SuspendedTab):
+            widget = self.resume(widget)
+        if isinstance(widget, CodeEditor):
+            if widget in self.recent:
+                self.recent.remove(widget)
+            self.recent.insert(0, widget)
+        if settings.value('tabs/live_editors') > 0:
+            self.suspend_timer.start()
+
+    def suspend_idle(self):
+        # Suspends the least recently used editors beyond the limit
+        limit = settings.value('tabs/live_editors')
+        if limit <= 0:
+            return
+        live = [self.tab_widget.widget(index) for index in range(self.tab_widget.count())]
+        live = [widget for widget in live if isinstance(widget, CodeEditor)]
+        self.recent = [editor for editor in self.recent if editor in live]
+        # Editors that were never active count as the oldest
+        ordered = self.recent + [editor for editor in live if editor not in self.recent]
+        current = self.tab_widget.currentWidget()
+        loading = False
+        for editor in ordered[limit:]:
+            if editor is current:
+                continue
+            if editor.loader is not None:
+                loading = True
+                continue
+            self.suspend(editor)
+        if loading:
+            self.suspend_timer.start()
+
+    def suspend(self, editor):
+        index = self.tab_widget.indexOf(editor)
+        if index < 0:
+            return None
+        placeholder = SuspendedTab(capture(editor, settings.value('tabs/undo_checkpoints')))
+        self.replace(index, placeholder)
+        if editor in self.recent:
+            self.recent.remove(editor)
+        editor.shutdown()
+        editor.deleteLater()
+        return placeholder
+
+    def resume(self, placeholder):
+        index = self.tab_widget.indexOf(placeholder)
+        if index < 0:
+            return None
+        editor = self.create_editor()
+        restore(editor, placeholder.snapshot)
+        self.replace(index, editor)
+        placeholder.deleteLater()
+        return editor
+
+    def replace(self, index, widget):
+        # Puts widget in the tab at index, keeping its title and tooltip, and
+        # keeping it current if it was
+        tab_widget = self.tab_widget
+        current = tab_widget.currentIndex() == index
+        self._replacing = True
+        try:
+            tab_widget.insertTab(index, widget, tab_widget.tabIcon(index), tab_widget.tabText(index))
+            tab_widget.setTabToolTip(index, tab_widget.tabToolTip(index + 1))
+            if current:
+                tab_widget.setCurrentIndex(index)
+            tab_widget.removeTab(index + 1)
+        finally:
+            self._replacing = False
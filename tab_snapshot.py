@@ -0,0 +1,97 @@
+# tab_snapshot.py
+#
+# Qt-free state of a suspended editor tab: its text, compressed when large,
+# the undo history as a chain of checkpoints, and where the cursor, scroll
+# bars and folds were. Checkpoints are stored as diffs that step back from
+# the current text, so a long history of small edits costs little more than
+# the text itself. Restoring replays them as separate edits, which gives the
+# new editor the same undo steps (the redo stack is not kept). Breakpoints
+# are kept too, so a debug session still sees them.
+
+import zlib
+
+COMPRESS_CHARS = 64 * 1024  # Texts longer than this are kept compressed
+COMPRESS_LEVEL = 1  # Fast; source code still shrinks to a fraction
+
+
+class StoredText:
+    def __init__(self, text):
+        self.length = len(text)
+        if self.length > COMPRESS_CHARS:
+            self.data = zlib.compress(text.encode('utf-8', 'surrogatepass'), COMPRESS_LEVEL)
+            self.compressed = True
+        else:
+            self.data = text
+            self.compressed = False
+
+    def text(self):
+        if self.compressed:
+            return zlib.decompress(self.data).decode('utf-8', 'surrogatepass')
+        return self.data
+
+    def size(self):
+        # Rough bytes held, for reporting
+        return len(self.data) if self.compressed else len(self.data.encode('utf-8', 'surrogatepass'))
+
+
+def _common_prefix(a, b):
+    # Binary search over slice comparisons, which run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def text_diff(old, new):
+    # (start, end, replacement): new is old with old[start:end] replaced
+    prefix = _common_prefix(old, new)
+    limit = min(len(old), len(new)) - prefix
+    suffix = _common_prefix(old[::-1][:limit], new[::-1][:limit]) if limit > 0 else 0
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+def apply_diff(text, diff):
+    start, end, replacement = diff
+    return text[:start] + replacement + text[end:]
+
+
+class EditorSnapshot:
+    def __init__(self, versions, clean_version=None, cursor=(0, 0), scroll=(0, 0), folded=(),
+                 file_info=None, lexer=None, breakpoints=()):
+        # versions: the texts the undo history passes through, oldest first;
+        # the last one is the current text. clean_version is the index of
+        # the version that matches the file on disk, None if none does.
+        self.current = StoredText(versions[-1])
+        # Diffs that take each version back to the one before it
+        self.undo_steps = [text_diff(new, old) for old, new in zip(versions, versions[1:])]
+        self.clean_version = clean_version
+        self.cursor = cursor  # (anchor, position)
+        self.scroll = scroll  # (horizontal, vertical) scroll bar values
+        self.folded = tuple(folded)  # Header lines of collapsed regions
+        self.breakpoints = tuple(breakpoints)  # Block numbers
+        self.file_info = file_info
+        self.lexer = lexer  # Shared lexers.py instance, None for the default
+
+    @property
+    def modified(self):
+        return self.clean_version != len(self.undo_steps)
+
+    def text(self):
+        return self.current.text()
+
+    def replay(self):
+        # (oldest text, diffs that redo each step from it), for restoring
+        text = self.current.text()
+        redo_steps = []
+        for start, end, replacement in reversed(self.undo_steps):
+            redo_steps.append((start, start + len(replacement), text[start:end]))
+            text = text[:start] + replacement + text[end:]
+        redo_steps.reverse()
+        return text, redo_steps
+
+    def size(self):
+        return self.current.size() + sum(len(replacement) for _, _, replacement in self.undo_steps)
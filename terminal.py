@@ -0,0 +1,346 @@
+# terminal.py
+
+import os
+import re
+import time
+
+from PyQt6.QtWidgets import QPlainTextEdit, QApplication
+from PyQt6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor, QKeySequence
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+import settings
+
+FLUSH_INTERVAL = 16  # ms, about one frame
+
+# CSI sequences; only SGR ('m') changes the output, the rest are dropped
+_CSI_RE = re.compile(r'\x1b\[([0-9;?]*)([@-~])')
+# An escape sequence cut off at the end of a chunk
+_PARTIAL_CSI_RE = re.compile(r'\x1b(\[[0-9;?]*)?$')
+
+ANSI_COLORS = [
+    '#000000', '#cd3131', '#0dbc79', '#e5e510', '#2472c8', '#bc3fbc', '#11a8cd', '#e5e5e5',
+    '#666666', '#f14c4c', '#23d18b', '#f5f543', '#3b8eea', '#d670d6', '#29b8db', '#ffffff',
+]
+STDERR_COLOR = '#f48771'
+
+
+def xterm_color(index):
+    # The 256-colour palette: 16 ANSI colours, a 6x6x6 cube and a grey ramp
+    if index < 16:
+        return ANSI_COLORS[index]
+    if index < 232:
+        index -= 16
+        steps = [0, 95, 135, 175, 215, 255]
+        return '#%02x%02x%02x' % (steps[index // 36], steps[index // 6 % 6], steps[index % 6])
+    grey = 8 + (index - 232) * 10
+    return '#%02x%02x%02x' % (grey, grey, grey)
+
+
+class AnsiParser:
+    # Splits a stream into (text, style) runs. Style is a hashable tuple
+    # (foreground, background, bold, italic, underline); state carries over
+    # between chunks, including escape sequences split across them.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.foreground = None
+        self.background = None
+        self.bold = False
+        self.italic = False
+        self.underline = False
+        self.carry = ''
+
+    def style(self):
+        return (self.foreground, self.background, self.bold, self.italic, self.underline)
+
+    def feed(self, text):
+        text = self.carry + text
+        self.carry = ''
+        partial = _PARTIAL_CSI_RE.search(text)
+        if partial:
+            self.carry = text[partial.start():]
+            text = text[:partial.start()]
+
+        runs = []
+        position = 0
+        for match in _CSI_RE.finditer(text):
+            if match.start() > position:
+                runs.append((text[position:match.start()], self.style()))
+            if match.group(2) == 'm':
+                self.apply_sgr(match.group(1))
+            position = match.end()
+        if position < len(text):
+            runs.append((text[position:], self.style()))
+        return runs
+
+    def apply_sgr(self, params):
+        codes = [int(code) if code.isdigit() else 0 for code in params.split(';')]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.foreground = self.background = None
+                self.bold = self.italic = self.underline = False
+            elif code == 1:
+                self.bold = True
+            elif code == 22:
+                self.bold = False
+            elif code == 3:
+                self.italic = True
+            elif code == 23:
+                self.italic = False
+            elif code == 4:
+                self.underline = True
+            elif code == 24:
+                self.underline = False
+            elif 30 <= code <= 37:
+                self.foreground = ANSI_COLORS[code - 30]
+            elif 90 <= code <= 97:
+                self.foreground = ANSI_COLORS[code - 90 + 8]
+            elif code == 39:
+                self.foreground = None
+            elif 40 <= code <= 47:
+                self.background = ANSI_COLORS[code - 40]
+            elif 100 <= code <= 107:
+                self.background = ANSI_COLORS[code - 100 + 8]
+            elif code == 49:
+                self.background = None
+            elif code in (38, 48) and i + 1 < len(codes):
+                color = None
+                if codes[i + 1] == 5 and i + 2 < len(codes):
+                    color = xterm_color(min(codes[i + 2], 255))
+                    i += 2
+                elif codes[i + 1] == 2 and i + 4 < len(codes):
+                    color = '#%02x%02x%02x' % tuple(min(c, 255) for c in codes[i + 2:i + 5])
+                    i += 4
+                if code == 38:
+                    self.foreground = color
+                else:
+                    self.background = color
+            i += 1
+
+
+def strip_ansi(text):
+    return _CSI_RE.sub('', text)
+
+
+# Keys sent to an interactive run as a terminal would send them
+INPUT_KEYS = {
+    Qt.Key.Key_Return: '\r',
+    Qt.Key.Key_Enter: '\r',
+    Qt.Key.Key_Backspace: '\x7f',
+    Qt.Key.Key_Tab: '\t',
+}
+
+
+class TerminalWidget(QPlainTextEdit):
+    # Read-only output pane. Chunks from the execution engine are queued by
+    # append_output() and inserted once per frame, and the document keeps at
+    # most 'terminal/max_lines' lines, so a flood of output costs bounded
+    # memory and layout time. With 'terminal/log_to_disk' the full,
+    # untrimmed output of each session is also written to a log file.
+    # While set_interactive() is on, keystrokes go out through input_entered
+    # instead of editing the pane; the run's terminal echoes them back.
+    input_entered = pyqtSignal(str)
+    interrupt_requested = pyqtSignal()  # Ctrl+C with nothing selected
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)  # Output is never undone; the undo stack would grow without bound
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
+        self.max_lines = settings.value('terminal/max_lines')
+        self.setMaximumBlockCount(self.max_lines)
+
+        self._pending = []  # (stream, text) chunks waiting for the next flush
+        self._parsers = {}
+        self._formats = {}
+        self._overwrite = False  # A bare '\r' was seen: the next text replaces the last line
+        self.interactive = False
+        self.log_file = None
+        self.log_path = None
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_INTERVAL)
+        self.flush_timer.timeout.connect(self.flush)
+
+    # --- Sessions ---
+    def start_session(self, name='run'):
+        # Clear the pane and, if enabled, open a fresh log file for the next run
+        self.clear()
+        self.close_log()
+        if settings.value('terminal/log_to_disk'):
+            log_dir = settings.value('terminal/log_dir')
+            try:
+                os.makedirs(log_dir, exist_ok=True)
+                self.log_path = os.path.join(log_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.log")
+                self.log_file = open(self.log_path, 'w', encoding='utf-8')
+            except OSError:
+                self.log_path = self.log_file = None
+        return self.log_path
+
+    def close_log(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def set_interactive(self, interactive):
+        self.interactive = interactive
+        if interactive:
+            self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        else:
+            self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+            if self.hasFocus():
+                self.clearFocus()
+
+    def terminal_size(self):
+        # (columns, rows) of text the pane shows, for the run's terminal;
+        # None while hidden, which leaves the run its default size
+        if not self.isVisible():
+            return None
+        metrics = self.fontMetrics()
+        viewport = self.viewport()
+        return (max(viewport.width() // max(metrics.horizontalAdvance('M'), 1), 20),
+                max(viewport.height() // max(metrics.lineSpacing(), 1), 5))
+
+    # --- Input ---
+    def keyPressEvent(self, event):
+        if not self.interactive:
+            super().keyPressEvent(event)
+            return
+        control = event.modifiers() & Qt.KeyboardModifier.ControlModifier
+        text = None
+        if control and event.key() == Qt.Key.Key_C and not self.textCursor().hasSelection():
+            self.interrupt_requested.emit()
+            return
+        if control and event.key() == Qt.Key.Key_D:
+            text = '\x04'
+        elif event.matches(QKeySequence.StandardKey.Paste):
+            text = QApplication.clipboard().text().replace('\r\n', '\n').replace('\n', '\r')
+        elif event.key() in INPUT_KEYS:
+            text = INPUT_KEYS[event.key()]
+        elif event.text() and event.text().isprintable() and not control:
+            text = event.text()
+        if text is None:
+            super().keyPressEvent(event)  # Scrolling, selecting, copying
+        elif text:
+            # It shows up once echoed, at the end of the output
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+            self.input_entered.emit(text)
+
+    def clear(self):
+        self._pending.clear()
+        self._parsers.clear()
+        self._overwrite = False
+        super().clear()
+
+    # --- Output ---
+    def append_output(self, stream, text):
+        if self.log_file is not None:
+            self.log_file.write(strip_ansi(text))
+        self._pending.append((stream, text))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        if self._pending:
+            pending = self.trim_pending(self._pending)
+            self._pending = []
+            if self.log_file is not None:
+                self.log_file.flush()
+            self.insert_chunks(pending)
+
+    def trim_pending(self, pending):
+        # Everything before the last max_lines lines would be evicted right
+        # after insertion; skip laying it out, but keep its colour state.
+        newlines = 0
+        for index in range(len(pending) - 1, -1, -1):
+            stream, text = pending[index]
+            newlines += text.count('\n')
+            if newlines < self.max_lines:
+                continue
+            # Keep max_lines - 1 line breaks in total after the cut
+            kept_after = self.max_lines - 1 - (newlines - text.count('\n'))
+            cut = len(text)
+            for _ in range(kept_after + 1):
+                cut = text.rfind('\n', 0, cut)
+            for dropped_stream, dropped in pending[:index]:
+                self.parser(dropped_stream).feed(dropped)
+            self.parser(stream).feed(text[:cut + 1])
+            self._overwrite = False
+            super().clear()
+            return [(stream, text[cut + 1:])] + pending[index + 1:]
+        return pending
+
+    def insert_chunks(self, chunks):
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for stream, text in chunks:
+            for run, style in self.parser(stream).feed(text):
+                self.insert_run(cursor, run, self.char_format(stream, style))
+        cursor.endEditBlock()
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def insert_run(self, cursor, text, char_format):
+        # '\r' returns to the start of the line, so progress bars redraw in place
+        text = text.replace('\r\n', '\n')
+        parts = text.split('\r')
+        for index, part in enumerate(parts):
+            if index > 0:
+                self._overwrite = True
+            if not part:
+                continue
+            if self._overwrite and part.startswith('\n'):
+                self._overwrite = False  # A '\r\n' split across chunks
+            elif self._overwrite:
+                cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+                self._overwrite = False
+            if '\b' in part:
+                self.insert_backspaced(cursor, part, char_format)
+            else:
+                cursor.insertText(part, char_format)
+
+    def insert_backspaced(self, cursor, text, char_format):
+        # '\b' steps back over a character, which the text after it then
+        # overwrites; a terminal erasing input echoes "\b \b"
+        pieces = text.split('\b')
+        cursor.insertText(pieces[0], char_format)
+        for piece in pieces[1:]:
+            if not cursor.atBlockStart():
+                cursor.deletePreviousChar()
+            cursor.insertText(piece, char_format)
+
+    def parser(self, stream):
+        parser = self._parsers.get(stream)
+        if parser is None:
+            parser = self._parsers[stream] = AnsiParser()
+        return parser
+
+    def char_format(self, stream, style):
+        key = (stream, style)
+        char_format = self._formats.get(key)
+        if char_format is None:
+            foreground, background, bold, italic, underline = style
+            char_format = QTextCharFormat()
+            if foreground is None and stream == 'stderr':
+                foreground = STDERR_COLOR
+            if foreground is not None:
+                char_format.setForeground(QColor(foreground))
+            if background is not None:
+                char_format.setBackground(QColor(background))
+            if bold:
+                char_format.setFontWeight(QFont.Weight.Bold)
+            char_format.setFontItalic(italic)
+            char_format.setFontUnderline(underline)
+            self._formats[key] = char_format
+        return char_format
@@ -0,0 +1,18 @@
+# tests/conftest.py
+
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def app():
+    # One QApplication for the whole run; the shared analysis worker thread
+    # must be stopped before it goes away
+    from PyQt6.QtWidgets import QApplication
+    import analysis
+    app = QApplication.instance() or QApplication([])
+    yield app
+    analysis._stop_worker()
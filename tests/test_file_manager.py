@@ -0,0 +1,30 @@
+# tests/test_file_manager.py
+
+import pytest
+
+from code_editor import CodeEditor
+from file_manager import DocumentLoader
+from lexers import PygmentsLexer, PythonLexer
+
+pytest.importorskip('pygments')
+
+
+def open_in_editor(path):
+    editor = CodeEditor()
+    DocumentLoader(editor, str(path)).start()  # Small files load at once
+    return editor
+
+
+def test_opening_json_selects_pygments_lexer(app, tmp_path):
+    path = tmp_path / 'x.json'
+    path.write_text('{"key": [1, 2.5, true]}\n')
+    editor = open_in_editor(path)
+    assert isinstance(editor.lexer, PygmentsLexer)
+    assert editor.lexer.name == 'json'
+    assert editor.toPlainText() == '{"key": [1, 2.5, true]}\n'
+
+
+def test_opening_python_keeps_python_lexer(app, tmp_path):
+    path = tmp_path / 'x.py'
+    path.write_text('x = 1\n')
+    assert isinstance(open_in_editor(path).lexer, PythonLexer)
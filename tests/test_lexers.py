@@ -0,0 +1,24 @@
+# tests/test_lexers.py
+#
+# Run from the repository root with: python -m pytest tests
+
+from lexers import tokenize_python
+
+
+def kinds(text):
+    tokens, _ = tokenize_python(text)
+    return [(text[start:start + length], kind) for start, length, kind in tokens]
+
+
+def test_numbers():
+    assert kinds('x = 0x1F + 1_000 + 2.5e-3j') == [
+        ('=', 'operator'), ('0x1F', 'number'), ('+', 'operator'),
+        ('1_000', 'number'), ('+', 'operator'), ('2.5e-3j', 'number'),
+    ]
+
+
+def test_leading_dot_floats():
+    assert kinds('.5') == [('.5', 'number')]
+    assert kinds('f(.5e-3)') == [('(', 'brace'), ('.5e-3', 'number'), (')', 'brace')]
+    # An attribute access is not a number
+    assert kinds('a.b5') == []
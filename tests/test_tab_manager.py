@@ -0,0 +1,58 @@
+# tests/test_tab_manager.py
+
+import pytest
+
+from PyQt6.QtGui import QTextCursor
+
+from code_editor import CodeEditor
+from tab_manager import capture, restore
+
+
+def append(editor, text):
+    # One undo step per call
+    cursor = QTextCursor(editor.document())
+    cursor.movePosition(QTextCursor.MoveOperation.End)
+    cursor.beginEditBlock()
+    cursor.insertText(text)
+    cursor.endEditBlock()
+
+
+def round_trip(editor):
+    restored = CodeEditor()
+    restore(restored, capture(editor, checkpoints=50))
+    return restored
+
+
+def undo_all(editor):
+    versions = [editor.toPlainText()]
+    while editor.document().isUndoAvailable():
+        editor.document().undo()
+        versions.append(editor.toPlainText())
+    return versions
+
+
+@pytest.mark.parametrize('first', ["s = '😀😀😀'\nx = 1\n", "s = 'é'\nx = 1\n", "x = 1\n"])
+def test_round_trip_keeps_text_and_undo_steps(app, first):
+    editor = CodeEditor()
+    editor.setPlainText(first)
+    append(editor, "y = 2\n")
+    append(editor, "# end 🎉\n")
+    expected = editor.toPlainText()
+    reference = CodeEditor()
+    reference.setPlainText(first)
+    append(reference, "y = 2\n")
+    append(reference, "# end 🎉\n")
+
+    restored = round_trip(editor)
+    assert restored.toPlainText() == expected
+    assert undo_all(restored)[:3] == undo_all(reference)[:3]
+
+
+def test_round_trip_edit_after_astral_characters(app):
+    editor = CodeEditor()
+    editor.setPlainText("a = '𝔘𝔫𝔦'\nb = 1\n")
+    cursor = QTextCursor(editor.document())
+    cursor.setPosition(editor.document().characterCount() - 3)  # Before "1"
+    cursor.insertText("2 + ")
+    expected = editor.toPlainText()
+    assert round_trip(editor).toPlainText() == expected
@@ -0,0 +1,233 @@
+# theme.py
+#
+# Qt-free side of theming. A theme is a .qss file that may declare variables
+#
+#     @background: #1e1e1e;
+#     @syntax-keyword: #569cd6;
+#     @syntax-comment: #57a64a italic;
+#
+# and use them in its rules as @background. Whatever a theme does not declare
+# comes from the built-in dark theme, so a theme only lists what it changes.
+# Besides the stylesheet, the variables drive the highlighter's formats and
+# the editor's gutter, current line, bracket and minimap colors. A theme is
+# parsed once and cached until its file changes; comparing two compiled
+# themes tells which groups of widgets have to be refreshed.
+
+import os
+import re
+
+BUILTIN_THEME = 'dark'  # Used when no theme file exists, and as the base of every theme
+SYNTAX_KINDS = ('keyword', 'operator', 'brace', 'def_class', 'string', 'comment', 'number', 'builtin', 'decorator')
+
+DEFAULT_VARIABLES = {
+    # Window chrome
+    'chrome': '#2d2d2d',
+    'chrome-text': '#ffffff',
+    'toolbar': '#252525',
+    'button': '#2d2d2d',
+    'button-hover': '#3d3d3d',
+    'tab': '#2d2d2d',
+    'tab-selected': '#3d3d3d',
+    # Highlighter, as "color [italic] [bold]"
+    'syntax-keyword': '#569cd6',
+    'syntax-operator': '#d4d4d4',
+    'syntax-brace': '#d4d4d4',
+    'syntax-def-class': '#4ec9b0',
+    'syntax-string': '#d69d85',
+    'syntax-comment': '#57a64a italic',
+    'syntax-number': '#b5cea8',
+    'syntax-builtin': '#dcdcaa',
+    'syntax-decorator': '#9b9bff',
+    'diagnostic-error': '#ff0000',
+    'diagnostic-warning': '#d7ba7d',
+    # Editor
+    'gutter-background': '#1e1e1e',
+    'gutter-line-number': '#757575',
+    'gutter-fold-open': '#5a5a5a',
+    'gutter-fold-folded': '#c5c5c5',
+    'gutter-breakpoint': '#e51400',
+    'current-line': '#292929',
+    'debug-line': '#4b4b18',  # Where the debugger stopped
+    'bracket-match': '#49483e',
+    'bracket-mismatch': '#6e2a2a',
+    'minimap-background': '#1e1e1e',
+    'minimap-text': '#a0d4d4d4',  # #AARRGGBB
+    'minimap-viewport': '#1cffffff',
+}
+
+# Rules for the widgets main.py and the title bar used to style one by one.
+# One stylesheet on the window means one style object for all of them.
+BASE_STYLESHEET = '''\
+#TitleBar, #TitleBar QLabel { background-color: @chrome; }
+#TitleBar QLabel { color: @chrome-text; font-size: 12px; }
+#TitleBar QPushButton { background-color: transparent; color: @chrome-text; }
+#ToolBar { background-color: @toolbar; }
+#ToolBar QPushButton { background-color: @button; color: @chrome-text; border: none; border-radius: 5px; }
+#ToolBar QPushButton:hover { background-color: @button-hover; }
+QTabWidget#EditorTabs > QTabBar::tab { background: @tab; color: @chrome-text; padding: 10px; }
+QTabWidget#EditorTabs > QTabBar::tab:selected { background: @tab-selected; }
+QTabWidget#EditorTabs::pane { border: none; }
+'''
+
+BUILTIN_THEMES = {
+    'dark': '',
+    'light': '''\
+@chrome: #e8e8e8;
+@chrome-text: #1e1e1e;
+@toolbar: #f3f3f3;
+@button: #e0e0e0;
+@button-hover: #d0d0d0;
+@tab: #e8e8e8;
+@tab-selected: #ffffff;
+@syntax-keyword: #0000ff;
+@syntax-operator: #000000;
+@syntax-brace: #000000;
+@syntax-def-class: #267f99;
+@syntax-string: #a31515;
+@syntax-comment: #008000 italic;
+@syntax-number: #098658;
+@syntax-builtin: #795e26;
+@syntax-decorator: #af00db;
+@diagnostic-warning: #bf8803;
+@gutter-background: #ffffff;
+@gutter-line-number: #237893;
+@gutter-fold-open: #b0b0b0;
+@gutter-fold-folded: #505050;
+@current-line: #f0f0f0;
+@debug-line: #fff3b0;
+@bracket-match: #d7e4f2;
+@bracket-mismatch: #f2c4c4;
+@minimap-background: #ffffff;
+@minimap-text: #a0404040;
+@minimap-viewport: #1c000000;
+QPlainTextEdit { background-color: #ffffff; color: #000000; }
+''',
+}
+
+# Groups of variables by the widgets they are drawn into. Variables outside
+# every group only appear in the stylesheet.
+GROUPS = (
+    ('syntax', ('syntax-', 'diagnostic-')),
+    ('gutter', ('gutter-',)),
+    ('minimap', ('minimap-',)),
+    ('editor', ('current-line', 'bracket-', 'debug-')),
+)
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_VARIABLE_RE = re.compile(r'^[ \t]*@([\w-]+)[ \t]*:[ \t]*([^;\n]*?)[ \t]*;[ \t]*(?:\n|$)', re.MULTILINE)
+_REFERENCE_RE = re.compile(r'@([\w-]+)')
+
+
+class ThemeError(ValueError):
+    pass
+
+
+def syntax_variable(kind):
+    return 'syntax-' + kind.replace('_', '-')
+
+
+def variable_group(name):
+    for group, prefixes in GROUPS:
+        if name.startswith(prefixes):
+            return group
+    return None
+
+
+def group_variables(*groups):
+    return [name for name in DEFAULT_VARIABLES if variable_group(name) in groups]
+
+
+class Theme:
+    def __init__(self, name, variables, stylesheet, path=None, stamp=None):
+        self.name = name
+        self.variables = variables
+        self.stylesheet = stylesheet
+        self.path = path  # None for a built-in theme
+        self.stamp = stamp  # (mtime, size) of the file it was parsed from
+
+    def color(self, name):
+        return self.variables[name].split()[0]
+
+    def style(self, name):
+        # (color, italic, bold)
+        words = self.variables[name].split()
+        return words[0], 'italic' in words[1:], 'bold' in words[1:]
+
+
+def changed_groups(old, new):
+    # What a switch from old to new changes: 'stylesheet' and the names in
+    # GROUPS. Everything when there was no theme before.
+    if old is None:
+        return {'stylesheet'} | {group for group, _ in GROUPS}
+    changed = set()
+    if old.stylesheet != new.stylesheet:
+        changed.add('stylesheet')
+    for name in old.variables.keys() | new.variables.keys():
+        group = variable_group(name)
+        if group is not None and old.variables.get(name) != new.variables.get(name):
+            changed.add(group)
+    return changed
+
+
+def parse_theme(name, text, path=None, stamp=None):
+    text = _COMMENT_RE.sub('', text)
+    declared = {match.group(1): match.group(2) for match in _VARIABLE_RE.finditer(text)}
+    body = _VARIABLE_RE.sub('', text)
+    variables = dict(DEFAULT_VARIABLES)
+    variables.update(declared)
+
+    # Variables may refer to other variables
+    resolved = {}
+
+    def resolve(key, seen):
+        if key in resolved:
+            return resolved[key]
+        if key not in variables:
+            raise ThemeError(f"{name}: unknown variable @{key}")
+        if key in seen:
+            raise ThemeError(f"{name}: @{key} refers to itself")
+        value = _REFERENCE_RE.sub(lambda match: resolve(match.group(1), seen | {key}), variables[key])
+        resolved[key] = value
+        return value
+
+    for key in variables:
+        resolve(key, frozenset())
+    stylesheet = _REFERENCE_RE.sub(lambda match: resolve(match.group(1), frozenset()), BASE_STYLESHEET + body)
+    for key, value in resolved.items():
+        if variable_group(key) is not None and not value.split():
+            raise ThemeError(f"{name}: @{key} has no color")
+    return Theme(name, resolved, stylesheet, path, stamp)
+
+
+_builtin = {}
+
+
+def builtin_theme(name=BUILTIN_THEME):
+    if name not in _builtin:
+        _builtin[name] = parse_theme(name, BUILTIN_THEMES[name])
+    return _builtin[name]
+
+
+class ThemeCache:
+    # Compiled themes by path, kept until the file's mtime or size changes
+    def __init__(self):
+        self._themes = {}
+
+    def load(self, name, path):
+        # A theme file overrides the built-in theme of the same name. Raises
+        # FileNotFoundError when there is neither, ThemeError for a bad file.
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            self._themes.pop(path, None)
+            if name in BUILTIN_THEMES:
+                return builtin_theme(name)
+            raise
+        stamp = (info.st_mtime_ns, info.st_size)
+        cached = self._themes.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        with open(path, 'r', encoding='utf-8') as stylesheet:
+            theme = parse_theme(name, stylesheet.read(), path, stamp)
+        self._themes[path] = theme
+        return theme
@@ -2,22 +2,94 @@
 
 import os
 from PyQt6.QtWidgets import QMessageBox
-from PyQt6.QtCore import QObject
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+import syntax_highlighter
+from theme import BUILTIN_THEMES, ThemeCache, ThemeError, changed_groups
+
+RELOAD_DELAY = 100  # ms; editors often save a file in more than one write
 
 class ThemeManager(QObject):
+    # Emitted after the stylesheet and the shared editor formats and colors
+    # were updated, with what changed (see theme.changed_groups)
+    theme_changed = pyqtSignal(object, object)  # Theme, set of group names
+    reload_failed = pyqtSignal(str)
+
     def __init__(self, bin_folder):
         super().__init__()
         self.themes_dir = os.path.join(bin_folder, 'themes')
         if not os.path.exists(self.themes_dir):
             os.makedirs(self.themes_dir)
+        self.cache = ThemeCache()
+        self.current = None
+        self.target = None  # Widget the stylesheet is set on
+
+        # Edits to the current theme file are applied as soon as it is saved
+        self.watcher = QFileSystemWatcher([self.themes_dir], self)
+        self.watcher.fileChanged.connect(self.schedule_reload)
+        self.watcher.directoryChanged.connect(self.schedule_reload)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.reload)
+
+    def theme_path(self, theme_name):
+        return os.path.join(self.themes_dir, f'{theme_name}.qss')
 
     def get_available_themes(self):
-        return [os.path.splitext(f)[0] for f in os.listdir(self.themes_dir) if f.endswith('.qss')]
+        names = {os.path.splitext(f)[0] for f in os.listdir(self.themes_dir) if f.endswith('.qss')}
+        return sorted(names | BUILTIN_THEMES.keys())
+
+    def apply_theme(self, theme_name, app, quiet=False):
+        try:
+            theme = self.cache.load(theme_name, self.theme_path(theme_name))
+        except FileNotFoundError:
+            if not quiet:
+                QMessageBox.warning(None, "Theme Error", f"Theme '{theme_name}' not found.")
+            return False
+        except (OSError, ThemeError) as e:
+            if not quiet:
+                QMessageBox.warning(None, "Theme Error", f"Theme '{theme_name}' could not be loaded:\n{e}")
+            return False
+        self.target = app
+        self.set_theme(theme)
+        self.watch(self.theme_path(theme_name))
+        return True
+
+    def set_theme(self, theme):
+        changed = changed_groups(self.current, theme)
+        self.current = theme
+        if not changed:
+            return
+        if 'stylesheet' in changed:
+            # Re-polishes every widget in the window, so it is skipped when
+            # only editor colors changed
+            self.target.setStyleSheet(theme.stylesheet)
+        if changed - {'stylesheet'}:
+            syntax_highlighter.set_theme(theme)
+        self.theme_changed.emit(theme, changed)
+
+    def watch(self, path):
+        # Only the current theme's file; saving by replacing the file drops
+        # it from the watcher, so it is added again on every reload
+        stale = [watched for watched in self.watcher.files() if watched != path]
+        if stale:
+            self.watcher.removePaths(stale)
+        if path not in self.watcher.files() and os.path.exists(path):
+            self.watcher.addPath(path)
+
+    def schedule_reload(self, _path):
+        if self.current is not None:
+            self.reload_timer.start()
 
-    def apply_theme(self, theme_name, app):
-        theme_path = os.path.join(self.themes_dir, f'{theme_name}.qss')
-        if os.path.exists(theme_path):
-            with open(theme_path, 'r') as stylesheet:
-                app.setStyleSheet(stylesheet.read())
+    def reload(self):
+        # The cache only parses the file again if it changed on disk
+        path = self.theme_path(self.current.name)
+        try:
+            theme = self.cache.load(self.current.name, path)
+        except (OSError, ThemeError) as e:
+            self.reload_failed.emit(str(e))
         else:
-            QMessageBox.warning(None, "Theme Error", f"Theme '{theme_name}' not found.")
+            if theme is not self.current:
+                self.set_theme(theme)
+        self.watch(path)
@@ -1,15 +1,39 @@
 # utils.py
 
-from PyQt6.QtWidgets import QGraphicsOpacityEffect
-from PyQt6.QtCore import QPropertyAnimation, QEasingCurve
-
-def fade_in_widget(widget, duration=1000):
-    effect = QGraphicsOpacityEffect()
-    widget.setGraphicsEffect(effect)
-    animation = QPropertyAnimation(effect, b"opacity")
-    animation.setDuration(duration)
-    animation.setStartValue(0)
-    animation.setEndValue(1)
-    animation.setEasingCurve(QEasingCurve.Type.OutCubic)
-    animation.start()
-    widget.animation = animation  # Keep a reference to prevent garbage collection
+import os
+import sys
+import time
+
+from PyQt6.QtGui import QIcon
+
+
+def cached_icon(name, color, cache_dir, size=64):
+    # qtawesome takes ~150 ms to import and build its fonts, so rendered icons
+    # are kept as PNGs and later starts never import it
+    path = os.path.join(cache_dir, f"{name.replace('.', '-')}-{color.lstrip('#')}-{size}.png")
+    if os.path.exists(path):
+        return QIcon(path)
+    import qtawesome as qta
+    icon = qta.icon(name, color=color)
+    os.makedirs(cache_dir, exist_ok=True)
+    icon.pixmap(size, size).save(path)
+    return icon
+
+
+class PhaseTimer:
+    # Wall-clock time spent in consecutive named phases, e.g. during startup
+    def __init__(self, start=None):
+        self.start = self.last = time.perf_counter() if start is None else start
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        width = max((len(name) for name, _ in self.phases), default=0)
+        for name, elapsed in self.phases:
+            print(f"{name:<{width}}  {elapsed * 1000:8.1f} ms", file=stream)
+        print(f"{'total':<{width}}  {(self.last - self.start) * 1000:8.1f} ms", file=stream)
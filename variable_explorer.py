@@ -0,0 +1,95 @@
+# variable_explorer.py
+
+from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt
+
+INDEX_ROLE = Qt.ItemDataRole.UserRole  # Position of the entry in its parent's listing
+FETCHED_ROLE = Qt.ItemDataRole.UserRole + 1  # Children have been requested
+LOAD_MORE_ROLE = Qt.ItemDataRole.UserRole + 2  # Offset of the next page
+
+
+class VariableExplorer(QTreeWidget):
+    # Tree of a namespace snapshot that is filled lazily, one page at a time.
+    # The source is a callable fetch(path, offset, limit) that returns a
+    # request id; the reply dict (entries, offset, total) is passed back to
+    # handle_reply() with that id. Sources number their requests
+    # independently, so a reply is only taken from the source (any object
+    # naming the sender) it was fetched from.
+    PAGE_SIZE = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setHeaderLabels(['Variable', 'Type', 'Value'])
+        self.fetch = None
+        self.source = None
+        self._requests = {}  # Request id -> parent item (None for top level)
+        self.itemExpanded.connect(self.handle_item_expanded)
+        self.itemClicked.connect(self.handle_item_clicked)
+
+    def set_source(self, fetch, source=None):
+        self.fetch = fetch
+        self.source = source
+        self.refresh()
+
+    def refresh(self):
+        self.clear()
+        self._requests.clear()
+        if self.fetch is not None:
+            self.request_page(None, 0)
+
+    def request_page(self, parent, offset):
+        request_id = self.fetch(self.item_path(parent), offset, self.PAGE_SIZE)
+        if request_id is not None:
+            self._requests[request_id] = parent
+
+    def item_path(self, item):
+        path = []
+        while item is not None:
+            path.append(item.data(0, INDEX_ROLE))
+            item = item.parent()
+        return path[::-1]
+
+    def handle_reply(self, reply, source=None):
+        if source is not self.source or reply.get('id') not in self._requests or reply.get('status') != 'ok':
+            return
+        parent = self._requests.pop(reply['id'])
+        offset = reply['offset']
+        items = []
+        for index, entry in enumerate(reply['entries'], start=offset):
+            item = QTreeWidgetItem([entry['name'], entry['type'], entry['value']])
+            item.setData(0, INDEX_ROLE, index)
+            item.setToolTip(2, entry['value'])
+            if entry['expandable']:
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            items.append(item)
+
+        remaining = reply['total'] - offset - len(reply['entries'])
+        if remaining > 0:
+            more = QTreeWidgetItem([f"Load more ({remaining} remaining)", "", ""])
+            more.setData(0, LOAD_MORE_ROLE, offset + len(reply['entries']))
+            more.setForeground(0, Qt.GlobalColor.gray)
+            items.append(more)
+
+        if parent is None:
+            self.addTopLevelItems(items)
+        else:
+            parent.addChildren(items)
+            if not items:
+                parent.setChildIndicatorPolicy(
+                    QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+
+    def handle_item_expanded(self, item):
+        if not item.data(0, FETCHED_ROLE):
+            item.setData(0, FETCHED_ROLE, True)
+            self.request_page(item, 0)
+
+    def handle_item_clicked(self, item, column):
+        offset = item.data(0, LOAD_MORE_ROLE)
+        if offset is None:
+            return
+        parent = item.parent()
+        if parent is None:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(item))
+        else:
+            parent.removeChild(item)
+        self.request_page(parent, offset)
@@ -0,0 +1,111 @@
+# workspace.py
+#
+# The project folder opened in the window and its symbol index. The index is
+# updated on a background thread (which fans parsing out to worker
+# processes) whenever the folder is opened, a file is saved or the window is
+# activated again; lookups are answered from the GUI thread's own
+# connection and stay valid while an update is running.
+
+import os
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import settings
+from symbol_index import SymbolIndex, database_path
+
+
+class Workspace(QObject):
+    index_updated = pyqtSignal(object)  # IndexStats
+    index_failed = pyqtSignal(str)
+    _update_finished = pyqtSignal(int, object, object, object)  # run, IndexStats, name text, error
+
+    def __init__(self, cache_dir, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.root = None
+        self.index = None
+        self._thread = None
+        self._run = 0  # Results of runs before the current one are dropped
+        self._stop = threading.Event()
+        self._pending = False
+        # Emitted from the update thread, delivered on the GUI thread
+        self._update_finished.connect(self._on_update_finished)
+
+    def open_folder(self, root):
+        self.close()
+        self.root = os.path.abspath(root)
+        self.index = SymbolIndex(database_path(self.cache_dir, self.root))
+        self.refresh()
+
+    def contains(self, path):
+        if self.root is None:
+            return False
+        try:
+            return os.path.commonpath([self.root, os.path.abspath(path)]) == self.root
+        except ValueError:
+            return False  # Another drive
+
+    def refresh(self):
+        # Only files whose mtime or size changed are parsed again
+        if self.root is None:
+            return
+        if self._thread is not None:
+            self._pending = True
+            return
+        self._stop.clear()
+        self._run += 1
+        args = (self._run, self.root, self.index.path, settings.value('index/processes'))
+        self._thread = threading.Thread(target=self._update, args=args, name="LAEFEX symbol index", daemon=True)
+        self._thread.start()
+
+    def _update(self, run, root, path, processes):
+        index = None
+        try:
+            index = SymbolIndex(path)
+            stats = index.update(root, processes, self._stop)
+            # Built here so the first search on the GUI thread does not have to
+            names = index.name_text()
+        except Exception as e:  # sqlite3 and pool errors alike; the GUI keeps working
+            self._update_finished.emit(run, None, None, str(e))
+        else:
+            self._update_finished.emit(run, stats, names, None)
+        finally:
+            if index is not None:
+                index.close()
+
+    def _on_update_finished(self, run, stats, names, error):
+        if run != self._run:
+            return
+        self._thread = None
+        if self.index is not None:
+            self.index.invalidate(names)
+        if error is not None:
+            self.index_failed.emit(error)
+        elif not self._stop.is_set():
+            self.index_updated.emit(stats)
+        if self._pending and not self._stop.is_set():
+            self._pending = False
+            self.refresh()
+
+    def close(self):
+        # Stops a running update after its current batch
+        self._stop.set()
+        self._pending = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        self.root = None
+
+    # --- Lookups ---
+    def complete(self, prefix, limit=50):
+        return self.index.complete(prefix, limit) if self.index is not None and prefix else []
+
+    def definitions(self, name):
+        return self.index.definitions(name) if self.index is not None else []
+
+    def search(self, query, limit=100):
+        return self.index.search(query, limit) if self.index is not None else []